@@ -1,10 +1,11 @@
 from pathlib import Path
+import asyncio
 import shutil
 import uuid
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile, Query, Request, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile, Query, Request, Response, status, UploadFile, File, Form
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from backend.services.audio_embedding_service import AUDIO_FILE_DIR
+from backend.services.audio_embedding_service import AUDIO_FILE_DIR, save_reference_embedding
 from backend.services.audio_transcription_service import process_audio
 from backend.services.note_taker_service import take_notes
 import subprocess
@@ -12,7 +13,11 @@ import os
 from services.storage import Person # Keep for backwards compat if needed, but we prefer Contact
 from database.models import Contact
 from app.core.container import container
-from repos import contact_note_repo, contact_repo, user_repo
+from backend.config import config
+from app.api.session import SESSION_COOKIE, issue_session_token, session_user_id
+# Handlers await the async repos: a DB round-trip must not stall the event loop (and the video websockets)
+from repos import async_contact_note_repo, async_contact_repo, async_user_repo
+from utils.metrics import metrics
 from pathlib import Path
 
 router = APIRouter()
@@ -35,10 +40,19 @@ class UserResponse(BaseModel):
     username: str
     email: EmailStr
 
+class LoginResponse(UserResponse):
+    # Also set as the session cookie; clients without cookies send it as "Authorization: Bearer <token>"
+    session_token: str
+
 @router.get("/")
 def hello_world():
     return "hello_world"
 
+@router.get("/metrics")
+def get_metrics():
+    """Runtime counters (video frames received/processed/dropped, etc.)."""
+    return metrics.snapshot()
+
 def _build_photo_url(request: Request, image_path: Optional[str]) -> Optional[str]:
     if not image_path:
         return None
@@ -49,49 +63,65 @@ def _build_photo_url(request: Request, image_path: Optional[str]) -> Optional[st
     base_url = str(request.base_url).rstrip("/")
     return f"{base_url}/images/{clean_path}"
 
-@router.get("/people", response_model=List[Contact])
-async def get_people(sort: str = Query("last_modified")):
-    """Returns list of all registered people for the current user."""
+# /people page size when the client doesn't pass `limit`
+DEFAULT_PEOPLE_PAGE_SIZE = 100
+
+@router.get("/people", response_model=List[async_contact_repo.ContactListItem])
+async def get_people(
+    request: Request,
+    response: Response,
+    sort: str = Query("last_modified"),
+    limit: int = Query(DEFAULT_PEOPLE_PAGE_SIZE, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+):
+    """
+    Returns one page (`limit`, default DEFAULT_PEOPLE_PAGE_SIZE) of the current
+    user's registered people, sorted by Mongo. The cursor for the next page is in X-Next-Cursor.
+    """
     print(f"GET /people called with sort={sort}")
     
-    current_user = container.face_service.current_user_id
+    current_user = session_user_id(request)
     if not current_user:
-        # For now, return empty or raise error? 
-        # If we return empty list, frontend just shows nothing.
-        print("GET /people: No user logged in.")
-        return []
-
-    people = container.storage.get_all(user_id=current_user)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not logged in",
+        )
 
-    if sort == "alphabetical":
-        # Sort by first check name
-        return sorted(people, key=lambda p: (p.first_name + p.last_name).casefold())
+    if sort not in async_contact_repo.CONTACT_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sort option",
+        )
 
-    if sort == "last_modified":
-        return sorted(people, key=lambda p: p.last_modified, reverse=True)
+    try:
+        people, next_cursor = await async_contact_repo.list_contacts(current_user, sort=sort, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
 
-    raise HTTPException(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        detail="Invalid sort option",
-    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return people
 
 @router.get("/person/{person_id}")
 async def get_person(person_id: str, request: Request):
-    current_user = container.face_service.current_user_id
+    current_user = session_user_id(request)
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not logged in",
         )
 
-    contact = contact_repo.get_contact_by_id(person_id)
-    if not contact or contact.owner_user_id != current_user:
+    contact = await async_contact_repo.get_contact_detail(current_user, person_id)
+    if not contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Person not found",
         )
 
-    notes = contact_note_repo.list_contact_notes_for_contact(
+    notes = await async_contact_note_repo.list_contact_note_items_for_contact(
         user_id=current_user,
         contact_id=person_id,
     )
@@ -110,11 +140,11 @@ async def get_person(person_id: str, request: Request):
     }
 
 @router.get("/profile/{person_id}/search")
-async def search_person_notes(person_id: str, q: str):
+async def search_person_notes(person_id: str, q: str, request: Request):
     """
     Search within a single profile (contact notes).
     """
-    current_user = container.face_service.current_user_id
+    current_user = session_user_id(request)
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -122,15 +152,15 @@ async def search_person_notes(person_id: str, q: str):
         )
 
     # 1. Verify existence/ownership
-    contact = contact_repo.get_contact_by_id(person_id)
-    if not contact or contact.owner_user_id != current_user:
+    contact = await async_contact_repo.get_contact_detail(current_user, person_id)
+    if not contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Person not found",
         )
 
     # 2. Semantic search scoped to this contact_id
-    note_results = contact_note_repo.semantic_search_notes(
+    note_results = await async_contact_note_repo.semantic_search_notes(
         user_id=current_user,
         query=q,
         limit=20,
@@ -150,18 +180,18 @@ async def search_person_notes(person_id: str, q: str):
 
 
 @router.get("/searchUser")
-async def search_user(q: str, request: Request):
+async def search_user(q: str, request: Request, limit: int = Query(20, ge=1, le=100)):
     """
-    Search people by name.
+    Search people by name (prefix match on name words, best matches first).
     """
-    current_user = container.face_service.current_user_id
+    current_user = session_user_id(request)
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not logged in",
         )
     
-    contacts = contact_repo.search_contacts_by_name(current_user, q)
+    contacts = await async_contact_repo.search_contacts_by_name(current_user, q, limit=limit)
     
     results = []
     for contact in contacts:
@@ -179,7 +209,7 @@ async def search_info(q: str, request: Request):
     """
     Semantic search based on context labels/notes.
     """
-    current_user = container.face_service.current_user_id
+    current_user = session_user_id(request)
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -187,12 +217,15 @@ async def search_info(q: str, request: Request):
         )
         
     # Search notes
-    note_results = contact_note_repo.semantic_search_notes(
+    note_results = await async_contact_note_repo.semantic_search_notes(
         user_id=current_user,
         query=q,
         limit=20 # Fetch a few more to filter if needed
     )
     
+    # Associated contacts, all in one query
+    contacts = await async_contact_repo.get_contacts_by_ids(current_user, (item.note.contact_id for item in note_results))
+
     search_results = []
     seen_notes = set()
 
@@ -202,8 +235,7 @@ async def search_info(q: str, request: Request):
             continue
         seen_notes.add(note.note_id)
 
-        # Get associated contact
-        contact = contact_repo.get_contact_by_id(note.contact_id)
+        contact = contacts.get(note.contact_id)
         if not contact:
             continue
             
@@ -221,12 +253,12 @@ async def search_info(q: str, request: Request):
 @router.post("/register", response_model=UserResponse)
 async def register(request: UserRegisterRequest):
     try:
-        new_user = user_repo.create_user(
+        new_user = await async_user_repo.create_user(
             username=request.username,
             email=request.email,
             password=request.password
         )
-        saved_user = user_repo.save_user_to_database(new_user)
+        saved_user = await async_user_repo.save_user_to_database(new_user)
         return UserResponse(
             user_id=saved_user.user_id,
             username=saved_user.username,
@@ -240,13 +272,27 @@ async def register(request: UserRegisterRequest):
 
 @router.post("/uploadAudio")
 async def upload_audio(
-    user_id: str = Form(...),
+    request: Request,
+    user_id: Optional[str] = Form(None),
     file: UploadFile = File(...)
 ):
     """
-    Upload an audio sample for a user/person.
+    Upload the logged-in user's voice sample.
     Saves and converts the incoming WebM/Ogg audio to a standard WAV file using ffmpeg.
     """
+    current_user = session_user_id(request)
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not logged in",
+        )
+    if user_id and user_id != current_user:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Can only upload your own voice sample",
+        )
+    user_id = current_user
+
     if not file:
         raise HTTPException(status_code=400, detail="No file sent")
 
@@ -295,6 +341,13 @@ async def upload_audio(
         # 3. Clean up temp file
         if temp_path.exists():
             temp_path.unlink()
+
+        # 4. Embed the voice sample once; speaker scoring reuses it (<user_id>.npy).
+        # Best effort: scoring computes it on first use if this fails.
+        try:
+            await asyncio.to_thread(save_reference_embedding, str(final_path))
+        except Exception as e:
+            print(f"Could not embed voice sample {final_path}: {e}")
                 
         return {"message": "Audio uploaded and converted successfully", "url": f"/audio/{final_filename}"}
 
@@ -306,9 +359,9 @@ async def upload_audio(
             
         raise HTTPException(status_code=500, detail=f"Could not save and convert audio file: {str(e)}")
 
-@router.post("/login", response_model=UserResponse)
-async def login(request: UserLoginRequest):
-    result = user_repo.validate_login(request.email, request.password)
+@router.post("/login", response_model=LoginResponse)
+async def login(request: UserLoginRequest, response: Response):
+    result = await async_user_repo.validate_login(request.email, request.password)
 
     if result.status == "USER_NOT_FOUND":
         raise HTTPException(
@@ -323,20 +376,47 @@ async def login(request: UserLoginRequest):
     
     if result.status == "SUCCESS" and result.user:
 
-        # Update the face service with the logged-in user
-        container.face_service.set_current_user(result.user.user_id)
+        # Update the face service with the logged-in user (on the recognition thread,
+        # so the index is never swapped out under an in-flight frame)
+        await container.frame_processor.run_serialized(
+            container.face_service.set_current_user, result.user.user_id
+        )
         print(f"LOGIN SUCCESS: FaceService updated with user {result.user.user_id}")
-        
-        return UserResponse(
+
+        # Every other endpoint and websocket resolves the user from this token (see app/api/session.py)
+        session_token = issue_session_token(result.user.user_id)
+        response.set_cookie(
+            SESSION_COOKIE,
+            session_token,
+            max_age=config.session_ttl_s,
+            httponly=True,
+            samesite="lax",
+        )
+
+        return LoginResponse(
             user_id=result.user.user_id,
             username=result.user.username,
-            email=result.user.email
+            email=result.user.email,
+            session_token=session_token,
         )
     
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unknown login error")
 
+@router.post("/logout")
+async def logout(response: Response):
+    response.delete_cookie(SESSION_COOKIE)
+    return {"message": "Logged out"}
+
 @router.post("/process-audio")
-async def analyze_audio(audio: UploadFile = File(...), contact_id: str = Form(""), background: BackgroundTasks = BackgroundTasks()):
+async def analyze_audio(request: Request, audio: UploadFile = File(...), contact_id: str = Form(""), background: BackgroundTasks = BackgroundTasks()):
+    # with open("backend/most_recent_login_id.txt", 'r') as f:
+    #     user_id = f.readline()
+    user_id = session_user_id(request)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not logged in",
+        )
     if audio.filename is None:
         raise HTTPException(
             status_code=400,
@@ -362,9 +442,6 @@ async def analyze_audio(audio: UploadFile = File(...), contact_id: str = Form(""
             detail=f"Error: {e}"
         )
 
-    # with open("backend/most_recent_login_id.txt", 'r') as f:
-    #     user_id = f.readline()
-    user_id = container.face_service.current_user_id
     print("contact id: ", contact_id)
     background.add_task(take_notes, str(dest_path), user_id, contact_id)
 
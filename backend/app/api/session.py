@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import hmac
+import time
+
+from starlette.requests import HTTPConnection
+
+from backend.config import config
+
+SESSION_COOKIE = "session"
+TOKEN_QUERY_PARAM = "token" # WebSocket clients that can neither set headers nor send the cookie
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(config.session_secret.encode(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def issue_session_token(user_id: str) -> str:
+    """Signed "<user_id>:<expiry>" token handed out by /login, valid for config.session_ttl_s."""
+    payload = f"{user_id}:{int(time.time()) + config.session_ttl_s}"
+    encoded = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    return f"{encoded}.{_sign(payload)}"
+
+
+def read_session_token(token: str) -> str | None:
+    """The user_id a token was issued for, or None if it is malformed, forged or expired."""
+    try:
+        encoded, signature = token.rsplit(".", 1)
+        payload = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+        user_id, expires = payload.rsplit(":", 1)
+        expired = int(expires) < time.time()
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)) or expired or not user_id:
+        return None
+    return user_id
+
+
+def session_user_id(connection: HTTPConnection) -> str | None:
+    """
+    User a REST request or WebSocket acts for, from its session token: the
+    Authorization: Bearer header, the session cookie set by /login, or the
+    token query param. None without a valid token.
+    """
+    scheme, _, credentials = connection.headers.get("Authorization", "").partition(" ")
+    token = (
+        (credentials if scheme.lower() == "bearer" else None)
+        or connection.cookies.get(SESSION_COOKIE)
+        or connection.query_params.get(TOKEN_QUERY_PARAM)
+    )
+    return read_session_token(token) if token else None
@@ -1,19 +1,31 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 import cv2
 import numpy as np
 import threading
 import asyncio
 import os
+import uuid
 
 from app.core.container import container
+from app.api.session import session_user_id
+from backend.config import config
+from repos import async_contact_repo, async_user_repo
+from services.audio_stream import AudioWindower, StreamingNoteTaker, decode_audio_chunk
+from services.face_detection import FaceAnnotation, draw_face_annotations
+from services.frame_broadcaster import FrameBroadcaster, FrameSubscription
+from services.frame_processor import FrameQueueFull, LatestFrameSlot
+from services.stt import create_stt
+from utils.metrics import metrics
 
 ws_router = APIRouter()
-latest_frame = None
-latest_frame_bytes = None
+latest_frame: np.ndarray | None = None  # last producer frame, read by the debug display
 last_recognition_id = None
-recognition_clients: set[WebSocket] = set()
+recognition_clients: dict[str, set[WebSocket]] = {} # user_id -> that user's /ws/recognition sockets
 lock = threading.Lock()
 face_service = container.face_service
+frame_processor = container.frame_processor
+frame_broadcasters: dict[str, FrameBroadcaster] = {} # user_id -> fan-out to that user's /ws/video-consumer sockets
+speech_to_text = create_stt(config.stt_backend)
 
 # We'll store the display thread and a stop event
 display_thread = None
@@ -60,22 +72,84 @@ async def websocket_audio_debug(websocket: WebSocket):
     except WebSocketDisconnect:
         print("[INFO] Client disconnected from /ws/audio-debug")
 
-async def _broadcast_recognition(contact_id: str) -> None:
-    if not recognition_clients:
+@ws_router.websocket("/ws/audio")
+async def websocket_audio(websocket: WebSocket, contact_id: str, sample_rate: int = Query(16000, ge=8000, le=48000)):
+    """
+    Streaming conversation notes with `contact_id`. Binary messages are audio:
+    WAV chunks, or raw 16-bit mono PCM at `sample_rate`. The text message "end"
+    (or a disconnect) ends the conversation. The audio is cut into windows of
+    config.audio_stream_window_s, each transcribed, attributed and turned into
+    notes while the next one is recorded; the client gets JSON events
+    {"type": "utterance" | "notes" | "done", ...} as they happen.
+    """
+    await websocket.accept()
+
+    user_id = session_user_id(websocket)
+    user = await async_user_repo.get_user_by_user_id(user_id) if user_id else None
+    if user is None:
+        await websocket.close(code=1008, reason="User not logged in")
+        return
+    reference_sample_path = f"./data/audio/{user.user_id}.wav"
+    if not os.path.exists(reference_sample_path):
+        await websocket.close(code=1008, reason="Speaker needs to have an audio sample")
+        return
+    if await async_contact_repo.get_contact_detail(user.user_id, contact_id) is None:
+        await websocket.close(code=1008, reason="Person not found")
+        return
+
+    windower = AudioWindower(sample_rate, window_s=config.audio_stream_window_s)
+    windows: asyncio.Queue = asyncio.Queue()
+    note_taker = StreamingNoteTaker(
+        speech_to_text, user, contact_id, sample_rate, reference_sample_path, websocket.send_json
+    )
+    # Windows are processed in order while the receive loop keeps reading audio
+    worker = asyncio.create_task(note_taker.run(windows))
+    print(f"[INFO] Audio stream started for contact {contact_id}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                metrics.incr("audio.chunks_received")
+                for window in windower.push(decode_audio_chunk(message["bytes"], sample_rate)):
+                    windows.put_nowait(window)
+            elif message.get("text") == "end":
+                break
+    except (WebSocketDisconnect, ValueError) as e:
+        print(f"[INFO] Audio stream ended: {e!r}")
+    finally:
+        tail = windower.flush()
+        if tail is not None:
+            windows.put_nowait(tail)
+        windows.put_nowait(None)
+        await worker
+
+    print(f"[INFO] Audio stream done: {note_taker.notes_created} notes")
+    try:
+        await websocket.send_json({"type": "done", "notes_created": note_taker.notes_created})
+        await websocket.close()
+    except Exception:
+        pass  # client already gone
+
+async def _broadcast_recognition(user_id: str, contact_id: str) -> None:
+    clients = recognition_clients.get(user_id)
+    if not clients:
         return
 
     payload = {"contact_id": contact_id}
     # print(f"[INFO] Broadcasting recognition event: {contact_id}")
     disconnected: list[WebSocket] = []
     # Iterate over a copy to handle set modifications during iteration
-    for client in list(recognition_clients):
+    for client in list(clients):
         try:
             await client.send_json(payload)
         except Exception:
             disconnected.append(client)
 
     for client in disconnected:
-        recognition_clients.discard(client)
+        clients.discard(client)
 
 @ws_router.websocket("/ws/video-debug")
 async def websocket_debug(websocket: WebSocket):
@@ -118,13 +192,127 @@ async def websocket_debug(websocket: WebSocket):
             display_thread.join()
         print("WebSocket connection closed, display loop terminated")
 
+def _encode_for_consumers(data: bytes, frame: np.ndarray, annotations: list[FaceAnnotation]) -> bytes | None:
+    """JPEG for /ws/video-consumer: the producer's own bytes if nothing was drawn and no resize is needed."""
+    width = config.video_consumer_width
+    if not annotations and (not width or frame.shape[1] <= width):
+        metrics.incr("video.jpeg_passthrough")
+        return data
+
+    if annotations:
+        # latest_frame holds the same array; draw on a copy so it stays clean
+        frame = draw_face_annotations(frame.copy(), annotations)
+    if width and frame.shape[1] > width:
+        frame = cv2.resize(frame, (width, round(frame.shape[0] * width / frame.shape[1])), interpolation=cv2.INTER_AREA)
+    success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, config.video_consumer_jpeg_quality])
+    metrics.incr("video.jpeg_encodes")
+    return buffer.tobytes() if success else None
+
+async def _process_producer_frame(data: bytes, stream_id: str, user_id: str) -> str | None:
+    """Decodes, recognizes and publishes one producer frame; returns the detected contact id."""
+    global latest_frame
+    nparr = np.frombuffer(data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    detected_id = None
+    if frame is not None:
+        # Recognition runs in the frame processor's workers, not on the event loop
+        annotations: list[FaceAnnotation] = []
+        try:
+            annotations, detected_id = await frame_processor.recognize(frame, stream_id, user_id)
+        except FrameQueueFull:
+            pass # recognition saturated -> forward this frame unannotated
+
+        if detected_id:
+            await _broadcast_recognition(user_id, detected_id)
+
+        with lock:
+            latest_frame = frame
+
+        # Overlays + JPEG only when a consumer is watching, at most at its requested FPS
+        # Only this user's consumers see the frame
+        broadcaster = frame_broadcasters.get(user_id)
+        if broadcaster is not None and broadcaster.wants_frame():
+            frame_bytes = await asyncio.to_thread(_encode_for_consumers, data, frame, annotations)
+            if frame_bytes:
+                # One bytes object, shared by every consumer
+                broadcaster.publish(frame_bytes)
+        else:
+            metrics.incr("video.jpeg_encodes_skipped")
+
+    metrics.incr("video.frames_processed")
+    return detected_id
+
+async def _run_latest_frame_producer(websocket: WebSocket, stream_id: str, user_id: str) -> None:
+    """
+    Latest-frame-wins loop: receiving never waits on recognition. Each frame
+    overwrites the single slot, the processing task always takes the freshest
+    one, and anything overwritten before it was picked up is dropped. If either
+    task fails, the connection ends.
+    """
+    slot = LatestFrameSlot()
+    stats = {"received": 0, "processed": 0, "dropped": 0}
+
+    async def process_latest():
+        while (data := await slot.get()) is not None:
+            detected_id = await _process_producer_frame(data, stream_id, user_id)
+            stats["processed"] += 1
+            await websocket.send_text(detected_id if detected_id else "No Person")
+
+    async def receive_frames():
+        while True:
+            data = await websocket.receive_bytes()
+            stats["received"] += 1
+            metrics.incr("video.frames_received")
+            if slot.put(data):
+                stats["dropped"] += 1
+                metrics.incr("video.frames_dropped")
+
+    worker = asyncio.create_task(process_latest())
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        # Whichever ends first (disconnect, or a failed frame) ends the connection
+        done, _ = await asyncio.wait({worker, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        print("Video producer disconnected")
+    except Exception as e:
+        print(f"Video producer error: {e}")
+    finally:
+        slot.close()
+        for task in (receiver, worker):
+            task.cancel()
+        await asyncio.gather(receiver, worker, return_exceptions=True)
+        print(f"Video producer stats: {stats}")
+
 @ws_router.websocket("/ws/video-producer")
-async def websocket_producer(websocket: WebSocket):
-    global latest_frame, latest_frame_bytes, last_recognition_id
+async def websocket_producer(websocket: WebSocket, mode: str = "ack"):
+    """
+    mode=ack (default): strict request/reply, one text reply per frame.
+    mode=latest: the client streams without waiting; only the newest frame is
+    recognized and replies come once per processed frame (see counters in /metrics).
+    """
     await websocket.accept()
-    print("Video producer connected")
+    print(f"Video producer connected (mode={mode})")
     print("Video WebSocket connected")
 
+    # Face tracks are kept per producer connection; faces are matched against this user's contacts
+    stream_id = uuid.uuid4().hex
+    user_id = session_user_id(websocket)
+    if not user_id:
+        await websocket.close(code=1008, reason="User not logged in")
+        return
+
+    if mode == "latest":
+        try:
+            await _run_latest_frame_producer(websocket, stream_id, user_id)
+        finally:
+            await frame_processor.drop_stream(stream_id)
+        return
+    if mode != "ack":
+        await websocket.close(code=1008, reason=f"Unknown mode: {mode}")
+        return
+
     # Reset stop_event at the start of each new connection
     stop_event = threading.Event()
 
@@ -140,48 +328,66 @@ async def websocket_producer(websocket: WebSocket):
                 stop_event.set()  # stop this loop
                 break
 
-            nparr = np.frombuffer(data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            detected_id = None
-            if frame is not None:
-                # Add overlays/labels before streaming to consumers
-                # process_frame now returns (annotated_frame, single_detected_id_or_none)
-                frame, detected_id = face_service.process_frame(frame)
-                
-                if detected_id:
-                    await _broadcast_recognition(detected_id)
-
-                success, buffer = cv2.imencode('.jpg', frame)
-                if success:
-                    with lock:
-                        latest_frame = frame
-                        latest_frame_bytes = buffer.tobytes()
-
+            metrics.incr("video.frames_received")
+            detected_id = await _process_producer_frame(data, stream_id, user_id)
             await websocket.send_text(detected_id if detected_id else "No Person")
 
     except Exception as e:
         print(f"Video producer error: {e}")
+    finally:
+        await frame_processor.drop_stream(stream_id)
+
+async def _close_on_disconnect(websocket: WebSocket, subscription: FrameSubscription) -> None:
+    """Ends the subscription as soon as the client goes away, even while no frames arrive."""
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except Exception:
+        pass
+    finally:
+        subscription.close()
 
 @ws_router.websocket("/ws/video-consumer")
-async def websocket_consumer(websocket: WebSocket):
+async def websocket_consumer(websocket: WebSocket, fps: float | None = None):
+    """
+    Sends each new annotated frame once; a slow client skips straight to the newest
+    frame. `fps` caps the rate this client needs (default VIDEO_CONSUMER_MAX_FPS).
+    """
     await websocket.accept()
+    user_id = session_user_id(websocket)
+    if not user_id:
+        await websocket.close(code=1008, reason="User not logged in")
+        return
     print("Video consumer connected")
 
+    max_fps = min(fps, config.video_consumer_max_fps) if fps else config.video_consumer_max_fps
+    broadcaster = frame_broadcasters.setdefault(user_id, FrameBroadcaster())
+    subscription = broadcaster.subscribe(max_fps)
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, subscription))
     try:
-        while True:
-            await asyncio.sleep(0.03)
-            with lock:
-                frame_bytes = latest_frame_bytes
-            if frame_bytes:
-                await websocket.send_bytes(frame_bytes)
-
+        while (frame_bytes := await subscription.next_frame()) is not None:
+            await websocket.send_bytes(frame_bytes)
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"Video consumer error: {e}")
+    finally:
+        subscription.close()
+        watcher.cancel()
+        if not len(broadcaster) and frame_broadcasters.get(user_id) is broadcaster:
+            del frame_broadcasters[user_id]
+        print("Video consumer disconnected")
 
 @ws_router.websocket("/ws/recognition")
 async def websocket_recognition(websocket: WebSocket):
+    """Contact ids recognized in the logged-in user's video streams, as {"contact_id": ...}."""
     await websocket.accept()
-    recognition_clients.add(websocket)
+    user_id = session_user_id(websocket)
+    if not user_id:
+        await websocket.close(code=1008, reason="User not logged in")
+        return
+    clients = recognition_clients.setdefault(user_id, set())
+    clients.add(websocket)
     print("Recognition WebSocket connected")
 
     try:
@@ -192,5 +398,7 @@ async def websocket_recognition(websocket: WebSocket):
     except Exception as e:
         print(f"Recognition WebSocket error: {e}")
     finally:
-        recognition_clients.discard(websocket)
+        clients.discard(websocket)
+        if not clients and recognition_clients.get(user_id) is clients:
+            del recognition_clients[user_id]
         print("Recognition WebSocket disconnected")
\ No newline at end of file
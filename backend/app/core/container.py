@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from services.recognition_service import FaceService
 from services.storage import DatabasePersonRepository
+from services.frame_processor import FrameProcessor
+from backend.config import config
 
 class Container:
     def __init__(self):
@@ -12,9 +14,12 @@ class Container:
         # Define data paths
         self.data_dir = base_dir / "data"
         self.faces_dir = self.data_dir / "faces"
+        # Not served (unlike faces_dir, mounted as /images): per-user contact snapshots
+        self.index_dir = Path(config.face_index_dir) if config.face_index_dir else self.data_dir / "index"
         
         # 2. Create Directory Structure on Startup
         self.faces_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
         
         print(f"Verified data directory: {self.data_dir}")
         print(f"Verified faces directory: {self.faces_dir}")
@@ -25,8 +30,28 @@ class Container:
         # 4. Initialize Service with absolute path
         self.face_service = FaceService(
             storage=self.storage,
-            images_dir=str(self.faces_dir)
+            images_dir=str(self.faces_dir),
+            index_dir=str(self.index_dir),
+            index_backend=config.face_index_backend,
+            reverify_interval=config.face_reverify_interval,
+            track_timeout_s=config.face_track_timeout_s,
+            registration_min_frames=config.face_registration_min_frames,
+            registration_window_s=config.face_registration_window_s,
+            max_resident_users=config.face_max_resident_users
         )
 
+        # 5. Run recognition off the event loop
+        self.frame_processor = FrameProcessor(
+            self.face_service,
+            workers=config.frame_workers,
+            use_processes=config.frame_worker_processes,
+            batch_window_ms=config.frame_batch_window_ms,
+            max_batch=config.frame_batch_max
+        )
+
+    def shutdown(self):
+        self.frame_processor.shutdown()
+        self.face_service.close()
+
 # Create a singleton instance
 container = Container()
\ No newline at end of file
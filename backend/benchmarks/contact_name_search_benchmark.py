@@ -0,0 +1,129 @@
+"""
+Latency benchmark for contact name search (the /searchUser typeahead).
+
+Fills a scratch database with N contacts for one user and replays typeahead
+keystrokes ("m", "ma", "mar", "mari", "mari s", ...) against:
+  - the original search: unanchored case-insensitive $regex on first/last name
+  - contact_repo.search_contacts_by_name: anchored prefixes on name_tokens
+Also reports the documents each one examines (explain executionStats).
+
+Needs a running MongoDB (MONGO_URL); everything is written to --db, which is
+dropped at the end and must not be the app database.
+
+Usage: python benchmarks/contact_name_search_benchmark.py --sizes 10000 100000
+"""
+import sys
+import time
+import uuid
+import random
+import argparse
+from pathlib import Path
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+project_root = backend_dir.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+# ---------------------------
+
+from pymongo import ASCENDING
+
+from backend.config import config
+from database.db import init_db, get_db_collections, close_db
+from database.models import Contact
+from repos.contact_repo import LIST_PROJECTION, save_contacts_to_database, search_contacts_by_name
+
+USER_ID = "name-search-benchmark"
+SYLLABLES = ["an", "ma", "ri", "jo", "el", "sa", "to", "li", "ne", "ka", "ro", "be", "da", "mi", "no", "vi"]
+
+
+def make_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def legacy_search(query: str) -> list:
+    # The pre-name_tokens implementation, kept for comparison
+    regex = {"$regex": query, "$options": "i"}
+    contacts = get_db_collections().contacts
+    return list(contacts.find(
+        {"owner_user_id": USER_ID, "$or": [{"first_name": regex}, {"last_name": regex}]},
+        LIST_PROJECTION,
+    ))
+
+
+def fill(n: int, rng: random.Random) -> list[Contact]:
+    contacts = get_db_collections().contacts
+    contacts.drop()
+    contacts.create_index([("owner_user_id", ASCENDING)])
+    contacts.create_index([("owner_user_id", ASCENDING), ("name_tokens", ASCENDING)], name="by_owner_name_tokens")
+
+    people = [
+        Contact(contact_id=str(uuid.uuid4()), owner_user_id=USER_ID, first_name=make_name(rng), last_name=make_name(rng))
+        for _ in range(n)
+    ]
+    for start in range(0, n, 5000):
+        save_contacts_to_database(people[start:start + 5000])
+    return people
+
+
+def keystrokes(people: list[Contact], num_names: int, rng: random.Random) -> list[str]:
+    queries = []
+    for person in rng.sample(people, num_names):
+        typed = f"{person.first_name} {person.last_name[:2]}".lower()
+        queries += [typed[:i] for i in range(1, len(typed) + 1) if not typed[:i].endswith(" ")]
+    return queries
+
+
+def time_per_query(search, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        search(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def docs_examined(query: dict) -> int:
+    contacts = get_db_collections().contacts
+    return contacts.find(query).explain()["executionStats"]["totalDocsExamined"]
+
+
+def run(n: int, num_names: int) -> None:
+    rng = random.Random(0)
+    start = time.perf_counter()
+    people = fill(n, rng)
+    print(f"\n=== {n} contacts (filled in {time.perf_counter() - start:.1f} s) ===")
+
+    queries = keystrokes(people, num_names, rng)
+    legacy_ms = time_per_query(legacy_search, queries)
+    tokens_ms = time_per_query(lambda q: search_contacts_by_name(USER_ID, q), queries)
+    print(f"{len(queries)} keystrokes")
+    print(f"legacy $regex       {legacy_ms:8.3f} ms/query")
+    print(f"name_tokens prefix  {tokens_ms:8.3f} ms/query  ({legacy_ms / tokens_ms:.1f}x)")
+
+    sample = queries[2]
+    legacy_q = {"owner_user_id": USER_ID, "$or": [
+        {"first_name": {"$regex": sample, "$options": "i"}},
+        {"last_name": {"$regex": sample, "$options": "i"}},
+    ]}
+    tokens_q = {"owner_user_id": USER_ID, "name_tokens": {"$regex": f"^{sample}"}}
+    print(f"docs examined for {sample!r}: legacy {docs_examined(legacy_q)}, name_tokens {docs_examined(tokens_q)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--names", type=int, default=20, help="names to type, one keystroke at a time")
+    parser.add_argument("--db", default="altitude_name_search_benchmark")
+    args = parser.parse_args()
+
+    if args.db == config.db_name:
+        sys.exit("--db must be a scratch database, not the app's")
+    init_db(config.mongo_url, args.db)
+    try:
+        for size in args.sizes:
+            run(size, args.names)
+    finally:
+        get_db_collections().contacts.drop()
+        get_db_collections().users.drop()
+        close_db()
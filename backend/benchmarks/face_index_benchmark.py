@@ -0,0 +1,111 @@
+"""
+Recall / latency benchmark for the face index backends.
+
+Compares, on synthetic 128-d encodings shaped like dlib face encodings
+(~0.9 between people, ~0.4 between shots of the same person):
+  - the original path: face_recognition.face_distance over a list of arrays
+  - FaceEncodingIndex (exact, batched)
+  - IVFFaceIndex with pure nprobe search (recall@1 vs exact)
+  - IVFFaceIndex with the exact fallback FaceService uses (decision agreement)
+
+Independent Gaussian identities are a pessimistic case for IVF (no cluster
+structure to exploit); real encodings cluster much more tightly per person.
+
+Usage: python benchmarks/face_index_benchmark.py --sizes 10000 100000
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+# ---------------------------
+
+import face_recognition
+from services.face_index import FaceEncodingIndex, IVFFaceIndex, STRONG_MATCH_THRESHOLD, WEAK_MATCH_THRESHOLD
+
+PERSON_SPREAD = 0.0625   # per-dim std between identities -> ~1.0 apart
+SAMPLE_NOISE = 0.025     # per-dim std between shots of one identity -> ~0.4 apart
+
+
+def make_dataset(n: int, num_queries: int, rng: np.random.Generator):
+    known = rng.normal(0, PERSON_SPREAD, (n, 128))
+    picks = rng.choice(n, size=num_queries // 2, replace=False)
+    seen = known[picks] + rng.normal(0, SAMPLE_NOISE, (len(picks), 128))
+    unseen = rng.normal(0, PERSON_SPREAD, (num_queries - len(picks), 128))
+    return known, np.concatenate([seen, unseen])
+
+
+def decide(distance: float) -> str:
+    if distance < STRONG_MATCH_THRESHOLD:
+        return "strong"
+    if distance < WEAK_MATCH_THRESHOLD:
+        return "weak"
+    return "new"
+
+
+def time_per_query(search, queries) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(search(q))
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def run(n: int, num_queries: int, nprobes: list[int]) -> None:
+    rng = np.random.default_rng(0)
+    known, queries = make_dataset(n, num_queries, rng)
+    ids = [str(i) for i in range(n)]
+    print(f"\n=== {n} known faces, {num_queries} queries (half known, half unseen) ===")
+
+    known_list = list(known)
+    baseline_ms, baseline = time_per_query(
+        lambda q: int(np.argmin(face_recognition.face_distance(known_list, q))), queries
+    )
+    print(f"face_distance (list)      {baseline_ms:8.3f} ms/query")
+
+    exact = FaceEncodingIndex()
+    exact.build(ids, known)
+    exact_ms, exact_results = time_per_query(lambda q: exact.search(q, k=1), queries)
+    exact_ids = [r[0][0, 0] for r in exact_results]
+    exact_dists = [float(r[1][0, 0]) for r in exact_results]
+    agree = np.mean([int(i) == b for i, b in zip(exact_ids, baseline)])
+    print(f"exact index               {exact_ms:8.3f} ms/query  agreement with face_distance {agree:.3f}")
+
+    start = time.perf_counter()
+    ivf = IVFFaceIndex(min_train_size=0)
+    ivf.build(ids, known)
+    print(f"ivf training              {(time.perf_counter() - start):8.3f} s")
+
+    for nprobe in nprobes:
+        ivf.nprobe = nprobe
+
+        ivf.exact_above = None
+        ann_ms, ann_results = time_per_query(lambda q: ivf.search(q, k=1), queries)
+        recall = np.mean([r[0][0, 0] == e for r, e in zip(ann_results, exact_ids)])
+
+        ivf.exact_above = STRONG_MATCH_THRESHOLD
+        ivf.exact_fallbacks = 0
+        safe_ms, safe_results = time_per_query(lambda q: ivf.search(q, k=1), queries)
+        decisions = np.mean([decide(float(r[1][0, 0])) == decide(d) for r, d in zip(safe_results, exact_dists)])
+        print(
+            f"ivf nprobe={nprobe:<4d}          {ann_ms:8.3f} ms/query  recall@1 {recall:.3f} | "
+            f"with exact fallback {safe_ms:8.3f} ms/query  decision agreement {decisions:.3f} "
+            f"({ivf.exact_fallbacks} fallbacks)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.nprobe)
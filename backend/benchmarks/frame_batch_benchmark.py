@@ -0,0 +1,107 @@
+"""
+Throughput benchmark for micro-batched face recognition.
+
+Runs the same frames through
+  - encode_faces once per frame vs encode_faces_batch over the whole batch
+  - FaceService.process_frame in a loop vs FaceService.process_frames
+at several batch sizes, on CPU. Tracking is set to re-encode every frame so the
+encoder runs on every face (the worst case the batch path is meant for).
+
+Needs a photo with at least one detectable face; each batch entry is the photo
+shifted by a few pixels so frames are not byte-identical.
+
+Usage: python benchmarks/frame_batch_benchmark.py --image path/to/face.jpg --batch-sizes 1 4 8 16
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+# ---------------------------
+
+from database.models import Contact
+from services.face_detection import encode_faces, encode_faces_batch, locate_faces, prepare_frame
+from services.recognition_service import FaceService
+from services.storage import PersonRepository
+
+
+class InMemoryPersonRepository(PersonRepository):
+    """Keeps registrations out of Mongo so only recognition is timed."""
+
+    def __init__(self):
+        self.people: List[Contact] = []
+
+    def get_all(self, user_id: str = None) -> List[Contact]:
+        return list(self.people)
+
+    def add_person(self, person: Contact) -> None:
+        self.people.append(person)
+
+    def update_person(self, person_id: str, updates: Dict) -> Optional[Contact]:
+        return None
+
+    def get_person(self, person_id: str) -> Optional[Contact]:
+        return None
+
+
+def make_frames(image: np.ndarray, count: int) -> List[np.ndarray]:
+    return [np.roll(image, shift=4 * i, axis=1) for i in range(count)]
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(image: np.ndarray, batch_size: int, repeats: int) -> None:
+    frames = make_frames(image, batch_size)
+    rgb_frames = [prepare_frame(f) for f in frames]
+    locations = [locate_faces(rgb) for rgb in rgb_frames]
+    faces = sum(len(l) for l in locations)
+
+    single = best_of(lambda: [encode_faces(rgb, locs) for rgb, locs in zip(rgb_frames, locations)], repeats)
+    batched = best_of(lambda: encode_faces_batch(rgb_frames, locations), repeats)
+
+    with tempfile.TemporaryDirectory() as images_dir:
+        service = FaceService(InMemoryPersonRepository(), images_dir=images_dir, index_dir=images_dir, reverify_interval=1)
+        service.set_current_user("benchmark")
+        service.process_frame(frames[0].copy())  # register the face once up front
+        streams = [f"stream-{i}" for i in range(batch_size)]
+        loop_s = best_of(lambda: [service.process_frame(f.copy(), s) for f, s in zip(frames, streams)], repeats)
+        batch_s = best_of(lambda: service.process_frames([f.copy() for f in frames], streams), repeats)
+
+    print(
+        f"batch {batch_size:<3d} ({faces:3d} faces) | "
+        f"encode: {faces / single:7.1f} -> {faces / batched:7.1f} faces/s ({single / batched:4.2f}x) | "
+        f"end-to-end: {batch_size / loop_s:6.1f} -> {batch_size / batch_s:6.1f} frames/s ({loop_s / batch_s:4.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", required=True, help="photo containing at least one face")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        sys.exit(f"Could not read {args.image}")
+    if not locate_faces(prepare_frame(image)):
+        sys.exit(f"No face detected in {args.image} at 1/4 scale")
+
+    for size in args.batch_sizes:
+        run(image, size, args.repeats)
@@ -0,0 +1,185 @@
+"""
+Load test: REST latency while video producers stream.
+
+Against a running server, measures the latency of REST calls (default
+/people and /searchUser) in two phases:
+  1. idle: REST clients only
+  2. streaming: the same REST clients while --producers websocket clients
+     push JPEG frames to /ws/video-producer at --fps each
+With handlers awaiting the async repos the two phases should report similar
+percentiles; handlers that block the event loop on a DB call show up as a
+long p95/p99 tail in phase 2 (and slower frame acks).
+
+Before/after: run the server from the commit before the async repos (sync
+handlers) with --save, then from the current tree with --compare; the
+second run prints each percentile next to the saved one.
+
+Usage:
+  python main.py                      # in another shell
+  python benchmarks/rest_latency_load_test.py --token <session_token from /login> --producers 4 --duration 20
+  python benchmarks/rest_latency_load_test.py --token <...> --save sync.json      # old sync handlers
+  python benchmarks/rest_latency_load_test.py --token <...> --compare sync.json   # async handlers
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+import websockets
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+# ---------------------------
+
+
+async def http_get(host: str, port: int, path: str, headers: dict) -> int:
+    """Minimal HTTP/1.1 GET (no client library needed); returns the status code."""
+    reader, writer = await asyncio.open_connection(host, port)
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b" ", 2)[1])
+
+
+async def rest_client(base: str, paths: list[str], headers: dict, stop: asyncio.Event, samples: dict, errors: dict):
+    url = urlsplit(base)
+    i = 0
+    while not stop.is_set():
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            code = await http_get(url.hostname, url.port or 80, path, headers)
+            if code >= 400:
+                errors[path] = errors.get(path, 0) + 1
+        except OSError:
+            errors[path] = errors.get(path, 0) + 1
+            await asyncio.sleep(0.1)
+            continue
+        samples.setdefault(path, []).append((time.perf_counter() - start) * 1000)
+
+
+async def producer(ws_url: str, frame: bytes, fps: float, stop: asyncio.Event, acks: list):
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        interval = 1.0 / fps
+        while not stop.is_set():
+            start = time.perf_counter()
+            await ws.send(frame)
+            await ws.recv()
+            acks.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+
+def load_frame(image: str | None, quality: int = 80) -> bytes:
+    if image:
+        frame = cv2.imread(image)
+        if frame is None:
+            raise SystemExit(f"Could not read {image}")
+    else:
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def summarize(samples: dict, errors: dict, duration: float) -> dict:
+    """Per path: throughput, latency percentiles (ms) and error count."""
+    stats = {}
+    for path, values in samples.items():
+        values = sorted(values)
+        pct = lambda p: values[min(len(values) - 1, int(p / 100 * len(values)))]
+        stats[path] = {
+            "rps": len(values) / duration,
+            "p50": statistics.median(values),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": values[-1],
+            "errors": errors.get(path, 0),
+        }
+    return stats
+
+
+def report(phase: str, stats: dict, baseline: dict | None = None) -> None:
+    print(f"\n--- {phase} ---")
+    for path, s in stats.items():
+        line = (
+            f"{path:32s} {s['rps']:7.1f} req/s  p50 {s['p50']:7.1f}  "
+            f"p95 {s['p95']:7.1f}  p99 {s['p99']:7.1f}  max {s['max']:7.1f} ms  errors {s['errors']}"
+        )
+        before = (baseline or {}).get(path)
+        if before:
+            line += (
+                f"\n{'  (saved run)':32s} {before['rps']:7.1f} req/s  p50 {before['p50']:7.1f}  "
+                f"p95 {before['p95']:7.1f}  p99 {before['p99']:7.1f}  max {before['max']:7.1f} ms  errors {before['errors']}"
+            )
+        print(line)
+
+
+async def run_phase(args, frame: bytes | None) -> tuple[dict, dict, list]:
+    stop = asyncio.Event()
+    samples: dict = {}
+    errors: dict = {}
+    acks: list = []
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    tasks = [
+        asyncio.create_task(rest_client(args.base_url, args.paths, headers, stop, samples, errors))
+        for _ in range(args.rest_clients)
+    ]
+    if frame is not None:
+        ws_url = args.base_url.replace("http", "ws", 1) + "/ws/video-producer"
+        if args.token:
+            ws_url += f"?token={args.token}"
+        tasks += [asyncio.create_task(producer(ws_url, frame, args.fps, stop, acks)) for _ in range(args.producers)]
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return samples, errors, acks
+
+
+async def main(args) -> None:
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    frame = load_frame(args.image)
+    idle = await run_phase(args, None)
+    results = {"idle": summarize(idle[0], idle[1], args.duration)}
+    report("idle", results["idle"], baseline.get("idle"))
+
+    streaming = await run_phase(args, frame)
+    results["streaming"] = summarize(streaming[0], streaming[1], args.duration)
+    report(f"streaming ({args.producers} producers @ {args.fps} fps)", results["streaming"], baseline.get("streaming"))
+    acks = streaming[2]
+    if acks:
+        results["acks"] = {"per_s": len(acks) / args.duration, "p50": statistics.median(acks)}
+        print(f"frame acks: {results['acks']['per_s']:.1f}/s, p50 {results['acks']['p50']:.1f} ms")
+        if "acks" in baseline:
+            print(f"  (saved run): {baseline['acks']['per_s']:.1f}/s, p50 {baseline['acks']['p50']:.1f} ms")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved results to {args.save}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default="", help="session_token returned by /login")
+    parser.add_argument("--paths", nargs="+", default=["/people?sort=last_modified", "/people?sort=alphabetical", "/searchUser?q=a"])
+    parser.add_argument("--rest-clients", type=int, default=4)
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--image", help="JPEG/PNG frame to stream (default: random 640x480 noise)")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per phase")
+    parser.add_argument("--save", help="write the results to this JSON file (e.g. the sync-handler baseline)")
+    parser.add_argument("--compare", help="print a --save'd run next to this one")
+    asyncio.run(main(parser.parse_args()))
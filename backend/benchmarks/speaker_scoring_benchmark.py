@@ -0,0 +1,133 @@
+"""
+Wall-clock benchmark for clipping utterances out of a conversation recording
+before speaker scoring.
+
+Writes a synthetic conversation WAV of --minutes (two alternating speakers,
+1-8 s utterances), then times getting every utterance speaker scoring would
+embed (min_utt_s / max_utts_per_speaker as in score_speakers_against_reference,
+--max-utts 0 for all of them) ready for the model:
+  - the original path: pydub decode, then per clip a temp WAV export and
+    audio_io.load of it
+  - load_audio_samples once at the file's rate + slicing, resampling only
+    the selected clips (score_speakers_in_samples)
+With --embed both paths also run ECAPA on every clip, so the total includes
+the (identical) model cost.
+
+Usage: python benchmarks/speaker_scoring_benchmark.py --minutes 30 --rate 16000 44100
+"""
+import os
+import sys
+import time
+import wave
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+project_root = backend_dir.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+# ---------------------------
+
+import torch
+from pydub import AudioSegment
+from speechbrain.dataio import audio_io  # type: ignore
+
+from backend.services.audio_embedding_service import VERIFIER_SAMPLE_RATE, embed_signals, resample
+from backend.services.audio_transcription_service import Utterance, load_audio_samples
+
+MIN_UTT_S = 0.6
+
+
+def make_conversation(path: str, minutes: float, rate: int, rng: random.Random) -> list[Utterance]:
+    """Noise bursts shaped like a two-person conversation; returns its utterances."""
+    utterances = []
+    t = 0.0
+    total_s = minutes * 60
+    while t < total_s:
+        duration = min(rng.uniform(1.0, 8.0), total_s - t)
+        utterances.append(Utterance(
+            speaker_id=f"speaker_{len(utterances) % 2}", start=t, end=t + duration, text=""
+        ))
+        t += duration + rng.uniform(0.1, 0.8)
+
+    signal = np.random.default_rng(0).normal(0, 0.1, int(total_s * rate)).astype(np.float32)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+    return utterances
+
+
+def select(utterances: list[Utterance], max_utts_per_speaker: int) -> list[Utterance]:
+    by_speaker: dict[str, list[Utterance]] = defaultdict(list)
+    for u in utterances:
+        if u.duration >= MIN_UTT_S:
+            by_speaker[u.speaker_id].append(u)
+    if max_utts_per_speaker <= 0:
+        return [u for utts in by_speaker.values() for u in utts]
+    return [u for utts in by_speaker.values() for u in utts[:max_utts_per_speaker]]
+
+
+def temp_wav_clips(path: str, utterances: list[Utterance], embed: bool) -> int:
+    full_audio = AudioSegment.from_file(path)
+    for u in utterances:
+        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        tmp.close()
+        try:
+            full_audio[int(u.start * 1000):int(u.end * 1000)].export(tmp.name, format="wav")
+            signal, _ = audio_io.load(tmp.name)
+            if embed:
+                embed_signals(signal.reshape(1, -1))
+        finally:
+            os.unlink(tmp.name)
+    return len(utterances)
+
+
+def in_memory_clips(path: str, utterances: list[Utterance], embed: bool) -> int:
+    samples, rate = load_audio_samples(path)
+    for u in utterances:
+        clip = resample(samples[int(u.start * rate):int(u.end * rate)], rate, VERIFIER_SAMPLE_RATE)
+        signal = torch.from_numpy(clip).unsqueeze(0)
+        if embed:
+            embed_signals(signal)
+    return len(utterances)
+
+
+def timed(fn, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    n = fn(*args)
+    return time.perf_counter() - start, n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--rate", type=int, nargs="+", default=[16000], help="sample rates of the recording")
+    parser.add_argument("--max-utts", type=int, nargs="+", default=[15, 0], help="per speaker, 0 = all")
+    parser.add_argument("--embed", action="store_true", help="also run ECAPA on every clip")
+    args = parser.parse_args()
+
+    for rate in args.rate:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "conversation.wav")
+            utterances = make_conversation(path, args.minutes, rate, random.Random(0))
+            print(f"\n=== {args.minutes:g} min at {rate} Hz, {len(utterances)} utterances ===")
+
+            for max_utts in args.max_utts:
+                selected = select(utterances, max_utts)
+                old_s, n = timed(temp_wav_clips, path, selected, args.embed)
+                new_s, _ = timed(in_memory_clips, path, selected, args.embed)
+                label = "all" if max_utts <= 0 else str(max_utts)
+                print(
+                    f"max_utts_per_speaker={label:<4s} {n:5d} clips | temp WAVs {old_s:8.3f} s | "
+                    f"in memory {new_s:8.3f} s | saved {old_s - new_s:8.3f} s ({old_s / max(new_s, 1e-9):.1f}x)"
+                )
@@ -1,15 +1,57 @@
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
+import secrets
 
 load_dotenv()
 
 class Config(BaseModel):
     mongo_url: str = os.environ["MONGO_URL"]
     db_name: str = os.environ.get("MONGO_DB") # type: ignore
+    # Async client used by the request handlers (see database/db.py init_async_db)
+    mongo_max_pool_size: int = int(os.environ.get("MONGO_MAX_POOL_SIZE", "50"))
+    mongo_min_pool_size: int = int(os.environ.get("MONGO_MIN_POOL_SIZE", "5"))
+    mongo_server_selection_timeout_ms: int = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    mongo_connect_timeout_ms: int = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    mongo_timeout_ms: int = int(os.environ.get("MONGO_TIMEOUT_MS", "10000")) # whole operation, incl. waiting for a pooled connection
     embed_dim: int = int(os.environ.get("EMBED_DIM")) # type: ignore
+    # Signs the session tokens issued by /login. Without SESSION_SECRET a random one is used,
+    # so sessions end when the server restarts.
+    session_secret: str = os.environ.get("SESSION_SECRET") or secrets.token_urlsafe(32)
+    session_ttl_s: int = int(os.environ.get("SESSION_TTL_S", str(7 * 24 * 3600)))
     embedding_model: str = "text-embedding-3-small"
+    # Query embeddings: in-memory LRU size, plus an optional SQLite file kept across restarts ("" = memory only)
+    embedding_cache_size: int = int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024"))
+    embedding_cache_path: str = os.environ.get("EMBEDDING_CACHE_PATH", "")
     assembly_ai_api_key: str = os.environ["ASSEMBLY_AI_API_KEY"]
     llm_model_name: str = "gpt-5-nano"
+    # /ws/audio streaming notes: speech-to-text engine ("elevenlabs" or "stub") and window length
+    stt_backend: str = os.environ.get("STT_BACKEND", "elevenlabs")
+    audio_stream_window_s: float = float(os.environ.get("AUDIO_STREAM_WINDOW_S", "15"))
+    # Heavy models (services/model_registry.py) load on first use; MODEL_WARM_UP names the ones
+    # to load in the background at startup instead, e.g. "speaker_embedding"
+    model_warm_up: list[str] = [n.strip() for n in os.environ.get("MODEL_WARM_UP", "").split(",") if n.strip()]
+    torch_num_threads: int = int(os.environ.get("TORCH_NUM_THREADS", "0")) # 0 = torch's default
+    speaker_model_variant: str = os.environ.get("SPEAKER_MODEL_VARIANT", "eager") # "eager" or "torchscript" (frozen, CPU)
+    face_index_backend: str = os.environ.get("FACE_INDEX_BACKEND", "exact") # "exact" or "ivf"
+    # Per-user contact/face index snapshots; must not be under data/faces, which is served as /images ("" = data/index)
+    face_index_dir: str = os.environ.get("FACE_INDEX_DIR", "")
+    note_search_backend: str = os.environ.get("NOTE_SEARCH_BACKEND", "atlas") # "atlas" ($vectorSearch) or "local" (in-process)
+    note_search_quantize: bool = os.environ.get("NOTE_SEARCH_QUANTIZE", "false").lower() == "true" # int8 vectors for "local"
+    frame_workers: int = int(os.environ.get("FRAME_WORKERS", "2"))
+    frame_worker_processes: bool = os.environ.get("FRAME_WORKER_PROCESSES", "true").lower() == "true"
+    # Micro-batch window across producers (0 = recognise each frame on its own)
+    frame_batch_window_ms: float = float(os.environ.get("FRAME_BATCH_WINDOW_MS", "0"))
+    frame_batch_max: int = int(os.environ.get("FRAME_BATCH_MAX", "16"))
+    face_reverify_interval: int = int(os.environ.get("FACE_REVERIFY_INTERVAL", "10")) # frames between re-encoding a tracked face
+    face_track_timeout_s: float = float(os.environ.get("FACE_TRACK_TIMEOUT_S", "1.0"))
+    # Unknown faces are registered after this many sightings or seconds, whichever comes first
+    face_registration_min_frames: int = int(os.environ.get("FACE_REGISTRATION_MIN_FRAMES", "5"))
+    face_registration_window_s: float = float(os.environ.get("FACE_REGISTRATION_WINDOW_S", "1.0"))
+    face_max_resident_users: int = int(os.environ.get("FACE_MAX_RESIDENT_USERS", "8")) # users kept in memory (LRU)
+    # Stream sent to /ws/video-consumer clients (width 0 = producer resolution)
+    video_consumer_max_fps: float = float(os.environ.get("VIDEO_CONSUMER_MAX_FPS", "30"))
+    video_consumer_jpeg_quality: int = int(os.environ.get("VIDEO_CONSUMER_JPEG_QUALITY", "80"))
+    video_consumer_width: int = int(os.environ.get("VIDEO_CONSUMER_WIDTH", "0"))
 
 config = Config()
\ No newline at end of file
@@ -16,6 +16,7 @@ if str(project_root) not in sys.path:
 # ---------------------------
 
 from backend.services.audio_embedding_service import init_audio_service
+from backend.services.model_registry import model_registry
 
 import uvicorn
 from fastapi import FastAPI
@@ -26,13 +27,14 @@ from fastapi.middleware.cors import CORSMiddleware
 # Import Routers
 from app.api.endpoints import router as api_router
 from app.api.websockets import ws_router
+from app.core.container import container
 
 # from dotenv import load_dotenv
 # load_dotenv()
 
 from backend.config import config
 
-from database.db import init_db
+from database.db import close_async_db, init_async_db, init_db
 init_db(config.mongo_url, config.db_name)
 
 init_audio_service()
@@ -46,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # /people paging
 )
 
 # 2. Static Files (Images)
@@ -59,6 +62,27 @@ app.mount("/audio", StaticFiles(directory="data/audio"), name="audio")
 app.include_router(api_router)
 app.include_router(ws_router)
 
+@app.on_event("startup")
+async def startup():
+    # Async client for the request handlers, created on the server's event loop
+    init_async_db(
+        config.mongo_url,
+        config.db_name,
+        maxPoolSize=config.mongo_max_pool_size,
+        minPoolSize=config.mongo_min_pool_size,
+        serverSelectionTimeoutMS=config.mongo_server_selection_timeout_ms,
+        connectTimeoutMS=config.mongo_connect_timeout_ms,
+        timeoutMS=config.mongo_timeout_ms,
+    )
+    # Load the models named in MODEL_WARM_UP without holding up startup; others load on first use
+    if config.model_warm_up:
+        model_registry.warm_up_in_background(config.model_warm_up)
+
+@app.on_event("shutdown")
+async def shutdown():
+    container.shutdown()
+    await close_async_db()
+
 @app.get("/")
 async def root():
     return {"message": "Face Recognition API is running"}
@@ -18,6 +18,8 @@ from backend.config import config
 from database.db import init_db, get_db_collections
 from database.models import Contact, ContactNote
 from repos.contact_note_repo import create_contact_note, save_contact_note_to_database
+from repos.contact_repo import normalize_name_tokens
+from repos.user_repo import bump_contacts_version
 
 # Initialize DB
 print(f"Connecting to database: {config.db_name}...")
@@ -70,12 +72,15 @@ def generate_dummy_data(user_id, count=5):
         )
         
         try:
-            contacts_coll.insert_one(contact.model_dump())
+            doc = contact.model_dump()
+            doc["name_tokens"] = normalize_name_tokens(fname, lname)
+            contacts_coll.insert_one(doc)
             print(f"  [+] Created: {fname} {lname}")
             created_count += 1
         except Exception as e:
             print(f"  [-] Error creating {fname}: {e}")
 
+    bump_contacts_version(user_id) # invalidates the user's face snapshot
     print(f"Done. {created_count} contacts added.")
 
 def generate_dummy_notes(user_id):
@@ -188,18 +193,18 @@ def update_contacts_field(user_id):
         if update_type == "random":
             final_val = get_random_value(field)
             
-        contacts_coll.update_one(
-            {"contact_id": c_id},
-            {"$set": {
-                field: final_val, 
-                "last_modified": datetime.now(timezone.utc)
-            }}
-        )
+        updates = {field: final_val, "last_modified": datetime.now(timezone.utc)}
+        if field in ("first_name", "last_name"):
+            # Keep name search in step with the name (see contact_repo._to_document)
+            names = {"first_name": doc.get("first_name"), "last_name": doc.get("last_name"), field: final_val}
+            updates["name_tokens"] = normalize_name_tokens(names["first_name"], names["last_name"])
+        contacts_coll.update_one({"contact_id": c_id}, {"$set": updates})
         # Show partial preview
         display_val = str(final_val)[:30] + "..." if final_val and len(str(final_val)) > 30 else final_val
         print(f"  -> {doc.get('first_name', 'Unknown')} {doc.get('last_name', '')}: {display_val}")
         updated_count += 1
         
+    bump_contacts_version(user_id) # invalidates the user's face snapshot
     print(f"Done. Updated {updated_count} contacts.")
 
 # --- MAIN LOOP ---
@@ -0,0 +1,174 @@
+"""
+Async mirror of contact_note_repo for the FastAPI handlers, on the shared
+AsyncMongoClient. Note creation (embedding request + user check) is
+blocking and runs in a thread. The note search backend is the one
+contact_note_repo uses, so both layers keep the same index current; its
+hooks can wait on a user's notes loading from Mongo, so they run in a
+thread too.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from database.models import ContactNote
+from database.db import get_async_db_collections
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from repos.contact_note_repo import (
+    NOTE_LIST_PROJECTION,
+    ContactNoteListItem,
+    NoteSearchResult,
+    create_contact_note as _create_contact_note,
+    create_contact_notes as _create_contact_notes,
+    _inserted_notes,
+    note_search,
+)
+from services.vector_embedding_service import get_query_embedding
+
+
+async def create_contact_note(user_id: str, contact_id: str, label: str, content: str) -> ContactNote:
+    return await asyncio.to_thread(_create_contact_note, user_id, contact_id, label, content)
+
+
+async def create_contact_notes(user_id: str, contact_id: str, facts: list[tuple[str, str]]) -> list[ContactNote]:
+    return await asyncio.to_thread(_create_contact_notes, user_id, contact_id, facts)
+
+
+async def create_contact_notes_bulk(user_id: str, contact_id: str, facts: list[tuple[str, str]]) -> list[ContactNote]:
+    notes = await create_contact_notes(user_id, contact_id, facts)
+    return await save_contact_notes_to_database(notes)
+
+
+async def save_contact_note_to_database(note: ContactNote) -> ContactNote:
+    contact_notes = get_async_db_collections().contact_notes
+    try:
+        await contact_notes.insert_one(note.model_dump())
+    except DuplicateKeyError as e:
+        raise ValueError("ContactNote with this note_id already exists") from e
+
+    await asyncio.to_thread(note_search.note_saved, note)
+    return note
+
+
+async def save_contact_notes_to_database(notes: list[ContactNote]) -> list[ContactNote]:
+    if not notes:
+        return []
+    contact_notes = get_async_db_collections().contact_notes
+    try:
+        await contact_notes.insert_many([note.model_dump() for note in notes], ordered=False)
+    except BulkWriteError as e:
+        await asyncio.to_thread(_notes_saved, _inserted_notes(notes, e))
+        if any(err.get("code") == 11000 for err in e.details.get("writeErrors", [])):
+            raise ValueError("ContactNote with this note_id already exists") from e
+        raise
+
+    await asyncio.to_thread(_notes_saved, notes)
+    return notes
+
+
+def _notes_saved(notes: list[ContactNote]) -> None:
+    for note in notes:
+        note_search.note_saved(note)
+
+
+async def get_contact_note_by_id(note_id: str) -> ContactNote | None:
+    contact_notes = get_async_db_collections().contact_notes
+    doc = await contact_notes.find_one({"note_id": note_id}, {"_id": 0})
+    return ContactNote(**doc) if doc else None
+
+
+async def list_contact_notes_for_contact(
+    user_id: str,
+    contact_id: str,
+    limit: int = 100,
+    skip: int = 0,
+) -> list[ContactNote]:
+    contact_notes = get_async_db_collections().contact_notes
+    cursor = (
+        contact_notes.find({"user_id": user_id, "contact_id": contact_id}, {"_id": 0})
+        .sort("last_modified", -1)
+        .skip(skip)
+        .limit(limit)
+    )
+    return [ContactNote(**d) async for d in cursor]
+
+
+async def list_contact_note_items_for_contact(
+    user_id: str,
+    contact_id: str,
+    limit: int = 100,
+    skip: int = 0,
+) -> list[ContactNoteListItem]:
+    """Like list_contact_notes_for_contact, without loading the note embeddings."""
+    contact_notes = get_async_db_collections().contact_notes
+    cursor = (
+        contact_notes.find({"user_id": user_id, "contact_id": contact_id}, NOTE_LIST_PROJECTION)
+        .sort("last_modified", -1)
+        .skip(skip)
+        .limit(limit)
+    )
+    return [ContactNoteListItem(**d) async for d in cursor]
+
+
+async def list_contact_notes_for_user(
+    user_id: str,
+    limit: int = 50,
+    skip: int = 0,
+) -> list[ContactNote]:
+    contact_notes = get_async_db_collections().contact_notes
+    cursor = (
+        contact_notes.find({"user_id": user_id}, {"_id": 0})
+        .sort("last_modified", -1)
+        .skip(skip)
+        .limit(limit)
+    )
+    return [ContactNote(**d) async for d in cursor]
+
+
+async def update_contact_note(note: ContactNote) -> ContactNote:
+    updates = note.model_dump()
+    updates.pop("note_id", None)
+    updates["last_modified"] = datetime.now(timezone.utc)
+
+    contact_notes = get_async_db_collections().contact_notes
+    result = await contact_notes.find_one_and_update(
+        {"note_id": note.note_id},
+        {"$set": updates},
+        return_document=True,
+        projection={"_id": 0},
+    )
+
+    if result is None:
+        raise ValueError("ContactNote was not found")
+
+    updated = ContactNote(**result)
+    await asyncio.to_thread(note_search.note_saved, updated)
+    return updated
+
+
+async def delete_contact_note(note_id: str) -> bool:
+    contact_notes = get_async_db_collections().contact_notes
+    res = await contact_notes.delete_one({"note_id": note_id})
+    if res.deleted_count != 1:
+        return False
+    await asyncio.to_thread(note_search.note_deleted, note_id)
+    return True
+
+
+async def semantic_search_notes(
+    user_id: str,
+    query: str,
+    limit: int = 10,
+    num_candidates: int = 200,
+    contact_id: str | None = None,
+    label: str | None = None,
+    min_score: float = 0.7,
+) -> list[NoteSearchResult]:
+    query_vector = await asyncio.to_thread(get_query_embedding, query)
+    return await note_search.search_async(
+        user_id=user_id,
+        query_vector=query_vector,
+        limit=limit,
+        num_candidates=num_candidates,
+        contact_id=contact_id,
+        label=label,
+        min_score=min_score,
+    )
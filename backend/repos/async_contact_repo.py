@@ -0,0 +1,149 @@
+"""
+Async mirror of contact_repo for the FastAPI handlers: same functions, read
+models, projections and cursors (imported from contact_repo), on the shared
+AsyncMongoClient.
+"""
+import uuid
+from typing import Dict, Iterable, List
+
+from database.models import Contact
+from database.db import get_async_db_collections
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from repos.async_user_repo import bump_contacts_version, get_user_by_user_id
+from repos.contact_repo import (
+    CONTACT_SORTS,
+    DETAIL_PROJECTION,
+    LIST_PROJECTION,
+    WITHOUT_ENCODING,
+    ContactDetail,
+    ContactListItem,
+    _after_cursor,
+    _decode_cursor,
+    _encode_cursor,
+    _projection,
+    _to_document,
+    name_search_pipeline,
+)
+
+
+async def create_contact(owner_user_id: str, first_name: str = "unknown user", last_name: str = "unknown user") -> Contact:
+    if await get_user_by_user_id(owner_user_id) is None:
+        raise RuntimeError("Invalid User ID: User ID not in database")
+
+    return Contact(
+        contact_id=str(uuid.uuid4()),
+        owner_user_id=owner_user_id,
+        first_name=first_name,
+        last_name=last_name,
+    )
+
+async def save_contact_to_database(contact: Contact) -> Contact:
+    contacts = get_async_db_collections().contacts
+    try:
+        await contacts.insert_one(_to_document(contact))
+    except DuplicateKeyError as e:
+        raise ValueError("Contact with this username or email already exists") from e
+
+    await bump_contacts_version(contact.owner_user_id)
+    return contact
+
+async def save_contacts_to_database(contacts_to_save: list[Contact]) -> int:
+    if not contacts_to_save:
+        return 0
+    contacts = get_async_db_collections().contacts
+    try:
+        result = await contacts.insert_many([_to_document(c) for c in contacts_to_save], ordered=False)
+        inserted = len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        inserted = e.details.get("nInserted", 0)
+
+    for owner_user_id in {c.owner_user_id for c in contacts_to_save}:
+        await bump_contacts_version(owner_user_id)
+    return inserted
+
+async def get_contact_by_contact_id(contact_id: str, include_encoding: bool = False) -> Contact | None:
+    contacts = get_async_db_collections().contacts
+    doc = await contacts.find_one({"contact_id": contact_id}, _projection(include_encoding))
+    if doc is None:
+        return None
+    return Contact(**doc)
+
+get_contact_by_id = get_contact_by_contact_id
+
+async def update_contact(contact: Contact) -> Contact:
+    updates = _to_document(contact)
+    updates.pop("contact_id")
+    if updates["encoding"] is None:
+        updates.pop("encoding") # read without its encoding -> leave the stored one alone
+
+    contacts = get_async_db_collections().contacts
+    result = await contacts.find_one_and_update(
+        filter={"contact_id": contact.contact_id},
+        update={"$set": updates},
+        return_document=True,
+        projection=WITHOUT_ENCODING
+    )
+
+    if result is None:
+        raise ValueError("Contact was not found")
+    await bump_contacts_version(contact.owner_user_id)
+    return Contact(**result)
+
+async def get_all_contacts_for_user(user_id: str, include_encoding: bool = True) -> List[Contact]:
+    contacts = get_async_db_collections().contacts
+    cursor = contacts.find({"owner_user_id": user_id}, _projection(include_encoding))
+    return [Contact(**doc) async for doc in cursor]
+
+
+async def search_contacts_by_name(user_id: str, query: str, limit: int = 20) -> List[ContactListItem]:
+    pipeline = name_search_pipeline(user_id, query, limit)
+    if not pipeline:
+        return []
+    contacts = get_async_db_collections().contacts
+    return [ContactListItem(**doc) async for doc in await contacts.aggregate(pipeline)]
+
+
+async def list_contacts(
+    user_id: str,
+    sort: str = "last_modified",
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[List[ContactListItem], str | None]:
+    sort_keys, collation = CONTACT_SORTS[sort]
+    query = {"owner_user_id": user_id}
+    if cursor:
+        values = _decode_cursor(cursor)
+        if len(values) != len(sort_keys):
+            raise ValueError("Invalid cursor")
+        query.update(_after_cursor(sort_keys, values))
+
+    contacts = get_async_db_collections().contacts
+    find = contacts.find(query, LIST_PROJECTION, sort=sort_keys, collation=collation)
+    if limit:
+        find = find.limit(limit)
+    items = [ContactListItem(**doc) async for doc in find]
+
+    next_cursor = None
+    if limit and len(items) == limit:
+        last = items[-1]
+        next_cursor = _encode_cursor([getattr(last, key) for key, _ in sort_keys])
+    return items, next_cursor
+
+
+async def get_contact_detail(user_id: str, contact_id: str) -> ContactDetail | None:
+    contacts = get_async_db_collections().contacts
+    doc = await contacts.find_one({"contact_id": contact_id, "owner_user_id": user_id}, DETAIL_PROJECTION)
+    if doc is None:
+        return None
+    return ContactDetail(**doc)
+
+
+async def get_contacts_by_ids(user_id: str, contact_ids: Iterable[str]) -> Dict[str, ContactListItem]:
+    ids = list(dict.fromkeys(contact_ids))
+    if not ids:
+        return {}
+    contacts = get_async_db_collections().contacts
+    cursor = contacts.find({"owner_user_id": user_id, "contact_id": {"$in": ids}}, LIST_PROJECTION)
+    return {doc["contact_id"]: ContactListItem(**doc) async for doc in cursor}
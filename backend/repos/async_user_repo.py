@@ -0,0 +1,82 @@
+"""
+Async mirror of user_repo for the FastAPI handlers: same functions and
+models, on the shared AsyncMongoClient, so a DB round-trip never blocks the
+event loop. Password hashing (argon2) is CPU-bound and runs in a thread.
+"""
+import asyncio
+
+from database.models import User
+from database.db import get_async_db_collections
+from pydantic import EmailStr
+from pymongo.errors import DuplicateKeyError
+from repos.user_repo import ValidatedLoginResponse, create_user as _create_user
+from utils.password_util import verify_password
+
+
+async def create_user(username: str, email: EmailStr, password: str) -> User:
+    return await asyncio.to_thread(_create_user, username, email, password)
+
+async def update_user(user: User) -> User:
+    updates = user.model_dump()
+    updates.pop("user_id", None)
+
+    users = get_async_db_collections().users
+    result = await users.find_one_and_update(
+        {"user_id": user.user_id},
+        {"$set": updates},
+        return_document=True,
+        projection={"_id": 0}
+    )
+
+    if result is None:
+        raise ValueError("User was not found")
+
+    return User(**result)
+
+async def validate_login(email: str, password: str) -> ValidatedLoginResponse:
+    user = await get_user_by_email(email)
+    if user is None:
+        return ValidatedLoginResponse(status="USER_NOT_FOUND")
+
+    if not await asyncio.to_thread(verify_password, password, user.password_hash):
+        return ValidatedLoginResponse(status="PASSWORD_INVALID")
+
+    return ValidatedLoginResponse(status="SUCCESS", user=user)
+
+async def get_user_by_username(username: str) -> User | None:
+    return await _find_user({"username": username})
+
+async def get_user_by_email(email: str) -> User | None:
+    return await _find_user({"email": email})
+
+async def get_user_by_user_id(user_id: str) -> User | None:
+    return await _find_user({"user_id": user_id})
+
+async def _find_user(query: dict) -> User | None:
+    users = get_async_db_collections().users
+    doc = await users.find_one(query, {"_id": 0})
+    if doc is None:
+        return None
+    return User(**doc)
+
+async def save_user_to_database(user: User) -> User:
+    users = get_async_db_collections().users
+    doc = user.model_dump()
+
+    try:
+        await users.insert_one(doc)
+    except DuplicateKeyError as e:
+        raise ValueError("User with this username or email already exists") from e
+
+    return user
+
+async def get_contacts_version(user_id: str) -> int:
+    users = get_async_db_collections().users
+    doc = await users.find_one({"user_id": user_id}, {"_id": 0, "contacts_version": 1})
+    if doc is None:
+        return 0
+    return doc.get("contacts_version", 0)
+
+async def bump_contacts_version(user_id: str) -> None:
+    users = get_async_db_collections().users
+    await users.update_one({"user_id": user_id}, {"$inc": {"contacts_version": 1}})
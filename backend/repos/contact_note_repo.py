@@ -1,12 +1,17 @@
+import asyncio
+import threading
 import uuid
+from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Literal, Optional
-from pymongo.errors import DuplicateKeyError
+from typing import Dict, Literal, Optional
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from pydantic import BaseModel
+from backend.config import config
 from database.models import ContactNote
-from database.db import get_db_collections
+from database.db import get_async_db_collections, get_db_collections
 from backend.repos.user_repo import get_user_by_user_id
-from services.vector_embedding_service import get_vector_embedding
+from services.note_index import NoteVectorIndex
+from services.vector_embedding_service import get_query_embedding, get_vector_embedding, get_vector_embeddings
 
 
 class NoteSearchResult(BaseModel):
@@ -14,6 +19,16 @@ class NoteSearchResult(BaseModel):
     score: float
 
 
+# Read model for listing a contact's notes: everything but the embedding
+class ContactNoteListItem(BaseModel):
+    note_id: str
+    label: str
+    content: str
+    last_modified: datetime
+
+NOTE_LIST_PROJECTION = {"_id": 0, **{field: 1 for field in ContactNoteListItem.model_fields}}
+
+
 def create_contact_note(
     user_id: str,
     contact_id: str,
@@ -26,7 +41,7 @@ def create_contact_note(
     note_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
 
-    embedding = get_vector_embedding(f"Label: {label}\nContent: {content}")
+    embedding = get_vector_embedding(_embedding_text(label, content))
 
     return ContactNote(
         note_id=note_id,
@@ -39,6 +54,74 @@ def create_contact_note(
     )
 
 
+def create_contact_notes(
+    user_id: str,
+    contact_id: str,
+    facts: list[tuple[str, str]],
+) -> list[ContactNote]:
+    """Like create_contact_note for many (label, content) pairs, with a single embedding request."""
+    if not facts:
+        return []
+    if get_user_by_user_id(user_id) is None:
+        raise RuntimeError("Invalid user_id: user not found")
+
+    now = datetime.now(timezone.utc)
+    embeddings = get_vector_embeddings([_embedding_text(label, content) for label, content in facts])
+
+    return [
+        ContactNote(
+            note_id=str(uuid.uuid4()),
+            user_id=user_id,
+            contact_id=contact_id,
+            label=label,
+            content=content,
+            last_modified=now,
+            embedding=embedding,
+        )
+        for (label, content), embedding in zip(facts, embeddings)
+    ]
+
+
+def create_contact_notes_bulk(
+    user_id: str,
+    contact_id: str,
+    facts: list[tuple[str, str]],
+) -> list[ContactNote]:
+    """Creates and stores notes for many facts: one embedding request, one insert_many."""
+    notes = create_contact_notes(user_id, contact_id, facts)
+    return save_contact_notes_to_database(notes)
+
+
+def _embedding_text(label: str, content: str) -> str:
+    return f"Label: {label}\nContent: {content}"
+
+
+def save_contact_notes_to_database(notes: list[ContactNote]) -> list[ContactNote]:
+    if not notes:
+        return []
+    contact_notes = get_db_collections().contact_notes
+
+    try:
+        contact_notes.insert_many([note.model_dump() for note in notes], ordered=False)
+    except BulkWriteError as e:
+        # ordered=False: every note without a write error was inserted, so index those before raising
+        for note in _inserted_notes(notes, e):
+            note_search.note_saved(note)
+        if any(err.get("code") == 11000 for err in e.details.get("writeErrors", [])):
+            raise ValueError("ContactNote with this note_id already exists") from e
+        raise
+
+    for note in notes:
+        note_search.note_saved(note)
+    return notes
+
+
+def _inserted_notes(notes: list[ContactNote], error: BulkWriteError) -> list[ContactNote]:
+    """The notes an unordered insert_many did write despite `error`."""
+    failed = {err["index"] for err in error.details.get("writeErrors", [])}
+    return [note for i, note in enumerate(notes) if i not in failed]
+
+
 def save_contact_note_to_database(note: ContactNote) -> ContactNote:
     contact_notes = get_db_collections().contact_notes
     doc = note.model_dump()
@@ -48,6 +131,7 @@ def save_contact_note_to_database(note: ContactNote) -> ContactNote:
     except DuplicateKeyError as e:
         raise ValueError("ContactNote with this note_id already exists") from e
 
+    note_search.note_saved(note)
     return note
 
 
@@ -115,12 +199,17 @@ def update_contact_note(note: ContactNote) -> ContactNote:
     if result is None:
         raise ValueError("ContactNote was not found")
 
-    return ContactNote(**result)
+    updated = ContactNote(**result)
+    note_search.note_saved(updated)
+    return updated
 
 def delete_contact_note(note_id: str) -> bool:
     contact_notes = get_db_collections().contact_notes
     res = contact_notes.delete_one({"note_id": note_id})
-    return res.deleted_count == 1
+    if res.deleted_count != 1:
+        return False
+    note_search.note_deleted(note_id)
+    return True
 
 
 def semantic_search_notes(
@@ -133,55 +222,208 @@ def semantic_search_notes(
     min_score: float = 0.7,
 ) -> list[NoteSearchResult]:
     """
-    Semantic search notes using $vectorSearch.
+    Semantic search over notes, on the configured backend (config.note_search_backend).
     Scopes results to a user, and optionally to a contact or label.
-    Requires:
+    """
+    query_vector = get_query_embedding(query)
+    return note_search.search(
+        user_id=user_id,
+        query_vector=query_vector,
+        limit=limit,
+        num_candidates=num_candidates,
+        contact_id=contact_id,
+        label=label,
+        min_score=min_score,
+    )
+
+
+# --- Vector search backends ---
+class NoteSearchBackend(ABC):
+    @abstractmethod
+    def search(
+        self,
+        user_id: str,
+        query_vector: list[float],
+        limit: int,
+        num_candidates: int,
+        contact_id: str | None,
+        label: str | None,
+        min_score: float,
+    ) -> list[NoteSearchResult]:
+        """Best notes first, scored on the Atlas dotProduct scale."""
+        pass
+
+    async def search_async(self, **kwargs) -> list[NoteSearchResult]:
+        """search() for the async handlers; by default run in a worker thread."""
+        return await asyncio.to_thread(self.search, **kwargs)
+
+    def note_saved(self, note: ContactNote) -> None:
+        """Called after a note is inserted or updated."""
+        pass
+
+    def note_deleted(self, note_id: str) -> None:
+        """Called after a note is deleted."""
+        pass
+
+
+class AtlasNoteSearch(NoteSearchBackend):
+    """
+    Atlas $vectorSearch. Requires:
       - vector index name: 'contact_note_vector_index'
       - index includes filter fields: user_id, contact_id
     """
-    contact_notes = get_db_collections().contact_notes
 
-    query_vector = get_vector_embedding(query)
-    
-
-    filt: dict = {"user_id": {"$eq": user_id}}
-    if contact_id is not None:
-        filt["contact_id"] = {"$eq": contact_id}
-    if label is not None:
-        # NOTE: for this to be in $vectorSearch.filter efficiently,
-        # add {"type":"filter","path":"label"} to the search index definition.
-        # Otherwise, you can post-filter after vectorSearch.
-        filt["label"] = {"$eq": label}
-
-    pipeline = [
-        {
-            "$vectorSearch": {
-                "index": "contact_note_vector_index",
-                "path": "embedding",
-                "queryVector": query_vector,
-                "numCandidates": num_candidates,
-                "limit": limit,
-                "filter": filt,
-            }
-        },
-        {
-            "$project": {
-                "_id": 0,
-                "note_id": 1,
-                "user_id": 1,
-                "contact_id": 1,
-                "label": 1,
-                "content": 1,
-                "last_modified": 1,
-                "embedding": 1,
-                "score": {"$meta": "vectorSearchScore"},
-            }
-        },
-    ]
+    def search(self, user_id, query_vector, limit, num_candidates, contact_id, label, min_score):
+        contact_notes = get_db_collections().contact_notes
+        pipeline = self._pipeline(user_id, query_vector, limit, num_candidates, contact_id, label)
+        return self._results(contact_notes.aggregate(pipeline), min_score)
+
+    async def search_async(self, user_id, query_vector, limit, num_candidates, contact_id, label, min_score):
+        contact_notes = get_async_db_collections().contact_notes
+        pipeline = self._pipeline(user_id, query_vector, limit, num_candidates, contact_id, label)
+        return self._results([d async for d in await contact_notes.aggregate(pipeline)], min_score)
+
+    @staticmethod
+    def _pipeline(user_id, query_vector, limit, num_candidates, contact_id, label) -> list[dict]:
+        filt: dict = {"user_id": {"$eq": user_id}}
+        if contact_id is not None:
+            filt["contact_id"] = {"$eq": contact_id}
+        if label is not None:
+            # NOTE: for this to be in $vectorSearch.filter efficiently,
+            # add {"type":"filter","path":"label"} to the search index definition.
+            # Otherwise, you can post-filter after vectorSearch.
+            filt["label"] = {"$eq": label}
+
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": "contact_note_vector_index",
+                    "path": "embedding",
+                    "queryVector": query_vector,
+                    "numCandidates": num_candidates,
+                    "limit": limit,
+                    "filter": filt,
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "note_id": 1,
+                    "user_id": 1,
+                    "contact_id": 1,
+                    "label": 1,
+                    "content": 1,
+                    "last_modified": 1,
+                    "embedding": 1,
+                    "score": {"$meta": "vectorSearchScore"},
+                }
+            },
+        ]
+        return pipeline
+
+    @staticmethod
+    def _results(docs, min_score: float) -> list[NoteSearchResult]:
+        out: list[NoteSearchResult] = []
+        for d in docs:
+            score = float(d.pop("score"))
+            if score >= min_score:
+                out.append(NoteSearchResult(note=ContactNote(**d), score=score))
+        return out
+
+
+class LocalNoteSearch(NoteSearchBackend):
+    """
+    Exact in-process search, no Atlas needed (plain MongoDB, offline runs).
+    A user's notes are loaded into a NoteVectorIndex on their first search and
+    kept current by the save/update/delete hooks; search returns the matching
+    notes in one $in query.
+    """
+
+    def __init__(self, dim: int, quantize: bool = False):
+        self.dim = dim
+        self.quantize = quantize
+        self._indexes: Dict[str, NoteVectorIndex] = {}
+        self._lock = threading.Lock()
+
+    def search(self, user_id, query_vector, limit, num_candidates, contact_id, label, min_score):
+        with self._lock:
+            hits = self._index_for(user_id).search(
+                query_vector, k=limit, contact_id=contact_id, label=label, min_score=min_score
+            )
+        if not hits:
+            return []
+
+        contact_notes = get_db_collections().contact_notes
+        docs = {
+            d["note_id"]: d
+            for d in contact_notes.find({"note_id": {"$in": [note_id for note_id, _ in hits]}}, {"_id": 0})
+        }
+        return [
+            NoteSearchResult(note=ContactNote(**docs[note_id]), score=score)
+            for note_id, score in hits
+            if note_id in docs
+        ]
+
+    def note_saved(self, note: ContactNote) -> None:
+        with self._lock:
+            index = self._indexes.get(note.user_id)
+            if index is None:
+                return  # not loaded yet; the first search reads it from Mongo
+            if note.embedding is None:
+                index.remove(note.note_id)
+            elif len(note.embedding) != self.dim:
+                # Already written to Mongo; leave it out of the index as _index_for does
+                index.remove(note.note_id)
+                print(f"Note search: not indexing note {note.note_id} with a non-{self.dim}-d embedding")
+            else:
+                index.add(note.note_id, note.contact_id, note.label, note.embedding)
+
+    def note_deleted(self, note_id: str) -> None:
+        with self._lock:
+            for index in self._indexes.values():
+                if index.remove(note_id):
+                    break
+
+    def _index_for(self, user_id: str) -> NoteVectorIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            return index
+
+        index = NoteVectorIndex(self.dim, quantize=self.quantize)
+        skipped = 0
+        contact_notes = get_db_collections().contact_notes
+        cursor = contact_notes.find(
+            {"user_id": user_id, "embedding": {"$ne": None}},
+            {"_id": 0, "note_id": 1, "contact_id": 1, "label": 1, "embedding": 1},
+        )
+        for d in cursor:
+            if len(d["embedding"]) != self.dim:
+                skipped += 1  # embedded with another model/dimension
+                continue
+            index.add(d["note_id"], d["contact_id"], d["label"], d["embedding"])
+        if skipped:
+            print(f"Note search: skipped {skipped} notes of user {user_id} with a non-{self.dim}-d embedding")
+
+        self._indexes[user_id] = index
+        return index
+
+
+NOTE_SEARCH_BACKENDS = {
+    "atlas": AtlasNoteSearch,
+    "local": LocalNoteSearch,
+}
+
+
+def create_note_search(backend: str = "atlas", **kwargs) -> NoteSearchBackend:
+    """Builds the note search backend for the configured backend name."""
+    try:
+        backend_cls = NOTE_SEARCH_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown note search backend: {backend!r} (expected one of {list(NOTE_SEARCH_BACKENDS)})")
+    if backend_cls is LocalNoteSearch:
+        kwargs.setdefault("dim", config.embed_dim)
+        kwargs.setdefault("quantize", config.note_search_quantize)
+    return backend_cls(**kwargs)
+
 
-    out: list[NoteSearchResult] = []
-    for d in contact_notes.aggregate(pipeline):
-        score = float(d.pop("score"))
-        if score >= min_score:
-            out.append(NoteSearchResult(note=ContactNote(**d), score=score))
-    return out
+note_search: NoteSearchBackend = create_note_search(config.note_search_backend)
@@ -1,8 +1,72 @@
+import base64
+import json
+import re
+import unicodedata
 import uuid
-from backend.repos.user_repo import get_user_by_user_id
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+import numpy as np
+from bson import Binary
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING
+from backend.repos.user_repo import bump_contacts_version, get_user_by_user_id
 from database.models import Contact, User
 from database.db import get_db_collections
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Face encodings are 128 doubles per contact; anything that doesn't match faces skips them
+WITHOUT_ENCODING = {"_id": 0, "encoding": 0}
+
+def pack_encoding(encoding) -> Binary | None:
+    """Encoding as packed little-endian float32 BinData (512 bytes instead of 128 tagged doubles)."""
+    if encoding is None:
+        return None
+    return Binary(np.asarray(encoding, dtype="<f4").tobytes())
+
+_NAME_TOKEN_SPLIT = re.compile(r"[\W_]+")
+
+def normalize_name_tokens(*parts: str | None) -> List[str]:
+    """Lowercase, accent-free name tokens: ("José", "de la Cruz") -> ["jose", "de", "la", "cruz"]."""
+    text = unicodedata.normalize("NFKD", " ".join(p for p in parts if p))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return list(dict.fromkeys(t for t in _NAME_TOKEN_SPLIT.split(text) if t))
+
+def _to_document(contact: Contact) -> dict:
+    doc = contact.model_dump()
+    doc["encoding"] = pack_encoding(doc["encoding"])
+    # Searched with anchored prefixes via the by_owner_name_tokens index
+    doc["name_tokens"] = normalize_name_tokens(contact.first_name, contact.last_name)
+    return doc
+
+def _projection(include_encoding: bool) -> dict:
+    return {"_id": 0} if include_encoding else WITHOUT_ENCODING
+
+
+# --- Read models: only the fields a screen shows ---
+class ContactListItem(BaseModel):
+    contact_id: str
+    first_name: str = "Unknown First Name"
+    last_name: str = "Unknown Last Name"
+    note: str | None = None
+    age: int | None = None
+    image_path: str | None = None
+    last_modified: datetime | None = None
+
+class ContactDetail(ContactListItem):
+    owner_user_id: str
+    created_at: datetime | None = None
+
+LIST_PROJECTION = {"_id": 0, **{field: 1 for field in ContactListItem.model_fields}}
+DETAIL_PROJECTION = {"_id": 0, **{field: 1 for field in ContactDetail.model_fields}}
+
+# Case-insensitive name order; the by_owner_name index is built with the same collation
+NAME_COLLATION = {"locale": "en", "strength": 2}
+
+# sort option -> (sort keys ending in a unique tie-breaker, collation); each has a compound index
+CONTACT_SORTS = {
+    "last_modified": ([("last_modified", DESCENDING), ("contact_id", DESCENDING)], None),
+    "alphabetical": ([("first_name", ASCENDING), ("last_name", ASCENDING), ("contact_id", ASCENDING)], NAME_COLLATION),
+}
 
 def create_contact(owner_user_id: str, first_name:str = "unknown user", last_name: str = "unknown user") -> Contact:
     if get_user_by_user_id(owner_user_id) is None:
@@ -18,19 +82,41 @@ def create_contact(owner_user_id: str, first_name:str = "unknown user", last_nam
 
 def save_contact_to_database(contact: Contact) -> Contact:
     contacts = get_db_collections().contacts
-    doc = contact.model_dump()
+    doc = _to_document(contact)
     try:
         contacts.insert_one(doc)
     except DuplicateKeyError as e:
         raise ValueError("Contact with this username or email already exists")
 
+    bump_contacts_version(contact.owner_user_id)
     return contact
 
-def get_contact_by_contact_id(contact_id: str) -> Contact | None:
+def save_contacts_to_database(contacts_to_save: list[Contact]) -> int:
+    """
+    Inserts many contacts in one round trip. Contacts whose contact_id is already
+    stored are skipped, so a retried batch does not fail on its earlier half.
+    Returns the number of contacts inserted.
+    """
+    if not contacts_to_save:
+        return 0
+    contacts = get_db_collections().contacts
+    try:
+        result = contacts.insert_many([_to_document(c) for c in contacts_to_save], ordered=False)
+        inserted = len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        inserted = e.details.get("nInserted", 0)
+
+    for owner_user_id in {c.owner_user_id for c in contacts_to_save}:
+        bump_contacts_version(owner_user_id)
+    return inserted
+
+def get_contact_by_contact_id(contact_id: str, include_encoding: bool = False) -> Contact | None:
     contacts =get_db_collections().contacts
     doc = contacts.find_one(
         {"contact_id": contact_id},
-        {"_id": 0}
+        _projection(include_encoding)
     )
 
     if doc is None:
@@ -38,46 +124,175 @@ def get_contact_by_contact_id(contact_id: str) -> Contact | None:
     return Contact(**doc)
 
 def update_contact(contact: Contact) -> Contact:
-    updates = contact.model_dump()
+    updates = _to_document(contact)
     updates.pop("contact_id")
+    if updates["encoding"] is None:
+        updates.pop("encoding") # read without its encoding -> leave the stored one alone
 
     contacts = get_db_collections().contacts
     result = contacts.find_one_and_update(
         filter={"contact_id": contact.contact_id},
         update={"$set": updates},
         return_document=True,
-        projection={"_id": 0}
+        projection=WITHOUT_ENCODING
     )
 
     if result is None:
         raise ValueError("Contact was not found")
+    bump_contacts_version(contact.owner_user_id)
     return Contact(**result)
 
-from typing import List
-
-def get_all_contacts_for_user(user_id: str) -> List[Contact]:
+def get_all_contacts_for_user(user_id: str, include_encoding: bool = True) -> List[Contact]:
     contacts = get_db_collections().contacts
-    cursor = contacts.find({"owner_user_id": user_id}, {"_id": 0})
+    cursor = contacts.find({"owner_user_id": user_id}, _projection(include_encoding))
     return [Contact(**doc) for doc in cursor]
 
+def get_encoded_contact_ids(user_id: str) -> Set[str]:
+    """Ids of the user's contacts that have a face encoding (the encodings stay on the server)."""
+    contacts = get_db_collections().contacts
+    return set(contacts.distinct("contact_id", {"owner_user_id": user_id, "encoding": {"$ne": None}}))
+
 
-def search_contacts_by_name(user_id: str, query: str) -> List[Contact]:
+def search_contacts_by_name(user_id: str, query: str, limit: int = 20) -> List[ContactListItem]:
+    """
+    Typeahead name search: every query token must be a prefix of one of the
+    contact's name tokens ("jo sm" finds "John Smith"). Matching is an index
+    range scan on name_tokens; results are ranked by how well they match.
+    """
+    pipeline = name_search_pipeline(user_id, query, limit)
+    if not pipeline:
+        return []
     contacts = get_db_collections().contacts
-    # Case-insensitive regex search for name
-    regex = {"$regex": query, "$options": "i"}
-    cursor = contacts.find({
-        "owner_user_id": user_id,
-        "$or": [
-            {"first_name": regex},
-            {"last_name": regex}
-        ]
-    }, {"_id": 0})
-    return [Contact(**doc) for doc in cursor]
+    return [ContactListItem(**doc) for doc in contacts.aggregate(pipeline)]
+
+
+def name_search_pipeline(user_id: str, query: str, limit: int) -> list[dict]:
+    """
+    Aggregation behind search_contacts_by_name; empty when the query has no
+    name tokens. Matches are ranked in Mongo before the limit, so the best
+    ones are never cut off: exact token > prefix of the first name > prefix
+    of another token, +2 when the name starts with the whole query; then
+    shorter names, then alphabetical.
+    """
+    tokens = normalize_name_tokens(query)
+    if not tokens:
+        return []
+
+    def token_at(i: int) -> dict:
+        return {"$ifNull": [{"$arrayElemAt": ["$name_tokens", i]}, ""]}
+
+    def starts_with(value: dict, prefix: str) -> dict:
+        return {"$eq": [{"$substrCP": [value, 0, len(prefix)]}, prefix]}
+
+    token_scores = [
+        {"$cond": [{"$in": [token, "$name_tokens"]}, 3, {"$cond": [starts_with(token_at(0), token), 2, 1]}]}
+        for token in tokens
+    ]
+    # "<name tokens joined by spaces>".startswith("<query tokens joined by spaces>")
+    name_starts_with_query = {"$and": [
+        *({"$eq": [token_at(i), token]} for i, token in enumerate(tokens[:-1])),
+        starts_with(token_at(len(tokens) - 1), tokens[-1]),
+    ]}
+    # No collation: the prefix $match has to stay on the (simple collation) by_owner_name_tokens index
+    sort_name = {"$toLower": {"$concat": [{"$ifNull": ["$first_name", ""]}, " ", {"$ifNull": ["$last_name", ""]}]}}
+    name_length = {"$add": [
+        {"$sum": {"$map": {"input": "$name_tokens", "in": {"$strLenCP": "$$this"}}}},
+        {"$max": [{"$subtract": [{"$size": "$name_tokens"}, 1]}, 0]},
+    ]}
+
+    return [
+        {"$match": {
+            "owner_user_id": user_id,
+            "$and": [{"name_tokens": re.compile("^" + re.escape(token))} for token in tokens],
+        }},
+        {"$addFields": {
+            "_rank": {"$add": [*token_scores, {"$cond": [name_starts_with_query, 2, 0]}]},
+            "_name_length": name_length,
+            "_sort_name": sort_name,
+        }},
+        {"$sort": {"_rank": DESCENDING, "_name_length": ASCENDING, "_sort_name": ASCENDING, "contact_id": ASCENDING}},
+        {"$limit": limit},
+        {"$project": LIST_PROJECTION},
+    ]
+
+
+def list_contacts(
+    user_id: str,
+    sort: str = "last_modified",
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[List[ContactListItem], str | None]:
+    """
+    One page of a user's contacts, sorted and paginated by Mongo (keyset
+    pagination over the sort's index). Returns the items and the cursor for the
+    next page, or None on the last page / without a limit.
+    """
+    sort_keys, collation = CONTACT_SORTS[sort]
+    query = {"owner_user_id": user_id}
+    if cursor:
+        values = _decode_cursor(cursor)
+        if len(values) != len(sort_keys):
+            raise ValueError("Invalid cursor")
+        query.update(_after_cursor(sort_keys, values))
+
+    contacts = get_db_collections().contacts
+    find = contacts.find(query, LIST_PROJECTION, sort=sort_keys, collation=collation)
+    if limit:
+        find = find.limit(limit)
+    items = [ContactListItem(**doc) for doc in find]
+
+    next_cursor = None
+    if limit and len(items) == limit:
+        last = items[-1]
+        next_cursor = _encode_cursor([getattr(last, key) for key, _ in sort_keys])
+    return items, next_cursor
+
+
+def _after_cursor(sort_keys: list, values: list) -> dict:
+    # (k1 > v1) or (k1 == v1 and k2 > v2) or ..., with < for descending keys
+    clauses = []
+    for i, (key, direction) in enumerate(sort_keys):
+        clause = {k: v for (k, _), v in zip(sort_keys[:i], values[:i])}
+        clause[key] = {"$lt" if direction == DESCENDING else "$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def _encode_cursor(values: list) -> str:
+    encoded = [{"$date": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [datetime.fromisoformat(v["$date"]) if isinstance(v, dict) else v for v in values]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def get_contact_detail(user_id: str, contact_id: str) -> ContactDetail | None:
+    """A contact of `user_id` (ownership checked by the query), without its encoding."""
+    contacts = get_db_collections().contacts
+    doc = contacts.find_one({"contact_id": contact_id, "owner_user_id": user_id}, DETAIL_PROJECTION)
+    if doc is None:
+        return None
+    return ContactDetail(**doc)
+
+
+def get_contacts_by_ids(user_id: str, contact_ids: Iterable[str]) -> Dict[str, ContactListItem]:
+    """Slim contacts of `user_id` keyed by contact_id, fetched in one round-trip; unknown ids are absent."""
+    ids = list(dict.fromkeys(contact_ids))
+    if not ids:
+        return {}
+    contacts = get_db_collections().contacts
+    cursor = contacts.find({"owner_user_id": user_id, "contact_id": {"$in": ids}}, LIST_PROJECTION)
+    return {doc["contact_id"]: ContactListItem(**doc) for doc in cursor}
 
 
-def get_contact_by_id(contact_id: str) -> Contact | None:
+def get_contact_by_id(contact_id: str, include_encoding: bool = False) -> Contact | None:
     contacts = get_db_collections().contacts
-    doc = contacts.find_one({"contact_id": contact_id}, {"_id": 0})
+    doc = contacts.find_one({"contact_id": contact_id}, _projection(include_encoding))
     if doc:
         return Contact(**doc)
     return None
\ No newline at end of file
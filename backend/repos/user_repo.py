@@ -95,4 +95,14 @@ def save_user_to_database(user: User):
 
     return user
 
+def get_contacts_version(user_id: str) -> int:
+    """Counter bumped on every write to the user's contacts; keys their on-disk face snapshot."""
+    users = get_db_collections().users
+    doc = users.find_one({"user_id": user_id}, {"_id": 0, "contacts_version": 1})
+    if doc is None:
+        return 0
+    return doc.get("contacts_version", 0)
 
+def bump_contacts_version(user_id: str) -> None:
+    users = get_db_collections().users
+    users.update_one({"user_id": user_id}, {"$inc": {"contacts_version": 1}})
@@ -1,16 +1,51 @@
 import os
 # os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"  # quick workaround if needed
 
+import threading
+from typing import TYPE_CHECKING
+
 import numpy as np
-from speechbrain.inference.speaker import SpeakerRecognition
+import torch
 from speechbrain.dataio import audio_io  # type: ignore
 
+from backend.config import config
+from backend.services.model_registry import model_registry
+
+if TYPE_CHECKING:
+    from speechbrain.inference.speaker import SpeakerRecognition
+
 AUDIO_FILE_DIR = None
 
-verifier: SpeakerRecognition = SpeakerRecognition.from_hparams(
-    source="speechbrain/spkrec-ecapa-voxceleb",
-    savedir="pretrained_models/spkrec-ecapa",
-)  # type: ignore
+# spkrec-ecapa-voxceleb is trained on 16 kHz mono; signals are embedded at this rate
+VERIFIER_SAMPLE_RATE = 16000
+# Clips per ECAPA forward pass in embed_clips
+EMBED_BATCH_SIZE = 16
+
+SPEAKER_MODEL = "speaker_embedding"
+
+def _load_speaker_model() -> "SpeakerRecognition":
+    from speechbrain.inference.speaker import SpeakerRecognition
+
+    verifier: SpeakerRecognition = SpeakerRecognition.from_hparams(
+        source="speechbrain/spkrec-ecapa-voxceleb",
+        savedir="pretrained_models/spkrec-ecapa",
+    )  # type: ignore
+    if config.speaker_model_variant == "torchscript":
+        # Scripted + frozen (batch norms folded into the convolutions) for CPU inference
+        try:
+            scripted = torch.jit.script(verifier.mods.embedding_model.eval())
+            verifier.mods.embedding_model = torch.jit.optimize_for_inference(scripted)
+        except Exception as e:
+            print(f"Could not script the speaker model, using it as is: {e}")
+    elif config.speaker_model_variant != "eager":
+        raise ValueError(f"Unknown SPEAKER_MODEL_VARIANT '{config.speaker_model_variant}'. Use 'eager' or 'torchscript'.")
+    return verifier
+
+model_registry.register(SPEAKER_MODEL, _load_speaker_model)
+
+def get_speaker_model() -> "SpeakerRecognition":
+    """The shared ECAPA model, loaded on first use (see model_registry)."""
+    return model_registry.get(SPEAKER_MODEL)
 
 def init_audio_service():
     global AUDIO_FILE_DIR
@@ -18,6 +53,100 @@ def init_audio_service():
     AUDIO_FILE_DIR = "data/audio_samples"
 
 
+# --- Speaker embeddings ---
+# A user's reference sample is embedded once (on upload) and kept as <sample>.npy
+# next to the WAV; scoring an utterance then only embeds the utterance side.
+_reference_cache: dict[str, tuple[float, np.ndarray]] = {}
+_reference_lock = threading.Lock()
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling; `samples` is returned as is when the rates match."""
+    if rate == target_rate or not len(samples):
+        return samples
+    # Same result as np.interp, but float32 and no searchsorted (evenly spaced input)
+    positions = np.arange(int(len(samples) * target_rate / rate)) * (rate / target_rate)
+    left = positions.astype(np.intp)
+    right = np.minimum(left + 1, len(samples) - 1)
+    weights = (positions - left).astype(np.float32)
+    lo = samples[left].astype(np.float32)
+    return lo + (samples[right] - lo) * weights
+
+def embed_signals(signals: torch.Tensor, lengths: torch.Tensor | None = None) -> np.ndarray:
+    """
+    ECAPA embeddings of a [B, T] batch of mono signals, as a [B, D] float32 array.
+    For zero-padded batches, `lengths` holds each row's length relative to T.
+    """
+    with torch.inference_mode():
+        embeddings = get_speaker_model().encode_batch(signals, lengths, normalize=False)
+    return embeddings.squeeze(1).detach().cpu().numpy().astype(np.float32)
+
+def embed_clips(clips: list[np.ndarray], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """
+    ECAPA embeddings of variable-length mono float32 clips, [N, D] in input order.
+    Clips are sorted by length and zero-padded into batches of `batch_size`, so
+    each batch pads to a similar length; the relative lengths keep the padding
+    out of the statistics pooling.
+    """
+    order = sorted(range(len(clips)), key=lambda i: len(clips[i]), reverse=True)
+    embeddings: np.ndarray | None = None
+    for i in range(0, len(order), batch_size):
+        idx = order[i:i + batch_size]
+        width = len(clips[idx[0]])
+        batch = np.zeros((len(idx), width), dtype=np.float32)
+        for row, j in enumerate(idx):
+            batch[row, :len(clips[j])] = clips[j]
+        lengths = torch.tensor([len(clips[j]) / width for j in idx], dtype=torch.float32)
+
+        batch_embeddings = embed_signals(torch.from_numpy(batch), lengths)
+        if embeddings is None:
+            embeddings = np.empty((len(clips), batch_embeddings.shape[1]), dtype=np.float32)
+        embeddings[idx] = batch_embeddings
+    return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+def reference_embedding_path(sample_path: str) -> str:
+    return os.path.splitext(sample_path)[0] + ".npy"
+
+def save_reference_embedding(sample_path: str) -> np.ndarray:
+    """Embeds the reference sample at `sample_path` and stores it next to it (call after each upload)."""
+    signal, _ = audio_io.load(sample_path)
+    if signal.ndim == 2 and signal.shape[0] <= 8:
+        signal = signal.mean(dim=0) # channels-first -> mono
+    embedding = embed_signals(signal.reshape(1, -1))[0]
+
+    path = reference_embedding_path(sample_path)
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, embedding)
+    os.replace(tmp_path, path) # a half-written embedding is never picked up
+    with _reference_lock:
+        _reference_cache[sample_path] = (os.path.getmtime(sample_path), embedding)
+    return embedding
+
+def load_reference_embedding(sample_path: str) -> np.ndarray:
+    """
+    Embedding of the reference sample: from memory, else from the .npy, else
+    computed now (samples uploaded before embeddings were stored). A sample
+    newer than its embedding is re-embedded.
+    """
+    sample_mtime = os.path.getmtime(sample_path)
+    with _reference_lock:
+        cached = _reference_cache.get(sample_path)
+    if cached is not None and cached[0] == sample_mtime:
+        return cached[1]
+
+    path = reference_embedding_path(sample_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= sample_mtime:
+        embedding = np.load(path)
+        with _reference_lock:
+            _reference_cache[sample_path] = (sample_mtime, embedding)
+        return embedding
+    return save_reference_embedding(sample_path)
+
+def cosine_scores(reference: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row of `embeddings` with `reference` (the verify_batch score)."""
+    norms = np.linalg.norm(embeddings, axis=-1) * np.linalg.norm(reference)
+    return (embeddings @ reference) / np.maximum(norms, 1e-6)
+
+
 # def are_audio_samples_from_same_speaker(path1: str, path2: str) -> bool:
 #     signal1, fs = audio_io.load(path1)
 #     signal2, fs = audio_io.load(path2)
@@ -0,0 +1,200 @@
+import asyncio
+import io
+import time
+import wave
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from backend.services.audio_embedding_service import resample
+from backend.services.audio_transcription_service import (
+    Utterance,
+    relabel_utterances_with_user,
+    score_speakers_in_samples,
+    tokens_to_utterances,
+)
+from backend.services.information_extractor_service import extract_notable_facts, utterances_to_conversation_entries
+from database.models import User
+from repos import async_contact_note_repo
+from services.stt import SpeechToText
+from utils.metrics import metrics
+
+# ECAPA cosine score below which the best diarized speaker of a window is not taken to be the user
+USER_MIN_SCORE = 0.25
+
+
+@dataclass
+class AudioWindow:
+    start_s: float
+    samples: np.ndarray  # mono float32
+
+
+def decode_audio_chunk(data: bytes, sample_rate: int) -> np.ndarray:
+    """
+    One websocket message -> mono float32 at `sample_rate`. WAV chunks (RIFF)
+    are decoded, downmixed and resampled; anything else is taken as raw 16-bit
+    little-endian mono PCM already at `sample_rate`.
+    """
+    if not data.startswith(b"RIFF"):
+        return np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+
+    with wave.open(io.BytesIO(data), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV is supported")
+        channels, rate = w.getnchannels(), w.getframerate()
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    samples = pcm.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    return resample(samples, rate, sample_rate)
+
+
+class AudioWindower:
+    """
+    Cuts a continuous stream into windows of about `window_s`. Each window ends
+    at the quietest 20 ms of its last `cut_search_s`, so a cut rarely lands in
+    the middle of a word.
+    """
+
+    def __init__(self, sample_rate: int, window_s: float = 15.0, cut_search_s: float = 1.0):
+        if sample_rate <= 0 or int(window_s * sample_rate) <= 0:
+            raise ValueError(f"Invalid window: sample_rate={sample_rate}, window_s={window_s}")
+        self.sample_rate = sample_rate
+        self.window_len = int(window_s * sample_rate)
+        self.search_len = min(int(cut_search_s * sample_rate), self.window_len // 2)
+        self.frame_len = max(1, int(0.02 * sample_rate))
+        self._buffer = np.empty(0, dtype=np.float32)
+        self._start_s = 0.0
+
+    def push(self, samples: np.ndarray) -> list[AudioWindow]:
+        """Adds audio; returns the windows it completed."""
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        windows = []
+        while len(self._buffer) >= self.window_len:
+            windows.append(self._cut(self._quietest_cut()))
+        return windows
+
+    def flush(self) -> AudioWindow | None:
+        """The remaining audio as a last window, if any."""
+        if len(self._buffer) == 0:
+            return None
+        return self._cut(len(self._buffer))
+
+    def _quietest_cut(self) -> int:
+        region_start = self.window_len - self.search_len
+        region = self._buffer[region_start:self.window_len]
+        n = len(region) // self.frame_len
+        if n == 0:
+            return self.window_len
+        energy = (region[: n * self.frame_len].reshape(n, self.frame_len) ** 2).sum(axis=1)
+        return region_start + int(np.argmin(energy)) * self.frame_len + self.frame_len // 2
+
+    def _cut(self, end: int) -> AudioWindow:
+        window = AudioWindow(start_s=self._start_s, samples=self._buffer[:end])
+        self._buffer = self._buffer[end:].copy()
+        self._start_s += end / self.sample_rate
+        return window
+
+
+def attribute_speakers(
+    samples: np.ndarray,
+    sample_rate: int,
+    utterances: list[Utterance],
+    reference_sample_path: str,
+) -> list[Utterance]:
+    """
+    Labels one window's utterances "user" / "user_contact_N" against the user's
+    voice sample. Diarization ids only hold within a window, so each window is
+    attributed on its own, and a window where nobody scores USER_MIN_SCORE
+    against the reference has no "user" utterances.
+    """
+    if not utterances:
+        return []
+    try:
+        best_speaker_id, scores = score_speakers_in_samples(
+            samples=samples,
+            sample_rate=sample_rate,
+            utterances=utterances,
+            reference_sample_path=reference_sample_path,
+        )
+        user_speaker_id = best_speaker_id if scores[0][1] >= USER_MIN_SCORE else None
+    except RuntimeError:
+        user_speaker_id = None  # nothing long enough to score
+    return relabel_utterances_with_user(utterances, user_speaker_id)
+
+
+class StreamingNoteTaker:
+    """
+    Streaming counterpart of take_notes for one conversation: every window is
+    transcribed, attributed to speakers and mined for facts as soon as it is
+    cut, and the facts are saved as contact notes right away. Progress is
+    reported through `emit` (utterance and notes events).
+    """
+
+    def __init__(
+        self,
+        stt: SpeechToText,
+        user: User,
+        contact_id: str,
+        sample_rate: int,
+        reference_sample_path: str,
+        emit: Callable[[dict], Awaitable[None]],
+    ):
+        self.stt = stt
+        self.user = user
+        self.contact_id = contact_id
+        self.sample_rate = sample_rate
+        self.reference_sample_path = reference_sample_path
+        self.emit = emit
+        self.notes_created = 0
+
+    async def run(self, windows: "asyncio.Queue[AudioWindow | None]") -> None:
+        """Processes windows in order until a None arrives."""
+        while (window := await windows.get()) is not None:
+            try:
+                await self.process_window(window)
+            except Exception as e:
+                metrics.incr("audio.window_errors")
+                print(f"Audio stream: window at {window.start_s:.1f}s failed: {e}")
+
+    async def process_window(self, window: AudioWindow) -> None:
+        started = time.perf_counter()
+
+        # 1. Speech to text (blocking HTTP / model call)
+        tokens = await asyncio.to_thread(self.stt.transcribe, window.samples, self.sample_rate)
+        utterances = tokens_to_utterances(tokens, break_on_silence_s=1.2, include_audio_events=True)
+
+        # 2. Who said what, then shift to conversation time
+        utterances = await asyncio.to_thread(
+            attribute_speakers, window.samples, self.sample_rate, utterances, self.reference_sample_path
+        )
+        utterances = [
+            u.model_copy(update={"start": u.start + window.start_s, "end": u.end + window.start_s})
+            for u in utterances
+        ]
+        for u in utterances:
+            await self._emit({"type": "utterance", "speaker": u.speaker_id, "text": u.text, "start": u.start, "end": u.end})
+
+        # 3. Facts -> notes
+        if utterances:
+            conversation = utterances_to_conversation_entries(utterances, self.user)
+            facts = await asyncio.to_thread(extract_notable_facts, conversation, self.user)
+            notes = await async_contact_note_repo.create_contact_notes_bulk(
+                self.user.user_id, self.contact_id, [(fact.label, fact.content) for fact in facts]
+            )
+            if notes:
+                self.notes_created += len(notes)
+                metrics.incr("audio.notes_created", len(notes))
+                await self._emit({
+                    "type": "notes",
+                    "notes": [{"note_id": n.note_id, "label": n.label, "content": n.content} for n in notes],
+                })
+
+        metrics.incr("audio.windows_processed")
+        metrics.set_gauge("audio.window_processing_ms", round((time.perf_counter() - started) * 1000, 1))
+
+    async def _emit(self, event: dict) -> None:
+        # The client may be gone; the conversation is still turned into notes
+        try:
+            await self.emit(event)
+        except Exception:
+            pass
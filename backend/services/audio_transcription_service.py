@@ -9,16 +9,22 @@ from database.models import User
 
 
 import os
-import tempfile
 from collections import defaultdict
 from pathlib import Path
 
 from pydantic import BaseModel, Field, computed_field
 
-import torch
+import numpy as np
 from pydub import AudioSegment
-from speechbrain.inference.speaker import SpeakerRecognition
-from speechbrain.dataio import audio_io  # type: ignore
+
+from backend.services.audio_embedding_service import (
+    EMBED_BATCH_SIZE,
+    VERIFIER_SAMPLE_RATE,
+    cosine_scores,
+    embed_clips,
+    load_reference_embedding,
+    resample,
+)
 
 
 from typing import Literal
@@ -138,85 +144,33 @@ def convert_raw_audio_to_utterances(audio_path: str) -> list[Utterance]:
 
 
 
-# ---------- SpeechBrain verifier ----------
-verifier: SpeakerRecognition = SpeakerRecognition.from_hparams(
-    source="speechbrain/spkrec-ecapa-voxceleb",
-    savedir="pretrained_models/spkrec-ecapa",
-)  # type: ignore
-
-def to_mono_batch(wav: torch.Tensor) -> torch.Tensor:
+# ---------- SpeechBrain speaker scoring (ECAPA model: audio_embedding_service) ----------
+def load_audio_samples(path: str) -> tuple[np.ndarray, int]:
     """
-    Accepts wav shaped [T], [C, T], or [B, T].
-    Returns [1, T] mono batch.
+    Decodes an audio file once into mono float32 in [-1, 1] at its own sample
+    rate; returns (samples, sample_rate). Nothing is resampled here: speaker
+    scoring only resamples the clips it embeds (see _utterance_samples).
     """
-    if wav.ndim == 2:
-        # Treat as channels-first if C is small (like 2 for stereo)
-        if wav.shape[0] <= 8:
-            wav = wav.mean(dim=0)  # [T]
-        # else assume already [B, T] and leave it
-    elif wav.ndim != 1:
-        raise ValueError(f"Unexpected wav shape: {wav.shape}")
-
-    if wav.ndim == 1:
-        wav = wav.unsqueeze(0)  # [1, T]
-
-    return wav
-
-def _clip_utterance_to_temp_wav(
-    full_audio: AudioSegment,
-    start_s: float,
-    end_s: float,
-) -> str:
+    audio = AudioSegment.from_file(path, parameters=["-ac", "1"])
+    samples = np.frombuffer(audio.raw_data, dtype=audio.array_type).astype(np.float32)
+    if audio.channels > 1:  # pydub decodes WAV itself, without ffmpeg's -ac
+        samples = samples.reshape(-1, audio.channels).mean(axis=1, dtype=np.float32)
+    samples *= 1.0 / float(1 << (8 * audio.sample_width - 1))
+    return samples, audio.frame_rate
+
+def _utterance_samples(samples: np.ndarray, sample_rate: int, start_s: float, end_s: float) -> np.ndarray:
     """
-    Export [start_s, end_s] from full_audio to a temporary WAV file, return path.
+    [start_s, end_s] of `samples` at VERIFIER_SAMPLE_RATE: a view, no copy,
+    when `samples` already is at that rate, else only the clip is resampled.
     """
-    start_ms = int(max(0.0, start_s) * 1000)
-    end_ms = int(max(0.0, end_s) * 1000)
-    seg = full_audio[start_ms:end_ms]
+    start = int(max(0.0, start_s) * sample_rate)
+    end = int(max(0.0, end_s) * sample_rate)
+    clip = samples[start:end]
 
     # Guard: avoid tiny segments that produce unstable speaker decisions
-    if len(seg) < 300:  # type: ignore
+    if len(clip) < int(0.3 * sample_rate):
         raise ValueError("segment too short")
-
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    tmp.close()
-    seg.export(tmp.name, format="wav") # type: ignore
-    return tmp.name
-
-
-def _score_paths_with_verify_batch(ref_path: str, utt_path: str) -> float:
-    signal_ref, _ = audio_io.load(ref_path)
-    signal_utt, _ = audio_io.load(utt_path)
-    signal_ref = to_mono_batch(signal_ref)
-    signal_utt = to_mono_batch(signal_utt)
-    # print(signal_ref.shape)
-    # print(signal_utt.shape)
-
-    with torch.inference_mode():
-        score, prediction = verifier.verify_batch(signal_ref, signal_utt)
-
-    # score can be:
-    # - scalar tensor: [[x]] or [x]
-    # - 2-element tensor: [[a, b]] or [a, b] (two-class)
-    s = score.detach().cpu().squeeze()
-
-    if s.numel() == 1:
-        return float(s.item())
-
-    if s.numel() == 2:
-        # We need to decide which element corresponds to "same speaker".
-        # SpeechBrain's prediction is the authoritative label; pick the score matching it.
-        # prediction is typically [[0]] or [[1]] (or shape that squeezes to scalar).
-        pred = int(prediction.detach().cpu().squeeze().item())
-
-        # If pred==1 means "same speaker", use s[1], else use s[0].
-        # If SpeechBrain uses the opposite convention in your install, this still ranks correctly
-        # across utterances for the same reference because pred is derived from these scores.
-        return float(s[pred].item())
-
-    # Unexpected shape: fall back to mean (still provides a sortable scalar)
-    return float(s.float().mean().item())
-
+    return resample(clip, sample_rate, VERIFIER_SAMPLE_RATE)
 
 
 def score_speakers_against_reference(
@@ -234,12 +188,44 @@ def score_speakers_against_reference(
       best_speaker_id,
       scores_sorted_desc = [(speaker_id, mean_score), ...]
 
+    The file is decoded once, see score_speakers_in_samples.
+    """
+    samples, sample_rate = load_audio_samples(full_audio_path)
+    return score_speakers_in_samples(
+        samples=samples,
+        sample_rate=sample_rate,
+        utterances=utterances,
+        reference_sample_path=reference_sample_path,
+        min_utt_s=min_utt_s,
+        max_utts_per_speaker=max_utts_per_speaker,
+    )
+
+
+def score_speakers_in_samples(
+    *,
+    samples: np.ndarray,
+    sample_rate: int = VERIFIER_SAMPLE_RATE,
+    utterances: list[Utterance],
+    reference_sample_path: str,
+    min_utt_s: float = 0.6,
+    max_utts_per_speaker: int = 15,
+    batch_size: int = EMBED_BATCH_SIZE,
+) -> tuple[str, list[tuple[str, float]]]:
+    """
+    score_speakers_against_reference on decoded audio: mono float32 at
+    `sample_rate` (see load_audio_samples).
+
     Scoring strategy:
-      - clip N utterances per speaker from full audio
-      - score each clip vs reference using verifier.verify_batch
+      - slice N utterances per speaker out of `samples` (nothing is written to
+        disk or decoded again; only these clips are resampled to
+        VERIFIER_SAMPLE_RATE)
+      - embed all clips together, `batch_size` per forward pass (embed_clips)
+      - score each clip vs the reference embedding (cosine, as verify_batch does;
+        the reference is embedded once per sample, see load_reference_embedding)
       - average scores per speaker
     """
-    full_audio = AudioSegment.from_file(full_audio_path)
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    ref_embedding = load_reference_embedding(reference_sample_path)
 
     # group utterances by diarized speaker_id
     by_speaker: dict[str, list[Utterance]] = defaultdict(list)
@@ -247,42 +233,32 @@ def score_speakers_against_reference(
         if u.duration >= min_utt_s:
             by_speaker[u.speaker_id].append(u)
 
-    tmp_paths: list[str] = []
-    speaker_scores: list[tuple[str, float]] = []
-
-    try:
-        for speaker_id, utts in by_speaker.items():
-            utts = utts[:max_utts_per_speaker]
-
-            scores: list[float] = []
-            for u in utts:
-                try:
-                    clip_path = _clip_utterance_to_temp_wav(full_audio, u.start, u.end)
-                    tmp_paths.append(clip_path)
-                    scores.append(_score_paths_with_verify_batch(reference_sample_path, clip_path))
-                except ValueError:
-                    continue
-
-            if not scores:
+    speaker_ids: list[str] = []
+    clips: list[np.ndarray] = []
+    clip_speakers: list[int] = []  # index into speaker_ids, per clip
+    for speaker_id, utts in by_speaker.items():
+        for u in utts[:max_utts_per_speaker]:
+            try:
+                clip = _utterance_samples(samples, sample_rate, u.start, u.end)
+            except ValueError:
                 continue
+            if not speaker_ids or speaker_ids[-1] != speaker_id:
+                speaker_ids.append(speaker_id)
+            clips.append(clip)
+            clip_speakers.append(len(speaker_ids) - 1)
 
-            mean_score = sum(scores) / len(scores)
-            speaker_scores.append((speaker_id, mean_score))
+    if not clips:
+        raise RuntimeError("No usable utterances to score (all too short or failed to load).")
 
-        speaker_scores.sort(key=lambda x: x[1], reverse=True)
+    scores = cosine_scores(ref_embedding, embed_clips(clips, batch_size))
+    counts = np.bincount(clip_speakers, minlength=len(speaker_ids))
+    means = np.bincount(clip_speakers, weights=scores, minlength=len(speaker_ids)) / counts
 
-        if not speaker_scores:
-            raise RuntimeError("No usable utterances to score (all too short or failed to load).")
+    speaker_scores = [(speaker_id, float(score)) for speaker_id, score in zip(speaker_ids, means)]
+    speaker_scores.sort(key=lambda x: x[1], reverse=True)
 
-        best_speaker_id = speaker_scores[0][0]
-        return best_speaker_id, speaker_scores
-
-    finally:
-        for p in tmp_paths:
-            try:
-                Path(p).unlink(missing_ok=True)
-            except Exception:
-                pass
+    best_speaker_id = speaker_scores[0][0]
+    return best_speaker_id, speaker_scores
 
 def eleven_word_to_token(w) -> Token:
     return Token(
@@ -295,11 +271,11 @@ def eleven_word_to_token(w) -> Token:
 
 def relabel_utterances_with_user(
     utterances: list[Utterance],
-    user_voice_speaker_id: str,
+    user_voice_speaker_id: str | None,
 ) -> list[Utterance]:
     """
     Relabel utterances so that:
-      - user_voice_speaker_id -> "user"
+      - user_voice_speaker_id -> "user" (None: the user is not speaking)
       - all other speaker_ids -> "user_contact_N" (stable mapping)
 
     Returns a NEW list of Utterance objects.
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, List
+
+import numpy as np
+
+from utils.metrics import metrics
+
+
+def normalize_query(text: str) -> str:
+    """Cache key text: case and whitespace differences don't change what a search means."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    Query embeddings keyed by (model, dim, normalized text).
+
+    An in-memory LRU of `max_entries` sits in front of an optional SQLite file
+    (`path`) that survives restarts. The file records the model and dimension it
+    was filled with and is emptied when either changes, so a new embedding
+    model never serves vectors from the old one.
+
+    Metrics: embedding_cache.hits (memory), .disk_hits, .misses.
+    """
+
+    def __init__(self, model: str, dim: int, max_entries: int = 1024, path: str | None = None):
+        self.model = model
+        self.dim = dim
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if path:
+            self._open(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Cached embedding of `text`, keyed on its normalized form; on a miss,
+        `compute` embeds `text` as given. Returns a new list each call, so
+        callers can't change the cached vector.
+        """
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                metrics.incr("embedding_cache.hits")
+                return list(vector)
+            vector = self._read_disk(key)
+            if vector is not None:
+                self._remember(key, vector)
+                metrics.incr("embedding_cache.disk_hits")
+                return list(vector)
+
+        # 1. Computed outside the lock: a remote call must not block other lookups
+        metrics.incr("embedding_cache.misses")
+        vector = tuple(compute(text))
+        with self._lock:
+            self._remember(key, vector)
+            self._write_disk(key, vector)
+        return list(vector)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, vector: tuple[float, ...]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("embedding_cache.entries", len(self._entries))
+
+    def _open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (text TEXT PRIMARY KEY, vector BLOB)")
+
+        stored = dict(self._db.execute("SELECT key, value FROM meta"))
+        current = {"model": self.model, "dim": str(self.dim)}
+        if stored != current:
+            if stored:
+                print(f"Embedding cache: model/dim changed {stored} -> {current}, clearing {path}")
+            self._db.execute("DELETE FROM embeddings")
+            self._db.execute("DELETE FROM meta")
+            self._db.executemany("INSERT INTO meta VALUES (?, ?)", current.items())
+        self._db.commit()
+
+    def _read_disk(self, key: str) -> tuple[float, ...] | None:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT vector FROM embeddings WHERE text = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return tuple(np.frombuffer(row[0], dtype="<f4").tolist())
+
+    def _write_disk(self, key: str, vector: tuple[float, ...]) -> None:
+        if self._db is None:
+            return
+        blob = np.asarray(vector, dtype="<f4").tobytes()
+        self._db.execute("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", (key, blob))
+        self._db.commit()
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, MutableMapping
+
+from .face_index import FaceIndex
+from .face_staging import RegistrationStaging
+from .face_tracker import FaceTracker
+from .storage import Contact
+
+
+class UserFaceContext:
+    """Everything FaceService keeps in memory for one user."""
+
+    def __init__(self, user_id: str | None, face_index: FaceIndex, staging: RegistrationStaging):
+        self.user_id = user_id
+        self.face_index = face_index
+        self.known_face_metadata: MutableMapping[str, Contact] = {}
+        # One face tracker per video stream (producer connection) of this user
+        self.trackers: Dict[str, FaceTracker] = {}
+        # Unknown faces are merged over a few frames before one contact is created
+        self.staging = staging
+
+
+class FaceContextRegistry:
+    """
+    LRU cache of resident UserFaceContexts.
+
+    get() loads a user's context on first use through `load` and marks it most
+    recently used; once more than `max_resident` users are resident, the least
+    recently used context is passed to `evict` (which persists it) and dropped.
+    Not thread-safe: FaceService only touches it from its serialized thread.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], UserFaceContext],
+        evict: Callable[[UserFaceContext], None],
+        max_resident: int = 8,
+    ):
+        self._load = load
+        self._evict = evict
+        self.max_resident = max_resident
+        self._contexts: "OrderedDict[str, UserFaceContext]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._contexts
+
+    def __iter__(self) -> Iterator[UserFaceContext]:
+        return iter(list(self._contexts.values()))
+
+    def get(self, user_id: str) -> UserFaceContext:
+        context = self._contexts.get(user_id)
+        if context is not None:
+            self._contexts.move_to_end(user_id)
+            return context
+
+        context = self._load(user_id)
+        self._contexts[user_id] = context
+        while len(self._contexts) > max(1, self.max_resident):
+            _, oldest = self._contexts.popitem(last=False)
+            self._evict(oldest)
+        return context
+
+    def evict(self, user_id: str) -> None:
+        context = self._contexts.pop(user_id, None)
+        if context is not None:
+            self._evict(context)
+
+    def evict_all(self) -> None:
+        while self._contexts:
+            _, context = self._contexts.popitem(last=False)
+            self._evict(context)
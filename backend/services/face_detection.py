@@ -0,0 +1,95 @@
+import cv2
+import dlib
+import numpy as np
+import face_recognition
+import face_recognition_models
+from typing import List, Tuple
+
+# Detection runs on a quarter-resolution copy of the frame; boxes are scaled back by this factor
+DETECTION_SCALE = 4
+
+FaceLocation = Tuple[int, int, int, int]  # (top, right, bottom, left) on the small frame
+FaceAnnotation = Tuple[FaceLocation, str, str, Tuple[int, int, int]]  # (box, name, label, BGR color)
+
+
+def prepare_frame(frame: np.ndarray) -> np.ndarray:
+    """Downscales a BGR frame to 1/4 and converts it to contiguous RGB for dlib."""
+    small_frame = cv2.resize(frame, (0, 0), fx=1 / DETECTION_SCALE, fy=1 / DETECTION_SCALE)
+    return np.ascontiguousarray(small_frame[:, :, ::-1])
+
+
+# Both steps are stateless, so they can run in a worker thread or process (see FrameProcessor)
+
+def locate_faces(rgb_small_frame: np.ndarray) -> List[FaceLocation]:
+    """HOG face detection on a prepared frame."""
+    return face_recognition.face_locations(rgb_small_frame)
+
+
+def encode_faces(rgb_small_frame: np.ndarray, face_locations: List[FaceLocation]) -> List[np.ndarray]:
+    """dlib 128-d encodings for the given boxes (empty list -> no encoder call)."""
+    if not face_locations:
+        return []
+    return face_recognition.face_encodings(rgb_small_frame, face_locations)
+
+
+# dlib models for encode_faces_batch, loaded on first use (the same files face_recognition loads)
+_pose_predictor = None
+_face_encoder = None
+
+def _batch_models():
+    global _pose_predictor, _face_encoder
+    if _face_encoder is None:
+        _pose_predictor = dlib.shape_predictor(face_recognition_models.pose_predictor_five_point_model_location())
+        _face_encoder = dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+    return _pose_predictor, _face_encoder
+
+
+def encode_faces_batch(
+    rgb_small_frames: List[np.ndarray],
+    locations_per_frame: List[List[FaceLocation]],
+) -> List[List[np.ndarray]]:
+    """
+    Encodes the faces of several frames in one dlib forward pass.
+
+    face_recognition.face_encodings calls the ResNet once per face; dlib's batch
+    overload takes a list of images with one landmark set each and runs them
+    together. Returns one list of encodings per frame, in the same order as
+    encode_faces would. Falls back to per-frame calls on dlib builds without the
+    batch overload.
+    """
+    results: List[List[np.ndarray]] = [[] for _ in rgb_small_frames]
+    batch = [i for i, locations in enumerate(locations_per_frame) if locations]
+    if not batch:
+        return results
+
+    pose_predictor, face_encoder = _batch_models()
+    images = [rgb_small_frames[i] for i in batch]
+    landmark_sets = []
+    for i in batch:
+        detections = dlib.full_object_detections()
+        # Same 5-point landmarks face_recognition.face_encodings uses by default
+        for top, right, bottom, left in locations_per_frame[i]:
+            detections.append(pose_predictor(rgb_small_frames[i], dlib.rectangle(left, top, right, bottom)))
+        landmark_sets.append(detections)
+
+    try:
+        descriptors = face_encoder.compute_face_descriptor(images, landmark_sets, 1)
+    except TypeError:
+        for i in batch:
+            results[i] = encode_faces(rgb_small_frames[i], locations_per_frame[i])
+        return results
+
+    for i, frame_descriptors in zip(batch, descriptors):
+        results[i] = [np.array(d) for d in frame_descriptors]
+    return results
+
+
+def draw_face_annotations(frame: np.ndarray, annotations: List[FaceAnnotation]) -> np.ndarray:
+    """Draws recognition boxes + labels onto the full-size frame, in place."""
+    for (top, right, bottom, left), name, label, color in annotations:
+        top *= DETECTION_SCALE; right *= DETECTION_SCALE; bottom *= DETECTION_SCALE; left *= DETECTION_SCALE
+        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+        cv2.rectangle(frame, (left, bottom - 35), (right, bottom), color, cv2.FILLED)
+        cv2.putText(frame, name, (left + 6, bottom - 15), cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
+        cv2.putText(frame, label, (left + 6, bottom - 2), cv2.FONT_HERSHEY_DUPLEX, 0.4, (200, 200, 200), 1)
+    return frame
@@ -0,0 +1,407 @@
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Tuple
+
+ENCODING_DIM = 128
+
+# Face distance thresholds used by FaceService (same scale as face_recognition.face_distance)
+STRONG_MATCH_THRESHOLD = 0.55
+WEAK_MATCH_THRESHOLD = 0.75
+
+
+# --- Interface ---
+class FaceIndex(ABC):
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @property
+    @abstractmethod
+    def ids(self) -> np.ndarray:
+        """Ids of all indexed faces, in insertion order."""
+        pass
+
+    @property
+    @abstractmethod
+    def encodings(self) -> np.ndarray:
+        """(len(self), dim) float32 encodings, row i belonging to ids[i]."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def build(self, ids: Iterable[str], encodings: Iterable[np.ndarray]) -> None:
+        """Replaces the index contents in one shot."""
+        pass
+
+    @abstractmethod
+    def add(self, face_id: str, encoding: np.ndarray) -> None:
+        """Inserts a single encoding (e.g. a freshly registered face)."""
+        pass
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (ids, distances), both shaped (num_queries, min(k, len(self))),
+        ordered nearest first. Distances are Euclidean, same scale as
+        `face_recognition.face_distance`.
+        """
+        pass
+
+    def save(self, path: str) -> None:
+        """
+        Writes what the index derived from its encodings (e.g. a clustering) to
+        `path` (.npz). The encodings themselves are not written: they are in the
+        contact snapshot already. Nothing to save by default.
+        """
+        pass
+
+    def load(self, path: str, ids: Iterable[str], encodings: np.ndarray) -> bool:
+        """
+        Builds the index over `ids` / `encodings`, reusing the state `save` wrote
+        if it was taken over exactly these ids. Returns False, leaving the index
+        untouched, if there is no such snapshot (the caller then calls build).
+        """
+        return False
+
+
+# --- Exact (brute force) Implementation ---
+class FaceEncodingIndex(FaceIndex):
+    """Contiguous float32 (N x 128) matrix of known face encodings.
+
+    Squared row norms are cached next to the matrix, so matching every face in a
+    frame is a single matrix product instead of one `face_distance` call (and one
+    list -> array conversion) per face. Rows are appended in place and the
+    backing buffers double when full.
+    """
+
+    def __init__(self, dim: int = ENCODING_DIM, initial_capacity: int = 256):
+        self.dim = dim
+        self._encodings = np.empty((initial_capacity, dim), dtype=np.float32)
+        self._sq_norms = np.empty(initial_capacity, dtype=np.float32)
+        self._ids = np.empty(initial_capacity, dtype=object)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def encodings(self) -> np.ndarray:
+        return self._encodings[:self._size]
+
+    def clear(self) -> None:
+        self._size = 0
+
+    def build(self, ids: Iterable[str], encodings: Iterable[np.ndarray]) -> None:
+        ids = list(ids)
+        if not isinstance(encodings, np.ndarray):
+            encodings = list(encodings)
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(len(ids), self.dim)
+
+        self._reserve(len(ids))
+        self._encodings[:len(ids)] = matrix
+        self._sq_norms[:len(ids)] = np.einsum("ij,ij->i", matrix, matrix)
+        self._ids[:len(ids)] = ids
+        self._size = len(ids)
+
+    def add(self, face_id: str, encoding: np.ndarray) -> None:
+        self._reserve(self._size + 1)
+        row = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        self._encodings[self._size] = row
+        self._sq_norms[self._size] = row @ row
+        self._ids[self._size] = face_id
+        self._size += 1
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Matches every query encoding against every known encoding at once."""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        k = min(k, self._size)
+        if k == 0 or len(queries) == 0:
+            return np.empty((len(queries), k), dtype=object), np.empty((len(queries), k), dtype=np.float32)
+
+        known = self._encodings[:self._size]
+        # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x  -> one GEMM for the whole frame
+        sq_dists = (queries * queries).sum(axis=1)[:, None] + self._sq_norms[None, :self._size]
+        sq_dists -= 2.0 * (queries @ known.T)
+
+        if k < self._size:
+            top = np.argpartition(sq_dists, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (len(queries), self._size))
+
+        # Re-rank the shortlist with direct differences; the expanded form above
+        # loses precision through cancellation, and thresholds are tight.
+        distances = np.linalg.norm(known[top] - queries[:, None, :], axis=2)
+        order = np.argsort(distances, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+
+        return self._ids[top], distances
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._encodings)
+        if size <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < size:
+            capacity *= 2
+
+        encodings = np.empty((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        ids = np.empty(capacity, dtype=object)
+        encodings[:self._size] = self._encodings[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._encodings, self._sq_norms, self._ids = encodings, sq_norms, ids
+
+
+# --- Approximate (IVF) Implementation ---
+class IVFFaceIndex(FaceIndex):
+    """Inverted-file index: k-means coarse clusters over the stored encodings.
+
+    A query only scans the `nprobe` clusters whose centroids are nearest, which
+    is approximate. Any query whose approximate best distance is not below
+    `exact_above` is re-checked with an exact scan, so the strong / weak / new
+    face decision is the same as on the brute force path: a face is only called
+    a strong match when some encoding really is within `exact_above` (the
+    approximate distance can only overestimate the true nearest), and weak-match
+    and new-face decisions are always made on exact results. Only which of
+    several strong matches is returned may differ. Set exact_above=None for a
+    pure nprobe search.
+
+    Below `min_train_size` faces the index is a plain exact scan. New faces are
+    assigned to their nearest centroid on insert, and the clustering is
+    retrained once the index has grown by `retrain_growth`x.
+    """
+
+    def __init__(
+        self,
+        dim: int = ENCODING_DIM,
+        nprobe: int = 8,
+        exact_above: float | None = STRONG_MATCH_THRESHOLD,
+        min_train_size: int = 2048,
+        retrain_growth: float = 4.0,
+        kmeans_iters: int = 10,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.exact_above = exact_above
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+
+        self._store = FaceEncodingIndex(dim)
+        self._centroids: np.ndarray | None = None
+        self._lists: List[List[int]] = []
+        # Per-list (rows, contiguous copy of their encodings), rebuilt lazily after inserts
+        self._list_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._trained_size = 0
+        self.exact_fallbacks = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._store.ids
+
+    @property
+    def encodings(self) -> np.ndarray:
+        return self._store.encodings
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._reset_clusters()
+
+    def build(self, ids: Iterable[str], encodings: Iterable[np.ndarray]) -> None:
+        self._store.build(ids, encodings)
+        self._reset_clusters()
+        if len(self._store) >= self.min_train_size:
+            self.train()
+
+    def add(self, face_id: str, encoding: np.ndarray) -> None:
+        self._store.add(face_id, encoding)
+        row = len(self._store) - 1
+
+        if not self.is_trained:
+            if len(self._store) >= self.min_train_size:
+                self.train()
+            return
+
+        if len(self._store) >= self.retrain_growth * self._trained_size:
+            self.train()
+            return
+
+        row_encoding = self._store.encodings[row:row + 1]
+        cluster = int(self._nearest_centroid(row_encoding, self._centroids)[0])
+        self._lists[cluster].append(row)
+        self._list_arrays.pop(cluster, None)
+
+    def train(self) -> None:
+        """(Re)clusters every stored encoding into ~sqrt(N) lists."""
+        data = self._store.encodings
+        n = len(data)
+        nlist = int(min(n, max(1, np.sqrt(n))))
+        rng = np.random.default_rng(self.seed)
+
+        # Lloyd iterations on a bounded sample; full assignment afterwards
+        sample = data[rng.choice(n, size=min(n, 32 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            labels = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        self._assign_all(centroids)
+        self._trained_size = n
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_trained:
+            return self._store.search(queries, k)
+
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        k = min(k, len(self._store))
+        out_ids = np.empty((len(queries), k), dtype=object)
+        out_dists = np.empty((len(queries), k), dtype=np.float32)
+        if k == 0 or len(queries) == 0:
+            return out_ids, out_dists
+
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(_sq_distances(queries, self._centroids), nprobe - 1, axis=1)[:, :nprobe]
+
+        needs_exact = []
+        for qi, query in enumerate(queries):
+            rows, dists = self._scan_lists(probes[qi], query)
+            if len(dists) < k or (self.exact_above is not None and dists.min() >= self.exact_above):
+                needs_exact.append(qi)
+                continue
+            top = np.argsort(dists)[:k]
+            out_ids[qi] = self._store.ids[rows[top]]
+            out_dists[qi] = dists[top]
+
+        if needs_exact:
+            # Not a confident match -> decide on exact distances, batched
+            self.exact_fallbacks += len(needs_exact)
+            out_ids[needs_exact], out_dists[needs_exact] = self._store.search(queries[needs_exact], k)
+
+        return out_ids, out_dists
+
+    def save(self, path: str) -> None:
+        """Writes the clustering: centroids and each id's list (no encodings)."""
+        if not self.is_trained:
+            return  # nothing trained yet; build() is all a reload needs
+        assignments = np.empty(len(self._store), dtype=np.int32)
+        for cluster, rows in enumerate(self._lists):
+            assignments[rows] = cluster
+        _save_npz(
+            path,
+            ids=self.ids.astype(str),
+            centroids=self._centroids,
+            assignments=assignments,
+            trained_size=np.array(self._trained_size),
+        )
+
+    def load(self, path: str, ids: Iterable[str], encodings: np.ndarray) -> bool:
+        data = _load_npz(path)
+        if data is None or "centroids" not in data or data["centroids"].shape[1:] != (self.dim,):
+            return False
+        ids = list(ids)
+        saved = dict(zip(data["ids"].tolist(), data["assignments"].tolist()))
+        if len(saved) != len(ids) or any(face_id not in saved for face_id in ids):
+            return False
+
+        # Reuse the saved clustering instead of re-running k-means; rows follow `ids`
+        self._store.build(ids, encodings)
+        self._reset_clusters()
+        self._centroids = data["centroids"].astype(np.float32)
+        self._lists = [[] for _ in range(len(self._centroids))]
+        for row, face_id in enumerate(ids):
+            self._lists[saved[face_id]].append(row)
+        self._trained_size = int(data["trained_size"])
+        return True
+
+    def _reset_clusters(self) -> None:
+        self._centroids = None
+        self._lists = []
+        self._list_arrays = {}
+        self._trained_size = 0
+
+    def _assign_all(self, centroids: np.ndarray) -> None:
+        data = self._store.encodings
+        labels = self._nearest_centroid(data, centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]].tolist() for c in range(len(centroids))]
+        self._list_arrays = {}
+        self._centroids = centroids.astype(np.float32)
+
+    def _scan_lists(self, clusters: np.ndarray, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        all_rows, all_dists = [], []
+        for cluster in clusters:
+            cluster = int(cluster)
+            if cluster not in self._list_arrays:
+                rows = np.asarray(self._lists[cluster], dtype=np.int64)
+                self._list_arrays[cluster] = (rows, self._store.encodings[rows])
+            rows, vectors = self._list_arrays[cluster]
+            all_rows.append(rows)
+            all_dists.append(np.linalg.norm(vectors - query, axis=1))
+        return np.concatenate(all_rows), np.concatenate(all_dists)
+
+    @staticmethod
+    def _nearest_centroid(data: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        labels = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), chunk):
+            labels[start:start + chunk] = np.argmin(_sq_distances(data[start:start + chunk], centroids), axis=1)
+        return labels
+
+
+FACE_INDEX_BACKENDS = {
+    "exact": FaceEncodingIndex,
+    "ivf": IVFFaceIndex,
+}
+
+
+def create_face_index(backend: str = "exact", **kwargs) -> FaceIndex:
+    """Builds an empty face index for the configured backend name."""
+    try:
+        index_cls = FACE_INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown face index backend: {backend!r} (expected one of {list(FACE_INDEX_BACKENDS)})")
+    return index_cls(**kwargs)
+
+
+def _sq_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2.0 * (a @ b.T)
+
+
+def _save_npz(path: str, **arrays) -> None:
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    # Write-then-rename so a crash never leaves a truncated snapshot behind
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_npz(path: str) -> Dict[str, np.ndarray] | None:
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
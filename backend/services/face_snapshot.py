@@ -0,0 +1,129 @@
+import json
+import os
+from typing import Dict, Iterator, List, MutableMapping
+
+import numpy as np
+
+from .face_index import ENCODING_DIM
+from .storage import Contact
+
+# Private snapshots go under SNAPSHOT_DIR/{user_id}/, never under the /images
+# mount (data/faces): they hold every contact and face encoding of a user.
+SNAPSHOT_DIR = "data/index"
+
+# Files of one user's snapshot. The manifest is written last and names the
+# contacts version the arrays were taken at; without it the snapshot is ignored.
+MANIFEST_FILE = "contacts_snapshot.json"
+ENCODINGS_FILE = "contacts_encodings.npy"   # float32 (N, 128)
+IDS_FILE = "contacts_ids.npy"               # unicode (N,)
+OFFSETS_FILE = "contacts_offsets.npy"       # int64 (N + 1,) into the metadata blob
+METADATA_FILE = "contacts_metadata.npy"     # uint8 blob of Contact JSON records (encoding excluded)
+
+SNAPSHOT_FORMAT = 1
+
+
+class LazyContactTable(MutableMapping):
+    """
+    contact_id -> Contact over the snapshot's metadata blob. Records are parsed
+    (and validated) only when first looked up; contacts set after loading (new
+    registrations, renames) shadow the stored ones.
+    """
+
+    def __init__(self, ids: List[str], offsets: np.ndarray, blob: np.ndarray):
+        self._rows: Dict[str, int] = {contact_id: row for row, contact_id in enumerate(ids)}
+        self._offsets = offsets
+        self._blob = blob
+        self._parsed: Dict[str, Contact] = {}
+
+    def __getitem__(self, contact_id: str) -> Contact:
+        contact = self._parsed.get(contact_id)
+        if contact is None:
+            row = self._rows[contact_id]
+            record = self._blob[self._offsets[row]:self._offsets[row + 1]].tobytes()
+            contact = Contact.model_validate_json(record)
+            self._parsed[contact_id] = contact
+        return contact
+
+    def __setitem__(self, contact_id: str, contact: Contact) -> None:
+        self._parsed[contact_id] = contact
+
+    def __delitem__(self, contact_id: str) -> None:
+        found = self._rows.pop(contact_id, None) is not None
+        found = self._parsed.pop(contact_id, None) is not None or found
+        if not found:
+            raise KeyError(contact_id)
+
+    def __contains__(self, contact_id: object) -> bool:
+        return contact_id in self._parsed or contact_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._rows
+        yield from (contact_id for contact_id in self._parsed if contact_id not in self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows) + sum(1 for contact_id in self._parsed if contact_id not in self._rows)
+
+
+class ContactSnapshot:
+    """A user's encoded contacts as read from disk: ids, a memory-mapped encoding matrix and metadata."""
+
+    def __init__(self, ids: List[str], encodings: np.ndarray, contacts: LazyContactTable):
+        self.ids = ids
+        self.encodings = encodings
+        self.contacts = contacts
+
+
+def save_contact_snapshot(directory: str, version: int, contacts: List[Contact]) -> None:
+    """Writes the encoded `contacts` of one user, tagged with their contacts version."""
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    # Invalidate first, so a crash half-way never pairs old arrays with a new manifest
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    records = [c.model_dump_json(exclude={"encoding"}).encode() for c in contacts]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in records], out=offsets[1:])
+    arrays = {
+        ENCODINGS_FILE: np.asarray([c.encoding for c in contacts], dtype=np.float32).reshape(len(contacts), ENCODING_DIM),
+        IDS_FILE: np.array([c.contact_id for c in contacts], dtype=str),
+        OFFSETS_FILE: offsets,
+        METADATA_FILE: np.frombuffer(b"".join(records), dtype=np.uint8),
+    }
+    for name, array in arrays.items():
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        os.replace(f"{path}.tmp", path)
+
+    manifest = {"format": SNAPSHOT_FORMAT, "version": version, "count": len(contacts), "dim": ENCODING_DIM}
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def load_contact_snapshot(directory: str, version: int) -> ContactSnapshot | None:
+    """Maps the snapshot in `directory` if it was taken at `version`; None if missing or stale."""
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != version:
+        return None
+
+    encodings = np.load(os.path.join(directory, ENCODINGS_FILE), mmap_mode="r")
+    ids = np.load(os.path.join(directory, IDS_FILE)).tolist()
+    offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+    blob = np.load(os.path.join(directory, METADATA_FILE), mmap_mode="r")
+    if len(ids) != manifest["count"] or encodings.shape != (len(ids), manifest["dim"]):
+        return None
+    return ContactSnapshot(ids, encodings, LazyContactTable(ids, offsets, blob))
+
+
+def remove_contact_snapshot(directory: str) -> None:
+    """Deletes the snapshot files in `directory`, if any (e.g. ones left in a served folder)."""
+    for name in (MANIFEST_FILE, ENCODINGS_FILE, IDS_FILE, OFFSETS_FILE, METADATA_FILE):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
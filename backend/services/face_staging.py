@@ -0,0 +1,83 @@
+import time
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from .face_index import STRONG_MATCH_THRESHOLD
+
+
+@dataclass
+class PendingFace:
+    """An unknown face seen over one or more frames, not yet registered."""
+    encoding_sum: np.ndarray
+    count: int
+    first_seen: float
+    last_frame: int
+    crop_rgb: np.ndarray
+
+    @property
+    def mean_encoding(self) -> np.ndarray:
+        return self.encoding_sum / self.count
+
+
+class RegistrationStaging:
+    """
+    Holding area for unknown faces before they become contacts.
+
+    While a new person's encoding settles, several consecutive frames can miss
+    every known face. Instead of registering each of them, sightings within
+    `match_threshold` of a pending face's mean encoding are merged into it, and a
+    pending face is released for registration (with the averaged encoding) once
+    it has `min_frames` sightings or is `window_s` old. min_frames=1 registers on
+    first sight, as before.
+    """
+
+    def __init__(self, min_frames: int = 5, window_s: float = 1.0, match_threshold: float = STRONG_MATCH_THRESHOLD):
+        self.min_frames = min_frames
+        self.window_s = window_s
+        self.match_threshold = match_threshold
+        self.pending: List[PendingFace] = []
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def observe(self, encoding: np.ndarray, crop_rgb: np.ndarray, frame_seq: int, now: float | None = None) -> PendingFace | None:
+        """Adds a sighting; returns its PendingFace (removed from staging) if it is ready to register."""
+        now = time.monotonic() if now is None else now
+        encoding = np.asarray(encoding, dtype=np.float64)
+
+        # Nearest pending face not already matched by another face in this frame
+        best, best_distance = None, self.match_threshold
+        for pending in self.pending:
+            if pending.last_frame == frame_seq:
+                continue
+            distance = float(np.linalg.norm(pending.mean_encoding - encoding))
+            if distance < best_distance:
+                best, best_distance = pending, distance
+
+        if best is None:
+            best = PendingFace(np.zeros_like(encoding), 0, now, frame_seq, crop_rgb)
+            self.pending.append(best)
+        elif crop_rgb.size > best.crop_rgb.size:
+            best.crop_rgb = crop_rgb # keep the largest view for the contact photo
+
+        best.encoding_sum += encoding
+        best.count += 1
+        best.last_frame = frame_seq
+
+        if best.count >= self.min_frames or now - best.first_seen >= self.window_s:
+            self.pending.remove(best)
+            return best
+        return None
+
+    def expired(self, now: float | None = None) -> List[PendingFace]:
+        """Removes and returns pending faces older than window_s (e.g. people who left the frame)."""
+        now = time.monotonic() if now is None else now
+        ready = [p for p in self.pending if now - p.first_seen >= self.window_s]
+        self.pending = [p for p in self.pending if now - p.first_seen < self.window_s]
+        return ready
+
+    def drain(self) -> List[PendingFace]:
+        ready, self.pending = self.pending, []
+        return ready
@@ -0,0 +1,98 @@
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .face_detection import FaceLocation
+
+
+@dataclass
+class Track:
+    """One face followed across frames of a single video stream."""
+    track_id: int
+    box: FaceLocation
+    last_seen: float
+    # Identity from the last time this track was encoded + matched
+    contact_id: str | None = None
+    distance: float = 1.0
+    frames_since_verify: int = 0
+    needs_encoding: bool = True
+
+
+class FaceTracker:
+    """
+    IoU tracker over the quarter-resolution face boxes of one stream.
+
+    A detection that overlaps a live track inherits its identity, so the encoder
+    only has to run for new tracks, tracks without a confident (strong) match, and
+    once every `reverify_interval` frames per track. Tracks not seen for
+    `track_timeout_s` are dropped.
+    """
+
+    def __init__(self, reverify_interval: int = 10, track_timeout_s: float = 1.0, iou_threshold: float = 0.3):
+        self.reverify_interval = reverify_interval
+        self.track_timeout_s = track_timeout_s
+        self.iou_threshold = iou_threshold
+        self.tracks: List[Track] = []
+        self._next_id = 0
+
+    def update(self, face_locations: List[FaceLocation], now: float | None = None) -> List[Track]:
+        """Associates this frame's detections with tracks; returns one Track per detection, in order."""
+        now = time.monotonic() if now is None else now
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.track_timeout_s]
+
+        # Greedy assignment, highest overlap first
+        candidates: List[Tuple[float, int, int]] = []
+        for det_idx, box in enumerate(face_locations):
+            for track_idx, track in enumerate(self.tracks):
+                overlap = iou(box, track.box)
+                if overlap >= self.iou_threshold:
+                    candidates.append((overlap, det_idx, track_idx))
+        candidates.sort(reverse=True)
+
+        assigned: List[Track | None] = [None] * len(face_locations)
+        used_tracks = set()
+        for _, det_idx, track_idx in candidates:
+            if assigned[det_idx] is not None or track_idx in used_tracks:
+                continue
+            assigned[det_idx] = self.tracks[track_idx]
+            used_tracks.add(track_idx)
+
+        for det_idx, box in enumerate(face_locations):
+            track = assigned[det_idx]
+            if track is None:
+                track = Track(track_id=self._next_id, box=box, last_seen=now)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[det_idx] = track
+            else:
+                track.box = box
+                track.last_seen = now
+                track.frames_since_verify += 1
+                track.needs_encoding = (
+                    track.contact_id is None or track.frames_since_verify >= self.reverify_interval
+                )
+
+        return assigned  # type: ignore[return-value]
+
+    @staticmethod
+    def record_match(track: Track, contact_id: str | None, distance: float) -> None:
+        """Stores the outcome of a fresh encode + match. contact_id=None means not confident."""
+        track.contact_id = contact_id
+        track.distance = distance
+        track.frames_since_verify = 0
+
+    def clear(self) -> None:
+        self.tracks = []
+
+
+def iou(a: FaceLocation, b: FaceLocation) -> float:
+    a_top, a_right, a_bottom, a_left = a
+    b_top, b_right, b_bottom, b_left = b
+    inter_w = min(a_right, b_right) - max(a_left, b_left)
+    inter_h = min(a_bottom, b_bottom) - max(a_top, b_top)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    area_a = (a_right - a_left) * (a_bottom - a_top)
+    area_b = (b_right - b_left) * (b_bottom - b_top)
+    return inter / float(area_a + area_b - inter)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Dict
+
+from .frame_processor import LatestFrameSlot
+from utils.metrics import metrics
+
+# The consumer endpoint used to resend the latest frame on this period
+LEGACY_POLL_INTERVAL_S = 0.03
+
+
+class FrameSubscription:
+    """One consumer's view of the broadcaster: a single slot holding the newest unsent frame."""
+
+    def __init__(self, broadcaster: "FrameBroadcaster", consumer_id: int, max_fps: float):
+        self.broadcaster = broadcaster
+        self.consumer_id = consumer_id
+        self.max_fps = max_fps
+        self.slot = LatestFrameSlot()
+        self.last_sent_at: float | None = None
+
+    async def next_frame(self) -> bytes | None:
+        """
+        Waits for a frame newer than the last one returned, at most `max_fps` per
+        second; None once unsubscribed. Frames published while this consumer is
+        paced are overwritten in its slot, so it still gets the newest one.
+        """
+        if self.max_fps > 0 and self.last_sent_at is not None:
+            wait = self.last_sent_at + 1.0 / self.max_fps - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        item = await self.slot.get()
+        if item is None:
+            return None
+        frame_bytes, published_at = item
+        now = time.monotonic()
+        self.broadcaster._record_send(self, now - published_at, now)
+        return frame_bytes
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self)
+
+
+class FrameBroadcaster:
+    """
+    Event-driven fan-out of encoded frames to video consumers.
+
+    publish() hands the same immutable bytes object to every subscriber's
+    single-slot queue; nothing is copied per consumer. A consumer that is still
+    sending the previous frame simply finds the newest one in its slot (the
+    overwritten frames count as video.consumer_frames_skipped), and with no new
+    frames consumers wait on an event instead of polling.
+
+    Metrics: video.consumer_lag_ms (worst publish-to-send delay among consumers),
+    video.duplicate_sends_avoided (resends the old 30 ms poll would have made
+    while no new frame existed), video.consumers (across all broadcasters; there
+    is one per user).
+
+    Producers ask wants_frame() before annotating/encoding a frame, so nothing is
+    encoded without consumers, nor faster than the fastest one asked for.
+    """
+
+    # Subscribers of every broadcaster, for the video.consumers gauge
+    total_subscribers = 0
+
+    def __init__(self):
+        self.subscribers: Dict[int, FrameSubscription] = {}
+        self.latest: bytes | None = None
+        self._latest_published_at = 0.0
+        self._last_claimed_at = float("-inf")
+        self._lag_ms: Dict[int, float] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def subscribe(self, max_fps: float = 30.0) -> FrameSubscription:
+        subscription = FrameSubscription(self, self._next_id, max_fps)
+        self._next_id += 1
+        self.subscribers[subscription.consumer_id] = subscription
+        if self.latest is not None:
+            subscription.slot.put((self.latest, self._latest_published_at)) # show something straight away
+        FrameBroadcaster.total_subscribers += 1
+        metrics.set_gauge("video.consumers", FrameBroadcaster.total_subscribers)
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription) -> None:
+        subscription.slot.close()
+        if self.subscribers.pop(subscription.consumer_id, None) is not None:
+            FrameBroadcaster.total_subscribers -= 1
+        self._lag_ms.pop(subscription.consumer_id, None)
+        metrics.set_gauge("video.consumers", FrameBroadcaster.total_subscribers)
+        metrics.set_gauge("video.consumer_lag_ms", max(self._lag_ms.values(), default=0.0))
+
+    def wants_frame(self, now: float | None = None) -> bool:
+        """True if a consumer is waiting and the max requested FPS allows another frame (claims the slot)."""
+        if not self.subscribers:
+            return False
+        now = time.monotonic() if now is None else now
+        max_fps = max(s.max_fps for s in self.subscribers.values())
+        if max_fps > 0 and now - self._last_claimed_at < 1.0 / max_fps:
+            return False
+        self._last_claimed_at = now
+        return True
+
+    def publish(self, frame_bytes: bytes) -> None:
+        """Makes `frame_bytes` the newest frame for every consumer. Call from the event loop."""
+        self.latest = frame_bytes
+        self._latest_published_at = time.monotonic()
+        for subscription in self.subscribers.values():
+            if subscription.slot.put((frame_bytes, self._latest_published_at)):
+                metrics.incr("video.consumer_frames_skipped")
+
+    def _record_send(self, subscription: FrameSubscription, lag_s: float, now: float) -> None:
+        self._lag_ms[subscription.consumer_id] = lag_s * 1000
+        metrics.set_gauge("video.consumer_lag_ms", round(max(self._lag_ms.values()), 1))
+        if subscription.last_sent_at is not None:
+            idle_polls = int((now - subscription.last_sent_at) / LEGACY_POLL_INTERVAL_S) - 1
+            if idle_polls > 0:
+                metrics.incr("video.duplicate_sends_avoided", idle_polls)
+        subscription.last_sent_at = now
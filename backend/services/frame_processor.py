@@ -0,0 +1,260 @@
+import asyncio
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+from .face_detection import (
+    FaceAnnotation,
+    draw_face_annotations,
+    encode_faces,
+    encode_faces_batch,
+    locate_faces,
+    prepare_frame,
+)
+from .recognition_service import FaceService, stream_rounds
+
+
+class FrameQueueFull(Exception):
+    """Raised when max_pending frames are already in flight; the caller should skip recognition."""
+
+
+class LatestFrameSlot:
+    """
+    Single-slot buffer between a fast receiver and a slow consumer: put() overwrites
+    whatever is waiting, so the consumer always gets the freshest item and stale
+    ones are dropped instead of queueing up.
+    """
+
+    def __init__(self):
+        self._item: Any = None
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def put(self, item: Any) -> bool:
+        """Stores `item`; returns True if an unconsumed item was overwritten (dropped)."""
+        dropped = self._item is not None
+        self._item = item
+        self._ready.set()
+        return dropped
+
+    async def get(self) -> Any:
+        """Waits for the newest item; returns None once closed and drained."""
+        while self._item is None and not self._closed:
+            self._ready.clear()
+            await self._ready.wait()
+        item, self._item = self._item, None
+        return item
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+
+def _init_detect_worker() -> None:
+    # Importing face_recognition loads the dlib detector/encoder models, once per worker process
+    import face_recognition  # noqa: F401
+
+
+class FrameProcessor:
+    """
+    Runs face recognition off the asyncio event loop.
+
+    Detection + encoding (the dlib part) goes to a pool of `workers`: processes by
+    default, since the HOG detector holds the GIL, or threads with
+    use_processes=False. Each worker process loads its own copy of the models.
+    The pool is created on the first frame, so importing the app (or a process
+    that never sees video) doesn't fork workers.
+    Matching, registration and drawing mutate FaceService state, so they run on a
+    single dedicated thread. At most `max_pending` frames are in flight; beyond
+    that `process` raises FrameQueueFull instead of queueing, so the executors'
+    queues stay bounded and callers never wait behind a backlog.
+
+    With batch_window_ms > 0, frames from all producers are collected for up to
+    that long (or until max_batch frames) and run as one micro-batch: detection
+    fans out over the workers, and all faces needing an encoding go through the
+    encoder in a single call (one per round when a stream has several frames in
+    the batch, see stream_rounds). max_pending is raised to fit a full batch.
+    """
+
+    def __init__(
+        self,
+        face_service: FaceService,
+        workers: int = 2,
+        use_processes: bool = True,
+        max_pending: int = 4,
+        batch_window_ms: float = 0,
+        max_batch: int = 16,
+    ):
+        self.face_service = face_service
+        self.batch_window_s = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max(max_pending, 2 * max_batch) if self.batch_window_s > 0 else max_pending
+        self._pending = 0
+        self._batch: List[Tuple[np.ndarray, str, str | None, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+        self.workers = workers
+        self.use_processes = use_processes
+        self._detect_pool: Executor | None = None
+        self._service_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-service")
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def _detect_executor(self) -> Executor:
+        # Only used from the event loop, so no lock is needed around the first use
+        if self._detect_pool is None:
+            if self.use_processes:
+                self._detect_pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_detect_worker)
+            else:
+                self._detect_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="face-detect")
+        return self._detect_pool
+
+    async def process(
+        self, frame: np.ndarray, stream_id: str = "default", user_id: str | None = None
+    ) -> Tuple[np.ndarray, str | None]:
+        """Async equivalent of FaceService.process_frame: returns (annotated_frame, detected_id)."""
+        annotations, detected_id = await self.recognize(frame, stream_id, user_id)
+        return draw_face_annotations(frame, annotations), detected_id
+
+    async def recognize(
+        self, frame: np.ndarray, stream_id: str = "default", user_id: str | None = None
+    ) -> Tuple[List[FaceAnnotation], str | None]:
+        """Like process, but leaves `frame` untouched and returns what would be drawn on it."""
+        if self._pending >= self.max_pending:
+            raise FrameQueueFull()
+
+        self._pending += 1
+        try:
+            if self.batch_window_s > 0:
+                return await self._process_batched(frame, stream_id, user_id)
+
+            loop = asyncio.get_running_loop()
+            rgb_small_frame = await loop.run_in_executor(self._service_executor, prepare_frame, frame)
+            face_locations = await loop.run_in_executor(self._detect_executor, locate_faces, rgb_small_frame)
+            tracks = await loop.run_in_executor(
+                self._service_executor, self.face_service.track_faces, face_locations, stream_id, user_id
+            )
+
+            # Faces already identified by their track skip the encoder entirely
+            to_encode = [t.box for t in tracks if t.needs_encoding]
+            face_encodings = []
+            if to_encode:
+                face_encodings = await loop.run_in_executor(
+                    self._detect_executor, encode_faces, rgb_small_frame, to_encode
+                )
+
+            return await loop.run_in_executor(
+                self._service_executor,
+                self.face_service.recognize_faces,
+                rgb_small_frame,
+                face_locations,
+                face_encodings,
+                tracks,
+                user_id,
+            )
+        finally:
+            self._pending -= 1
+
+    async def _process_batched(
+        self, frame: np.ndarray, stream_id: str, user_id: str | None
+    ) -> Tuple[List[FaceAnnotation], str | None]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((frame, stream_id, user_id, future))
+        if len(self._batch) >= self.max_batch:
+            self._flush_batch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window_s, self._flush_batch)
+        return await future
+
+    def _flush_batch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, str, str | None, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        frames = [frame for frame, _, _, _ in batch]
+        stream_ids = [stream_id for _, stream_id, _, _ in batch]
+        user_ids = [user_id for _, _, user_id, _ in batch]
+        try:
+            rgb_small_frames = await loop.run_in_executor(
+                self._service_executor, lambda: [prepare_frame(f) for f in frames]
+            )
+            # HOG detection has no batch form; spread the frames over the workers instead
+            locations_per_frame = await asyncio.gather(
+                *(loop.run_in_executor(self._detect_executor, locate_faces, rgb) for rgb in rgb_small_frames)
+            )
+            results = []
+            # Frames of one stream go in separate rounds (see FaceService.process_frames)
+            for start, end in stream_rounds(stream_ids):
+                results += await self._run_round(
+                    rgb_small_frames[start:end], list(locations_per_frame[start:end]),
+                    stream_ids[start:end], user_ids[start:end],
+                )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_round(
+        self, rgb_small_frames: list, locations_per_frame: list, stream_ids: List[str], user_ids: List[str | None]
+    ) -> List[Tuple[List[FaceAnnotation], str | None]]:
+        loop = asyncio.get_running_loop()
+        tracks_per_frame = await loop.run_in_executor(
+            self._service_executor,
+            self.face_service.track_faces_batch,
+            locations_per_frame,
+            stream_ids,
+            user_ids,
+        )
+
+        # One encoder call for every face of the round that still needs it;
+        # only frames with such faces are shipped to the worker
+        to_encode = [[t.box for t in tracks if t.needs_encoding] for tracks in tracks_per_frame]
+        encode_idx = [i for i, boxes in enumerate(to_encode) if boxes]
+        encodings_per_frame: List[list] = [[] for _ in rgb_small_frames]
+        if encode_idx:
+            encoded = await loop.run_in_executor(
+                self._detect_executor,
+                encode_faces_batch,
+                [rgb_small_frames[i] for i in encode_idx],
+                [to_encode[i] for i in encode_idx],
+            )
+            for i, encodings in zip(encode_idx, encoded):
+                encodings_per_frame[i] = encodings
+
+        return await loop.run_in_executor(
+            self._service_executor,
+            self.face_service.recognize_frames,
+            rgb_small_frames,
+            locations_per_frame,
+            encodings_per_frame,
+            tracks_per_frame,
+            user_ids,
+        )
+
+    async def run_serialized(self, fn, *args):
+        """Runs `fn` on the FaceService thread, e.g. a login that loads a user's context."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._service_executor, fn, *args)
+
+    async def drop_stream(self, stream_id: str) -> None:
+        """Forgets the face tracks of a disconnected stream."""
+        await self.run_serialized(self.face_service.drop_stream, stream_id)
+
+    def shutdown(self) -> None:
+        if self._detect_pool is not None:
+            self._detect_pool.shutdown(wait=False, cancel_futures=True)
+        self._service_executor.shutdown(wait=True)
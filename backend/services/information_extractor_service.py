@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from backend.repos.contact_note_repo import create_contact_note
+from backend.repos.contact_note_repo import create_contact_notes
 from database.models import Contact, ContactNote, User
 from backend.services.audio_transcription_service import Utterance, process_audio
 from langchain.agents import create_agent
@@ -37,15 +37,22 @@ def utterances_to_conversation_entries(utterances: list[Utterance], user: User)
     return output
 
 def notable_facts_to_contact_note(notable_facts: list[NotableFact], user: User, contact: Contact) -> list[ContactNote]:
-    outputs = []
-    for notable_fact in notable_facts:
-        contact_note = create_contact_note(user.user_id, contact.contact_id, notable_fact.label, notable_fact.content)
-
-        outputs.append(contact_note)
-
-    return outputs
+    # All facts are embedded in one request
+    return create_contact_notes(
+        user.user_id,
+        contact.contact_id,
+        [(notable_fact.label, notable_fact.content) for notable_fact in notable_facts],
+    )
 
 def extract_contact_facts_from_conversation(conversation: list[ConversationEntry], user: User, contact: Contact) -> list[ContactNote]:
+    notable_facts = extract_notable_facts(conversation, user)
+    return notable_facts_to_contact_note(
+        notable_facts=notable_facts,
+        user=user,
+        contact=contact
+    )
+
+def extract_notable_facts(conversation: list[ConversationEntry], user: User) -> list[NotableFact]:
     system_prompt = f"""
     You are a helpful AI assistant that listens to {user.username} conversations with people they are connected to. Your job is to help them remember important information from their conversations that will be useful in the future. Important information includes small things like a birthday or other significant dates, occupation, names of family members, contact information, stories, a plan to meet up later, etc. For the conversation snippet you are given, extract these relevant facts. Remember that these facts will be stored in long-term storage, so don't record everything. Just record things that would be good to remember in the long term. It is okay to response with no extracted facts."""
 
@@ -58,13 +65,7 @@ def extract_contact_facts_from_conversation(conversation: list[ConversationEntry
 
     extracted_facts: ListOfNotableFacts = result['structured_response']
     print(extracted_facts)
-    content_notes = notable_facts_to_contact_note(
-        notable_facts=extracted_facts.notable_facts,
-        user=user,
-        contact=contact
-    )
-
-    return content_notes
+    return extracted_facts.notable_facts
 
 
 if __name__ == "__main__":
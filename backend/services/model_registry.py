@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Callable, Iterable
+
+from backend.config import config
+
+
+class ModelRegistry:
+    """
+    Process-wide home for heavy models (e.g. the ECAPA speaker model). A model
+    is registered with a loader and built once: on the first get(), or ahead
+    of time by warm_up / warm_up_in_background. Concurrent first calls wait
+    for the same load instead of loading twice; workers that never ask for a
+    model never pay for it.
+    """
+
+    def __init__(self, torch_num_threads: int = 0):
+        self.torch_num_threads = torch_num_threads
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._models: dict[str, Any] = {}
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._torch_configured = False
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model '{name}'. Registered: {sorted(self._loaders)}")
+            loader, load_lock = self._loaders[name], self._load_locks[name]
+
+        with load_lock:
+            if name not in self._models:
+                self._configure_torch()
+                print(f"Loading model '{name}'...")
+                self._models[name] = loader()
+        return self._models[name]
+
+    def warm_up(self, names: Iterable[str]) -> None:
+        """Loads `names` now; a model that fails is reported and left to load (and fail) on first use."""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Model warm-up failed for '{name}': {e}")
+
+    def warm_up_in_background(self, names: Iterable[str]) -> threading.Thread:
+        """warm_up on a daemon thread, so startup does not wait for the models."""
+        thread = threading.Thread(target=self.warm_up, args=(list(names),), name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _configure_torch(self) -> None:
+        # Once, before the first model: torch's intra-op pool is process-wide
+        if self._torch_configured or self.torch_num_threads <= 0:
+            return
+        import torch
+        torch.set_num_threads(self.torch_num_threads)
+        self._torch_configured = True
+
+
+model_registry = ModelRegistry(torch_num_threads=config.torch_num_threads)
@@ -0,0 +1,114 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+class NoteVectorIndex:
+    """In-process vector index over one user's contact note embeddings.
+
+    Embeddings live in a contiguous (N x dim) matrix, float32 or, with
+    quantize=True, int8 with one scale per row (symmetric scalar quantization,
+    4x smaller, close to Atlas' "scalar" quantization). contact_id and label sit
+    in parallel arrays so filters are vectorised masks. Rows are appended in
+    place (buffers double when full) and removed by moving the last row into
+    the hole, so updates never rebuild the index.
+
+    Scores follow Atlas' dotProduct scale, (1 + dot) / 2, so `min_score`
+    thresholds mean the same thing on both backends.
+    """
+
+    def __init__(self, dim: int, quantize: bool = False, initial_capacity: int = 256):
+        self.dim = dim
+        self.quantize = quantize
+        self._vectors = np.empty((initial_capacity, dim), dtype=np.int8 if quantize else np.float32)
+        self._scales = np.ones(initial_capacity, dtype=np.float32)
+        self._note_ids = np.empty(initial_capacity, dtype=object)
+        self._contact_ids = np.empty(initial_capacity, dtype=object)
+        self._labels = np.empty(initial_capacity, dtype=object)
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self._rows
+
+    def add(self, note_id: str, contact_id: str, label: str, embedding) -> None:
+        """Indexes a note, replacing the previous vector/filters if it is already indexed."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d embedding, got {vector.shape[0]}")
+
+        row = self._rows.get(note_id)
+        if row is None:
+            row = len(self._rows)
+            if row == self._vectors.shape[0]:
+                self._grow()
+            self._rows[note_id] = row
+
+        if self.quantize:
+            peak = float(np.abs(vector).max())
+            scale = peak / 127.0 if peak > 0 else 1.0
+            self._vectors[row] = np.round(vector / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vector
+        self._note_ids[row] = note_id
+        self._contact_ids[row] = contact_id
+        self._labels[row] = label
+
+    def remove(self, note_id: str) -> bool:
+        row = self._rows.pop(note_id, None)
+        if row is None:
+            return False
+        last = len(self._rows)
+        if row != last:
+            for arr in (self._vectors, self._scales, self._note_ids, self._contact_ids, self._labels):
+                arr[row] = arr[last]
+            self._rows[self._note_ids[row]] = row
+        self._note_ids[last] = self._contact_ids[last] = self._labels[last] = None
+        return True
+
+    def search(
+        self,
+        query,
+        k: int = 10,
+        contact_id: str | None = None,
+        label: str | None = None,
+        min_score: float = 0.0,
+    ) -> List[Tuple[str, float]]:
+        """Returns up to k (note_id, score) pairs, best first, among the notes matching the filters."""
+        size = len(self._rows)
+        if size == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+
+        # 1. Exact dot product against every row (int8 rows are rescaled after the product)
+        dots = self._vectors[:size] @ query
+        if self.quantize:
+            dots *= self._scales[:size]
+        scores = (1.0 + dots) / 2.0
+
+        # 2. Filters + threshold as one mask
+        mask = scores >= min_score
+        if contact_id is not None:
+            mask &= self._contact_ids[:size] == contact_id
+        if label is not None:
+            mask &= self._labels[:size] == label
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        # 3. Top k without sorting everything
+        if candidates.size > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._note_ids[i], float(scores[i])) for i in order]
+
+    def _grow(self) -> None:
+        capacity = self._vectors.shape[0] * 2
+        for name in ("_vectors", "_scales", "_note_ids", "_contact_ids", "_labels"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: old.shape[0]] = old
+            setattr(self, name, new)
@@ -1,9 +1,9 @@
 
-from backend.repos.contact_note_repo import save_contact_note_to_database
+from repos.contact_note_repo import create_contact_notes_bulk # same module (and note search index) as the endpoints
 from backend.repos.contact_repo import get_contact_by_contact_id
 from backend.repos.user_repo import create_user, get_user_by_user_id
 from backend.services.audio_transcription_service import process_audio
-from backend.services.information_extractor_service import extract_contact_facts_from_conversation, utterances_to_conversation_entries
+from backend.services.information_extractor_service import extract_notable_facts, utterances_to_conversation_entries
 
 
 def take_notes(file_path: str, user_id: str, contact_id: str):
@@ -16,12 +16,15 @@ def take_notes(file_path: str, user_id: str, contact_id: str):
 
     labeled_utterances = process_audio(file_path, user)
     conversation = utterances_to_conversation_entries(labeled_utterances, user)
-    contact_notes = extract_contact_facts_from_conversation(
+    notable_facts = extract_notable_facts(
         conversation=conversation,
-        user=user,
-        contact=contact
+        user=user
     )
 
-    for contact_note in contact_notes:
-        save_contact_note_to_database(contact_note)
+    # One embedding request and one insert for every fact of the conversation
+    contact_notes = create_contact_notes_bulk(
+        user_id=user_id,
+        contact_id=contact_id,
+        facts=[(fact.label, fact.content) for fact in notable_facts]
+    )
     print(contact_notes)
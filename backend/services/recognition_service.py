@@ -1,83 +1,285 @@
 import os
 import cv2
-import face_recognition
 import numpy as np
 import uuid
 import traceback
 from typing import List, Dict, Any, Tuple
 from .storage import PersonRepository, Contact
+from .face_index import FACE_INDEX_BACKENDS, create_face_index, STRONG_MATCH_THRESHOLD, WEAK_MATCH_THRESHOLD
+from .face_detection import (
+    FaceAnnotation,
+    FaceLocation,
+    draw_face_annotations,
+    encode_faces,
+    encode_faces_batch,
+    locate_faces,
+    prepare_frame,
+)
+from .face_tracker import FaceTracker, Track
+from .face_staging import PendingFace, RegistrationStaging
+from .face_context import FaceContextRegistry, UserFaceContext
+from .face_snapshot import SNAPSHOT_DIR, load_contact_snapshot, remove_contact_snapshot, save_contact_snapshot
+from .registration_writer import PendingRegistration, RegistrationWriter, write_registrations
 from repos import contact_repo
+from utils.metrics import metrics
+
+def stream_rounds(stream_ids: List[str]) -> List[Tuple[int, int]]:
+    """
+    Cuts a micro-batch into consecutive [start, end) rounds in which no stream
+    has two frames, so each round can be tracked, encoded and identified as one
+    batch without changing what per-frame processing would return.
+    """
+    rounds: List[Tuple[int, int]] = []
+    start = 0
+    seen: set = set()
+    for i, stream_id in enumerate(stream_ids):
+        if stream_id in seen:
+            rounds.append((start, i))
+            start, seen = i, set()
+        seen.add(stream_id)
+    if stream_ids:
+        rounds.append((start, len(stream_ids)))
+    return rounds
+
 
 class FaceService:
-    def __init__(self, storage: PersonRepository = None, images_dir: str = "data/faces"):
+    def __init__(
+        self,
+        storage: PersonRepository = None,
+        images_dir: str = "data/faces",
+        index_dir: str = SNAPSHOT_DIR,
+        index_backend: str = "exact",
+        reverify_interval: int = 10,
+        track_timeout_s: float = 1.0,
+        write_behind: bool = True,
+        registration_min_frames: int = 5,
+        registration_window_s: float = 1.0,
+        max_resident_users: int = 8,
+    ):
         self.storage = storage 
         self.images_dir = images_dir
+        # Contact and face index snapshots live here, outside images_dir (which is served as /images)
+        self.index_dir = index_dir
+        self.index_backend = index_backend
+        self.reverify_interval = reverify_interval
+        self.track_timeout_s = track_timeout_s
+        self.registration_min_frames = registration_min_frames
+        self.registration_window_s = registration_window_s
         
         # Ensure the directory exists (Service level check)
         if not os.path.exists(self.images_dir):
             os.makedirs(self.images_dir)
 
-        # In-memory caches for fast recognition
-        self.known_face_encodings: List[np.ndarray] = []
-        self.known_face_ids: List[str] = []
-        self.known_face_metadata: Dict[str, Contact] = {}
+        # In-memory caches for fast recognition, one context per user: loaded on
+        # first use, least recently used ones evicted to their on-disk snapshot
+        self.contexts = FaceContextRegistry(self._load_context, self._evict_context, max_resident_users)
+        # Frames without any user are matched against nothing and never saved
+        self._anonymous = self._new_context(None)
+        # Default user for callers that don't say whose frame it is (the last login)
         self.current_user_id = None
         self.last_recognized_id: str | None = None
+        self._frame_seq = 0
+
+        # New faces are persisted in the background (None = write inline)
+        self.registration_writer = RegistrationWriter(storage) if write_behind and storage else None
 
         # self._load_from_storage() # Do not load at init, wait for user login
 
     def set_current_user(self, user_id: str):
+        """Makes `user_id` the default user and warms their context. Other users stay resident."""
         self.current_user_id = user_id
         print(f"FaceService: current user set to {user_id}")
-        self._load_from_storage()
-
-    def _load_from_storage(self) -> None:
-        """Loads all people from the repository into memory for CURRENT USER."""
-        if not self.current_user_id:
-             print("FaceService: No user logged in, clearing cache.")
-             self.known_face_encodings = []
-             self.known_face_ids = []
-             self.known_face_metadata = {}
-             return
-
-        people = self.storage.get_all(user_id=self.current_user_id)
-        print(f"Loading {len(people)} people from storage for user {self.current_user_id}...")
-        
-        # Reset cache
-        self.known_face_encodings = []
-        self.known_face_ids = []
-        self.known_face_metadata = {}
+        self.contexts.get(user_id)
+
+    def context(self, user_id: str | None = None) -> UserFaceContext:
+        """Recognition state of `user_id` (default: current_user_id), loaded if not resident."""
+        user_id = user_id or self.current_user_id
+        if not user_id:
+            return self._anonymous
+        return self.contexts.get(user_id)
+
+    def _new_context(self, user_id: str | None) -> UserFaceContext:
+        return UserFaceContext(
+            user_id,
+            create_face_index(self.index_backend),
+            RegistrationStaging(self.registration_min_frames, self.registration_window_s),
+        )
+
+    def _load_context(self, user_id: str) -> UserFaceContext:
+        self.flush_registrations() # the load below must see every queued contact
+        context = self._new_context(user_id)
+        self._load_from_storage(context)
+        return context
+
+    def _evict_context(self, context: UserFaceContext) -> None:
+        self.commit_pending_faces(context)
+        self.flush_registrations() # the contact snapshot must include every registered face
+        self._save_contact_snapshot(context)
+        self.save_snapshot(context)
+        print(f"FaceService: unloaded user {context.user_id}")
 
-        for person in people:
-            if person.encoding:
-                self.known_face_encodings.append(np.array(person.encoding))
-                self.known_face_ids.append(person.contact_id)
-                self.known_face_metadata[person.contact_id] = person
+    def flush_registrations(self) -> None:
+        """Waits until queued face registrations are in storage."""
+        if self.registration_writer:
+            self.registration_writer.flush()
+
+    def close(self) -> None:
+        """Unloads every user (staged faces registered, snapshots saved) and drains the registration queue."""
+        self.contexts.evict_all()
+        if self.registration_writer:
+            self.registration_writer.close()
+
+    def _snapshot_path(self, user_id: str) -> str:
+        return os.path.join(self.index_dir, user_id, f"face_index_{self.index_backend}.npz")
+
+    def save_snapshot(self, context: UserFaceContext | None = None) -> None:
+        """Persists a user's face index clustering (IVF) to disk; all resident users by default."""
+        for ctx in [context] if context else list(self.contexts):
+            if not ctx.user_id or not len(ctx.face_index):
+                continue
+            try:
+                ctx.face_index.save(self._snapshot_path(ctx.user_id))
+            except Exception as e:
+                print(f"WARNING: Failed to save face index snapshot: {e}")
+
+    def _save_contact_snapshot(self, context: UserFaceContext) -> None:
+        """
+        Rewrites the user's contact snapshot at the current contacts version, so
+        that reloading them after a registration maps it instead of fetching
+        every encoding again. Names etc. are re-read without encodings (they may
+        have been edited elsewhere); the encodings come from the resident index.
+        Skipped if storage has encoded contacts this context doesn't know.
+        """
+        if not context.user_id or self.storage is None:
+            return
+        try:
+            user_dir = os.path.join(self.index_dir, context.user_id)
+            version = self.storage.get_version(context.user_id)
+            if version is None or load_contact_snapshot(user_dir, version) is not None:
+                return # untracked, or nothing registered since the snapshot
+            resident = dict(zip(context.face_index.ids, context.face_index.encodings))
+            if self.storage.get_encoded_ids(context.user_id) != set(resident):
+                return # changed outside this service; the next load fetches from storage
+            encoded_people = [
+                person.model_copy(update={"encoding": resident[person.contact_id]})
+                for person in self.storage.get_all_metadata(context.user_id)
+                if person.contact_id in resident
+            ]
+            save_contact_snapshot(user_dir, version, encoded_people)
+        except Exception as e:
+            print(f"WARNING: Failed to save contact snapshot: {e}")
+
+    def _load_from_storage(self, context: UserFaceContext) -> None:
+        """
+        Loads all people of the context's user into memory: from the memory-mapped
+        contact snapshot if it is still at the user's contacts version, otherwise
+        from the repository (and the snapshot is rewritten).
+        """
+        user_dir = os.path.join(self.index_dir, context.user_id)
+        try:
+            # Snapshots used to be written next to the served face crops
+            old_dir = os.path.join(self.images_dir, context.user_id)
+            remove_contact_snapshot(old_dir)
+            for backend in FACE_INDEX_BACKENDS:
+                old_index = os.path.join(old_dir, f"face_index_{backend}.npz")
+                if os.path.exists(old_index):
+                    os.remove(old_index)
+        except OSError as e:
+            print(f"WARNING: Failed to remove old snapshots: {e}")
+        version = self.storage.get_version(context.user_id)
+        snapshot = None
+        if version is not None:
+            try:
+                snapshot = load_contact_snapshot(user_dir, version)
+            except Exception as e:
+                print(f"WARNING: Ignoring unreadable contact snapshot: {e}")
+
+        if snapshot is not None:
+            print(f"Mapped {len(snapshot.ids)} people from snapshot v{version} for user {context.user_id}")
+            known_ids = snapshot.ids
+            known_encodings = snapshot.encodings
+            context.known_face_metadata = snapshot.contacts
+        else:
+            people = self.storage.get_all(user_id=context.user_id)
+            print(f"Loading {len(people)} people from storage for user {context.user_id}...")
+
+            known_ids = []
+            known_encodings = []
+            encoded_people = []
+            for person in people:
+                if person.encoding is not None:
+                    known_ids.append(person.contact_id)
+                    known_encodings.append(person.encoding)
+                    context.known_face_metadata[person.contact_id] = person
+                    encoded_people.append(person)
+
+            if version is not None:
+                try:
+                    save_contact_snapshot(user_dir, version, encoded_people)
+                except Exception as e:
+                    print(f"WARNING: Failed to save contact snapshot: {e}")
+
+        # Reuse the on-disk clustering (skips IVF training) if it covers exactly these faces
+        if self._restore_snapshot(context, known_ids, known_encodings):
+            print(f"FaceService: restored face index snapshot for user {context.user_id}")
+        else:
+            context.face_index.build(known_ids, known_encodings)
+
+    def _restore_snapshot(self, context: UserFaceContext, known_ids: List[str], known_encodings) -> bool:
+        try:
+            return context.face_index.load(self._snapshot_path(context.user_id), known_ids, known_encodings)
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable face index snapshot: {e}")
+            return False
 
     def update_person_details(self, person_id: str, name: str, age: int):
         """Public API to update a person's details."""
+        self.flush_registrations() # the person may still be waiting in the write-behind queue
         updated_person = self.storage.update_person(person_id, {"name": name, "age": age})
         if updated_person:
-            # Update in-memory cache
-            self.known_face_metadata[person_id] = updated_person
+            # Update in-memory cache (of whichever resident user owns this person)
+            for context in self.contexts:
+                if person_id in context.known_face_metadata:
+                    context.known_face_metadata[person_id] = updated_person
             print(f"Updated person {person_id} -> {name}")
             return True
         return False
 
-    def _register_new_face(self, frame_rgb: np.ndarray, location: Tuple[int, int, int, int], encoding: np.ndarray):
+    def commit_pending_faces(self, context: UserFaceContext | None = None) -> None:
+        """Registers every staged unknown face now, regardless of its age; all resident users by default."""
+        for ctx in [context] if context else list(self.contexts):
+            for pending in ctx.staging.drain():
+                self._commit_pending_face(ctx, pending)
+
+    def _commit_pending_face(self, context: UserFaceContext, pending: PendingFace) -> Contact:
+        new_person = self._register_new_face(context, pending.crop_rgb, pending.mean_encoding)
+        # Every merged sighting beyond the first would have been its own contact
+        metrics.incr("face.registrations_avoided", pending.count - 1)
+        return new_person
+
+    @staticmethod
+    def _face_crop(frame_rgb: np.ndarray, location: Tuple[int, int, int, int]) -> np.ndarray:
+        """Face box plus a 20px margin, copied out of the frame."""
+        top, right, bottom, left = location
+        h, w, _ = frame_rgb.shape
+        top = max(0, top - 20); bottom = min(h, bottom + 20)
+        left = max(0, left - 20); right = min(w, right + 20)
+        return frame_rgb[top:bottom, left:right].copy()
+
+    def _register_new_face(self, context: UserFaceContext, face_image: np.ndarray, encoding: np.ndarray):
         """Creates a new Person entry for an unknown face.
            Now ensures DB consistency and User isolation.
         """
-        
-        if not self.current_user_id:
-            print("WARNING: No current_user_id set. Skipping face registration.")
+        user_id = context.user_id
+        if not user_id:
+            print("WARNING: No user set. Skipping face registration.")
             # Return a temporary person object so the UI considers it handled (but not saved)
             # Using Dummy Contact
             return Contact(contact_id="unsaved", owner_user_id="none", first_name="Unsaved", last_name="(Login Required)")
             
         try:
             # 1. Create Contact in DB FIRST (Ground Truth)
-            print(f"Attempting to create contact for user_id: {self.current_user_id}")
+            print(f"Attempting to create contact for user_id: {user_id}")
             # Note: create_contact is just a factory, it doesn't save yet in db but it validates user
             # We want to use storage.add_person eventually, or manual repo usage.
             # But the service logic requires specific steps.
@@ -86,40 +288,31 @@ class FaceService:
             new_id = str(uuid.uuid4())
             
             # 2. Save Image Crop (Path: data/faces/{user_id}/{contact_id}.jpg)
-            top, right, bottom, left = location
-            h, w, _ = frame_rgb.shape
-            top = max(0, top - 20); bottom = min(h, bottom + 20)
-            left = max(0, left - 20); right = min(w, right + 20)
-            
-            face_image = frame_rgb[top:bottom, left:right]
             face_image_bgr = cv2.cvtColor(face_image, cv2.COLOR_RGB2BGR)
             
-            user_faces_dir = os.path.join(self.images_dir, self.current_user_id)
-            if not os.path.exists(user_faces_dir):
-                os.makedirs(user_faces_dir)
-            
-            relative_image_path = os.path.join(self.current_user_id, f"{new_id}.jpg")
+            relative_image_path = os.path.join(user_id, f"{new_id}.jpg")
             full_image_path = os.path.join(self.images_dir, relative_image_path)
-            
-            cv2.imwrite(full_image_path, face_image_bgr)
 
             # 3. Create Contact Object (Unified)
             new_person = Contact(
                 contact_id=new_id,
-                owner_user_id=self.current_user_id,
+                owner_user_id=user_id,
                 first_name="Unknown",
                 last_name="Person",
                 image_path=relative_image_path, # Store relative path or absolute? Storage was just "path"
-                encoding=encoding.tolist()
+                encoding=encoding
             )
 
-            # 4. Save to Storage (DB)
-            self.storage.add_person(new_person)
+            # 4. Save crop + contact (in the background unless write-behind is off)
+            registration = PendingRegistration(new_person, full_image_path, face_image_bgr)
+            if self.registration_writer:
+                self.registration_writer.submit(registration)
+            else:
+                write_registrations(self.storage, [registration])
 
             # 5. Update Memory (so we recognize them in the next frame)
-            self.known_face_encodings.append(encoding)
-            self.known_face_ids.append(new_id)
-            self.known_face_metadata[new_id] = new_person
+            context.face_index.add(new_id, encoding)
+            context.known_face_metadata[new_id] = new_person
             
             print(f"Registered new face: {new_id}")
             return new_person
@@ -129,17 +322,161 @@ class FaceService:
             print(f"ERROR: Failed to register face: {e}")
             return Contact(contact_id="error", owner_user_id="none", first_name="Registration", last_name="Failed")
 
-    def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, str | None]:
+    def process_frame(
+        self, frame: np.ndarray, stream_id: str = "default", user_id: str | None = None
+    ) -> Tuple[np.ndarray, str | None]:
         """
         Processes a video frame, detects faces, draws bounding boxes/labels,
         and returns the annotated frame plus a SINGLE detected person ID (strongest match).
+        Faces are matched against `user_id`'s contacts (default: current_user_id).
         """
         # Resize to 1/4 for performance
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = np.ascontiguousarray(small_frame[:, :, ::-1])
+        rgb_small_frame = prepare_frame(frame)
+        face_locations = locate_faces(rgb_small_frame)
+        tracks = self.track_faces(face_locations, stream_id, user_id)
+        face_encodings = encode_faces(rgb_small_frame, [t.box for t in tracks if t.needs_encoding])
+        return self.identify_faces(frame, rgb_small_frame, face_locations, face_encodings, tracks, user_id)
+
+    def process_frames(
+        self,
+        frames: List[np.ndarray],
+        stream_ids: List[str] | None = None,
+        user_ids: List[str | None] | None = None,
+    ) -> List[Tuple[np.ndarray, str | None]]:
+        """
+        Batched process_frame over a micro-batch of frames (possibly from several
+        streams). Detection still runs per frame, but every face that needs an
+        encoding goes through the encoder in one batch. Identification then runs
+        frame by frame in order, so a face registered from one frame is already
+        known to the next. A frame's tracking depends on what the previous frame
+        of its stream was identified as, so the batch is run in rounds with at
+        most one frame per stream (see stream_rounds); with that, results match
+        calling process_frame on each frame.
+        """
+        stream_ids = stream_ids or ["default"] * len(frames)
+        user_ids = user_ids or [None] * len(frames)
+        rgb_small_frames = [prepare_frame(frame) for frame in frames]
+        locations_per_frame = [locate_faces(rgb) for rgb in rgb_small_frames]
+
+        results: List[Tuple[List[FaceAnnotation], str | None]] = []
+        for start, end in stream_rounds(stream_ids):
+            tracks_per_frame = self.track_faces_batch(
+                locations_per_frame[start:end], stream_ids[start:end], user_ids[start:end]
+            )
+            encodings_per_frame = encode_faces_batch(
+                rgb_small_frames[start:end],
+                [[t.box for t in tracks if t.needs_encoding] for tracks in tracks_per_frame],
+            )
+            results += self.recognize_frames(
+                rgb_small_frames[start:end],
+                locations_per_frame[start:end],
+                encodings_per_frame,
+                tracks_per_frame,
+                user_ids[start:end],
+            )
+        return [
+            (draw_face_annotations(frame, annotations), detected_id)
+            for frame, (annotations, detected_id) in zip(frames, results)
+        ]
+
+    def recognize_frames(
+        self, rgb_small_frames, locations_per_frame, encodings_per_frame, tracks_per_frame, user_ids=None
+    ) -> List[Tuple[List[FaceAnnotation], str | None]]:
+        """recognize_faces for each frame of a micro-batch, in order."""
+        user_ids = user_ids or [None] * len(rgb_small_frames)
+        return [
+            self.recognize_faces(*args)
+            for args in zip(rgb_small_frames, locations_per_frame, encodings_per_frame, tracks_per_frame, user_ids)
+        ]
+
+    def track_faces_batch(
+        self,
+        locations_per_frame: List[List[FaceLocation]],
+        stream_ids: List[str],
+        user_ids: List[str | None] | None = None,
+    ) -> List[List[Track]]:
+        user_ids = user_ids or [None] * len(locations_per_frame)
+        return [
+            self.track_faces(locations, stream_id, user_id)
+            for locations, stream_id, user_id in zip(locations_per_frame, stream_ids, user_ids)
+        ]
+
+    def track_faces(
+        self, face_locations: List[FaceLocation], stream_id: str = "default", user_id: str | None = None
+    ) -> List[Track]:
+        """
+        Carries identities across frames of one stream. Returns a Track per face;
+        only those with `needs_encoding` have to go through the encoder.
+        """
+        trackers = self.context(user_id).trackers
+        tracker = trackers.get(stream_id)
+        if tracker is None:
+            tracker = FaceTracker(reverify_interval=self.reverify_interval, track_timeout_s=self.track_timeout_s)
+            trackers[stream_id] = tracker
+        tracks = tracker.update(face_locations)
 
-        face_locations = face_recognition.face_locations(rgb_small_frame)
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+        encodes = sum(1 for t in tracks if t.needs_encoding)
+        metrics.incr("face.encodes", encodes)
+        metrics.incr("face.encodes_saved", len(tracks) - encodes)
+        return tracks
+
+    def drop_stream(self, stream_id: str) -> None:
+        for context in [self._anonymous, *self.contexts]:
+            context.trackers.pop(stream_id, None)
+
+    def identify_faces(
+        self,
+        frame: np.ndarray,
+        rgb_small_frame: np.ndarray,
+        face_locations: List[FaceLocation],
+        face_encodings: List[np.ndarray],
+        tracks: List[Track] | None = None,
+        user_id: str | None = None,
+    ) -> Tuple[np.ndarray, str | None]:
+        """recognize_faces, then draws the result onto `frame`."""
+        annotations, strongest_person_id = self.recognize_faces(
+            rgb_small_frame, face_locations, face_encodings, tracks, user_id
+        )
+        return draw_face_annotations(frame, annotations), strongest_person_id
+
+    def recognize_faces(
+        self,
+        rgb_small_frame: np.ndarray,
+        face_locations: List[FaceLocation],
+        face_encodings: List[np.ndarray],
+        tracks: List[Track] | None = None,
+        user_id: str | None = None,
+    ) -> Tuple[List[FaceAnnotation], str | None]:
+        """
+        Matching + registration half of process_frame, for faces that were already
+        detected/encoded on `rgb_small_frame` (possibly in a worker process). Returns
+        what to draw (empty when there are no faces) and the strongest match id.
+        With `tracks`, `face_encodings` only covers the tracks that needed encoding;
+        the others reuse their track's identity. Mutates service state, so calls
+        must be serialized.
+        """
+        context = self.context(user_id)
+        face_index = context.face_index
+        known_face_metadata = context.known_face_metadata
+
+        # Line encodings up with locations (None = identity carried by the track)
+        if tracks is None:
+            aligned_encodings = list(face_encodings)
+        else:
+            fresh = iter(face_encodings)
+            aligned_encodings = [next(fresh) if t.needs_encoding else None for t in tracks]
+        encoded_idx = [i for i, e in enumerate(aligned_encodings) if e is not None]
+
+        # Staged faces that stopped showing up get registered now, before matching
+        self._frame_seq += 1
+        for pending in context.staging.expired():
+            self._commit_pending_face(context, pending)
+
+        # Match every freshly encoded face in the frame against every known face in one pass
+        match_ids, match_distances = face_index.search(
+            np.asarray([aligned_encodings[i] for i in encoded_idx]), k=1
+        )
+        match_row = {face_idx: row for row, face_idx in enumerate(encoded_idx)}
 
         face_display_data = []
         
@@ -147,26 +484,34 @@ class FaceService:
         strongest_person_id = None
         lowest_distance_found = 1.0 
 
-        for location, encoding in zip(face_locations, face_encodings):
+        for face_idx, (location, encoding) in enumerate(zip(face_locations, aligned_encodings)):
             name = "Unknown"
             access_label = "Detecting..."
             color = (255, 165, 0) # Orange for uncertain
             current_id = None
             is_strong_match = False
-            
-            # 1. Calculate distances to ALL known faces (including previously auto-saved ones)
-            if self.known_face_encodings:
-                face_distances = face_recognition.face_distance(self.known_face_encodings, encoding)
-                best_match_index = np.argmin(face_distances)
-                min_distance = face_distances[best_match_index]
+            track = tracks[face_idx] if tracks is not None else None
+
+            # 1. Nearest known face (including previously auto-saved ones)
+            if encoding is None:
+                # Tracked face with a confident identity -> skip the encoder and matching
+                best_match_id = track.contact_id
+                min_distance = track.distance if best_match_id in known_face_metadata else 1.0
+            elif match_ids.shape[1]:
+                best_match_id = match_ids[match_row[face_idx], 0]
+                min_distance = float(match_distances[match_row[face_idx], 0])
             else:
+                best_match_id = None
                 min_distance = 1.0 # No database yet
 
             # --- SMART LOGIC ---
-            if min_distance < 0.55:
+            if encoding is None and min_distance >= STRONG_MATCH_THRESHOLD:
+                pass # identity no longer known (e.g. cache reloaded) -> re-encoded next frame
+
+            elif min_distance < STRONG_MATCH_THRESHOLD:
                 # STRONG MATCH -> Identify Person
-                person_id = self.known_face_ids[best_match_index]
-                person_obj = self.known_face_metadata[person_id]
+                person_id = best_match_id
+                person_obj = known_face_metadata[person_id]
                 
                 name = person_obj.name
                 access_label = f"Age: {person_obj.age}" if person_obj.age else "Verified"
@@ -175,11 +520,11 @@ class FaceService:
                 current_id = person_id
                 is_strong_match = True
 
-            elif min_distance < 0.75:
+            elif min_distance < WEAK_MATCH_THRESHOLD:
                 # WEAK MATCH / AMBIGUOUS -> Do NOT save distinct entry
-                if self.known_face_ids:
-                    person_id = self.known_face_ids[best_match_index]
-                    possible_name = self.known_face_metadata[person_id].name
+                if best_match_id is not None:
+                    person_id = best_match_id
+                    possible_name = known_face_metadata[person_id].name
                     name = f"Possible {possible_name}?"
                     access_label = f"Uncertain ({min_distance:.2f})"
                 else:
@@ -187,13 +532,26 @@ class FaceService:
                 color = (0, 255, 255) # Yellow
 
             else:
-                # NO MATCH -> Truly New Face -> Register
-                new_person = self._register_new_face(rgb_small_frame, location, encoding)
-                name = new_person.name 
-                access_label = "New Entry Saved"
-                color = (0, 0, 255) # Red
-                
-                current_id = new_person.contact_id
+                # NO MATCH -> Truly New Face -> Stage, register once the encoding settles
+                pending = context.staging.observe(encoding, self._face_crop(rgb_small_frame, location), self._frame_seq)
+                if pending is None:
+                    name = "New face"
+                    access_label = "Registering..."
+                else:
+                    new_person = self._commit_pending_face(context, pending)
+                    name = new_person.name 
+                    access_label = "New Entry Saved"
+                    color = (0, 0, 255) # Red
+                    
+                    current_id = new_person.contact_id
+                    min_distance = 0.0
+
+            if track is not None and encoding is not None:
+                # Only confident identities are carried forward without re-encoding
+                confident_id = current_id if current_id in known_face_metadata else None
+                FaceTracker.record_match(track, confident_id, min_distance)
+            elif track is not None and current_id is None:
+                FaceTracker.record_match(track, None, 1.0)
 
             # Update Best Match Logic
             if current_id:
@@ -209,12 +567,4 @@ class FaceService:
 
             face_display_data.append((location, name, access_label, color))
 
-        # Draw annotations
-        for (top, right, bottom, left), name, label, color in face_display_data:
-            top *= 4; right *= 4; bottom *= 4; left *= 4
-            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-            cv2.rectangle(frame, (left, bottom - 35), (right, bottom), color, cv2.FILLED)
-            cv2.putText(frame, name, (left + 6, bottom - 15), cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
-            cv2.putText(frame, label, (left + 6, bottom - 2), cv2.FONT_HERSHEY_DUPLEX, 0.4, (200, 200, 200), 1)
-
-        return frame, strongest_person_id
\ No newline at end of file
+        return face_display_data, strongest_person_id
\ No newline at end of file
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import List
+
+import cv2
+import numpy as np
+
+from .storage import PersonRepository, Contact
+from utils.metrics import metrics
+
+
+@dataclass
+class PendingRegistration:
+    """A new contact plus the face crop (BGR) still to be written to image_path."""
+    contact: Contact
+    image_path: str
+    image_bgr: np.ndarray
+
+
+class RegistrationWriter:
+    """
+    Write-behind persistence for auto-registered faces.
+
+    FaceService adds a new face to its in-memory index straight away and hands the
+    contact + crop to submit(); a background thread writes the crops and inserts
+    the contacts with one add_people (insert_many) call per batch of up to
+    `batch_size`, collected for at most `flush_interval_s`. A failed batch is
+    retried `max_retries` times with backoff before it is dropped and counted.
+
+    The queue holds at most `max_queue` registrations. When it is full, submit()
+    writes the registration on the caller's thread instead, so nothing is lost.
+    flush() waits until everything queued so far is written; close() flushes and
+    stops the thread.
+    """
+
+    def __init__(
+        self,
+        storage: PersonRepository,
+        max_queue: int = 256,
+        batch_size: int = 32,
+        flush_interval_s: float = 0.25,
+        max_retries: int = 3,
+        retry_backoff_s: float = 0.5,
+    ):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self._queue: "queue.Queue[PendingRegistration | None]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="face-registration-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, registration: PendingRegistration) -> None:
+        if self._closed:
+            write_registrations(self.storage, [registration])
+            return
+        try:
+            self._queue.put_nowait(registration)
+            metrics.incr("face.registrations_queued")
+        except queue.Full:
+            metrics.incr("face.registrations_queue_full")
+            write_registrations(self.storage, [registration])
+        metrics.set_gauge("face.registration_queue_depth", self._queue.qsize())
+
+    def flush(self) -> None:
+        """Blocks until every registration submitted so far has been written (or given up on)."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch: List[PendingRegistration] = [] if first is None else [first]
+            stop = first is None
+            deadline = time.monotonic() + self.flush_interval_s
+
+            # Collect a batch: whatever arrives within flush_interval_s, up to batch_size
+            while not stop and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            try:
+                if batch:
+                    self._write_with_retry(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+                metrics.set_gauge("face.registration_queue_depth", self._queue.qsize())
+
+            if stop:
+                return
+
+    def _write_with_retry(self, batch: List[PendingRegistration]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                write_registrations(self.storage, batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    traceback.print_exc()
+                    print(f"ERROR: Giving up on {len(batch)} face registrations: {e}")
+                    metrics.incr("face.registrations_failed", len(batch))
+                    return
+                metrics.incr("face.registration_retries")
+                print(f"WARNING: Face registration write failed (attempt {attempt + 1}), retrying: {e}")
+                time.sleep(self.retry_backoff_s * (2 ** attempt))
+
+
+def write_registrations(storage: PersonRepository, batch: List[PendingRegistration]) -> None:
+    """Writes the crops, then inserts the contacts in one call."""
+    # 1. Crops first, so a stored contact never points at a missing image
+    for directory in {os.path.dirname(r.image_path) for r in batch}:
+        os.makedirs(directory, exist_ok=True)
+    for registration in batch:
+        if not cv2.imwrite(registration.image_path, registration.image_bgr):
+            raise IOError(f"Could not write {registration.image_path}")
+
+    # 2. One insert for the whole batch
+    storage.add_people([r.contact for r in batch])
+    metrics.incr("face.registrations_written", len(batch))
@@ -1,10 +1,10 @@
 import json
 import os
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from pydantic import BaseModel
 from database.models import Contact
-from repos import contact_repo
+from repos import contact_repo, user_repo
 
 # --- Interface ---
 class PersonRepository(ABC):
@@ -18,6 +18,11 @@ class PersonRepository(ABC):
         """Add a new person to storage."""
         pass
 
+    def add_people(self, people: List[Contact]) -> None:
+        """Add several people at once. Backends with a bulk insert should override this."""
+        for person in people:
+            self.add_person(person)
+
     @abstractmethod
     def update_person(self, person_id: str, updates: Dict) -> Optional[Contact]:
         """Update fields of an existing person."""
@@ -27,6 +32,18 @@ class PersonRepository(ABC):
     def get_person(self, person_id: str) -> Optional[Contact]:
         pass
 
+    def get_version(self, user_id: str) -> Optional[int]:
+        """Changes whenever the user's people change; None = not tracked (no on-disk snapshot)."""
+        return None
+
+    def get_all_metadata(self, user_id: str) -> List[Contact]:
+        """get_all without the face encodings. Backends that can skip them should override this."""
+        return self.get_all(user_id=user_id)
+
+    def get_encoded_ids(self, user_id: str) -> Set[str]:
+        """Ids of the user's people that have a face encoding."""
+        return {p.contact_id for p in self.get_all(user_id=user_id) if p.encoding is not None}
+
 # --- MongoDB Implementation (Unified) ---
 class DatabasePersonRepository(PersonRepository):
     def get_all(self, user_id: str = None) -> List[Contact]:
@@ -38,6 +55,9 @@ class DatabasePersonRepository(PersonRepository):
         # Assumes owner_user_id is set
         contact_repo.save_contact_to_database(person)
 
+    def add_people(self, people: List[Contact]) -> None:
+        contact_repo.save_contacts_to_database(people)
+
     def update_person(self, person_id: str, updates: Dict) -> Optional[Contact]:
         contact = contact_repo.get_contact_by_id(person_id)
         if not contact:
@@ -62,6 +82,15 @@ class DatabasePersonRepository(PersonRepository):
     def get_person(self, person_id: str) -> Optional[Contact]:
         return contact_repo.get_contact_by_id(person_id)
 
+    def get_version(self, user_id: str) -> Optional[int]:
+        return user_repo.get_contacts_version(user_id)
+
+    def get_all_metadata(self, user_id: str) -> List[Contact]:
+        return contact_repo.get_all_contacts_for_user(user_id, include_encoding=False)
+
+    def get_encoded_ids(self, user_id: str) -> Set[str]:
+        return contact_repo.get_encoded_contact_ids(user_id)
+
 
 # --- Legacy JSON Implementation (Deprecated / Fallback) ---
 class Person(BaseModel):
@@ -127,7 +156,7 @@ class JsonPersonRepository(PersonRepository):
             "name": person.name,
             "age": person.age,
             "image_path": person.image_path,
-            "encoding": person.encoding,
+            "encoding": person.encoding.tolist() if person.encoding is not None else None,
         }
         data.append(p_dict)
         self._save_data(data)
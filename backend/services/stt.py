@@ -0,0 +1,89 @@
+import io
+import wave
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from backend.services.audio_transcription_service import Token, elevenlabs, eleven_word_to_token
+
+
+# --- Interface ---
+class SpeechToText(ABC):
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> list[Token]:
+        """
+        Tokens for one window of mono float32 audio in [-1, 1]. Times are
+        relative to the start of the window; speaker_ids only have to be
+        consistent within the window.
+        """
+        pass
+
+
+class ElevenLabsSTT(SpeechToText):
+    """ElevenLabs scribe with diarization, sent the window as an in-memory WAV."""
+
+    def __init__(self, model_id: str = "scribe_v2", language_code: str | None = "eng"):
+        self.model_id = model_id
+        self.language_code = language_code
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> list[Token]:
+        transcription = elevenlabs.speech_to_text.convert(
+            file=("window.wav", to_wav_bytes(samples, sample_rate)),
+            model_id=self.model_id,
+            tag_audio_events=True,
+            language_code=self.language_code,
+            diarize=True,
+        )
+        return [eleven_word_to_token(w) for w in transcription.words] # type: ignore
+
+
+class StubSTT(SpeechToText):
+    """
+    Offline stand-in for tests and local runs: every voiced stretch (RMS above
+    `threshold` over 30 ms frames) becomes one word "[speech]" of speaker_0.
+    """
+
+    def __init__(self, threshold: float = 0.02, frame_s: float = 0.03):
+        self.threshold = threshold
+        self.frame_s = frame_s
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> list[Token]:
+        frame = max(1, int(self.frame_s * sample_rate))
+        n = len(samples) // frame
+        if n == 0:
+            return []
+        rms = np.sqrt((samples[: n * frame].reshape(n, frame) ** 2).mean(axis=1))
+        voiced = np.concatenate([[False], rms > self.threshold, [False]])
+        edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+
+        return [
+            Token(text="[speech] ", start=start * self.frame_s, end=end * self.frame_s, type="word", speaker_id="speaker_0")
+            for start, end in zip(edges[::2], edges[1::2])
+        ]
+
+
+STT_BACKENDS = {
+    "elevenlabs": ElevenLabsSTT,
+    "stub": StubSTT,
+}
+
+
+def create_stt(backend: str = "elevenlabs", **kwargs) -> SpeechToText:
+    """Builds the speech-to-text engine for the configured backend name."""
+    try:
+        stt_cls = STT_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown speech-to-text backend: {backend!r} (expected one of {list(STT_BACKENDS)})")
+    return stt_cls(**kwargs)
+
+
+def to_wav_bytes(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Mono float32 [-1, 1] -> 16-bit PCM WAV file contents."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
@@ -1,10 +1,29 @@
 from langchain_openai import OpenAIEmbeddings
 from backend.config import config
+from services.embedding_cache import EmbeddingCache
 
 embeddings = OpenAIEmbeddings(
    model=config.embedding_model 
 )
 
+# Search queries repeat (typeahead, popular searches); note contents don't, so only queries are cached
+query_cache = EmbeddingCache(
+    model=config.embedding_model,
+    dim=config.embed_dim,
+    max_entries=config.embedding_cache_size,
+    path=config.embedding_cache_path or None,
+)
+
 def get_vector_embedding(query: str) -> list[float]:
     vector = embeddings.embed_query(query)
-    return vector
\ No newline at end of file
+    return vector
+
+def get_vector_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embeds many documents in one request (the client splits very large batches itself)."""
+    if not texts:
+        return []
+    return embeddings.embed_documents(texts)
+
+def get_query_embedding(query: str) -> list[float]:
+    """Embedding of a search query, served from query_cache when seen before."""
+    return query_cache.get_or_compute(query, get_vector_embedding)
@@ -0,0 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+# --- PATH CONFIGURATION ---
+backend_dir = Path(__file__).resolve().parent.parent
+project_root = backend_dir.parent
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+# ---------------------------
+
+# config.py and the API clients read these at import; tests never reach the real services
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("ASSEMBLY_AI_API_KEY", "test")
+os.environ.setdefault("EMBED_DIM", "8")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("ELEVENLABS_API_KEY", "test")
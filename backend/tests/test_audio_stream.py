@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from backend.services.information_extractor_service import NotableFact
+from database.models import ContactNote, User
+from services import audio_stream
+from services.audio_stream import AudioWindow, AudioWindower, StreamingNoteTaker, decode_audio_chunk
+from services.stt import StubSTT, to_wav_bytes
+
+SR = 1000
+
+
+def noise(seconds: float, level: float = 0.5) -> np.ndarray:
+    return np.random.default_rng(0).uniform(-level, level, int(seconds * SR)).astype(np.float32)
+
+
+def test_window_is_cut_at_quietest_frame():
+    samples = noise(3.0)
+    samples[1700:1720] = 0.0  # the only quiet 20 ms, inside the last 0.5 s of the first window
+    windower = AudioWindower(SR, window_s=2.0, cut_search_s=0.5)
+
+    windows = windower.push(samples)
+
+    assert len(windows) == 1
+    assert windows[0].start_s == 0.0
+    assert 1700 <= len(windows[0].samples) <= 1720
+
+
+def test_cut_stays_within_search_region():
+    windower = AudioWindower(SR, window_s=2.0, cut_search_s=0.5)
+
+    windows = windower.push(noise(2.0))
+
+    assert len(windows) == 1
+    assert 1500 <= len(windows[0].samples) <= 2000
+
+
+def test_chunked_push_matches_single_push():
+    samples = noise(7.3)
+    whole = AudioWindower(SR, window_s=2.0).push(samples)
+
+    chunked_windower = AudioWindower(SR, window_s=2.0)
+    chunked = []
+    for i in range(0, len(samples), 137):
+        chunked += chunked_windower.push(samples[i:i + 137])
+
+    assert [w.start_s for w in chunked] == [w.start_s for w in whole]
+    assert all(np.array_equal(a.samples, b.samples) for a, b in zip(chunked, whole))
+
+
+def test_flush_returns_remainder_once():
+    samples = noise(5.0)
+    windower = AudioWindower(SR, window_s=2.0)
+
+    windows = windower.push(samples)
+    tail = windower.flush()
+
+    assert tail is not None
+    assert tail.start_s == pytest.approx(sum(len(w.samples) for w in windows) / SR)
+    assert np.array_equal(np.concatenate([w.samples for w in windows] + [tail.samples]), samples)
+    assert windower.flush() is None
+
+
+@pytest.mark.parametrize("sample_rate, window_s", [(0, 15.0), (-1, 15.0), (16000, 0.0)])
+def test_windower_rejects_empty_windows(sample_rate, window_s):
+    with pytest.raises(ValueError):
+        AudioWindower(sample_rate, window_s=window_s)
+
+
+def test_decode_audio_chunk_raw_pcm_and_wav():
+    pcm = (np.array([0.0, 0.5, -0.5]) * 32767).astype("<i2").tobytes()
+    assert decode_audio_chunk(pcm + b"\x00", 16000) == pytest.approx([0.0, 0.5, -0.5], abs=1e-4)
+
+    samples = noise(1.0)
+    decoded = decode_audio_chunk(to_wav_bytes(samples, 8000), 16000)
+    assert len(decoded) == 2 * len(samples)
+
+
+def test_stub_stt_marks_voiced_stretches():
+    samples = np.concatenate([np.zeros(300), noise(0.6), np.zeros(600), noise(0.3)]).astype(np.float32)
+
+    tokens = StubSTT().transcribe(samples, SR)
+
+    assert [(round(t.start, 2), round(t.end, 2)) for t in tokens] == [(0.3, 0.9), (1.5, 1.8)]
+    assert {t.speaker_id for t in tokens} == {"speaker_0"}
+
+
+def test_streaming_note_taker_with_stub_stt(monkeypatch):
+    user = User(user_id="u1", username="bob", email="bob@example.com", password_hash="x")
+    saved: list[tuple[str, str, list]] = []
+
+    def attribute(samples, sample_rate, utterances, reference_sample_path):
+        return audio_stream.relabel_utterances_with_user(utterances, "speaker_0")
+
+    async def create_notes_bulk(user_id, contact_id, notes):
+        saved.append((user_id, contact_id, notes))
+        return [
+            ContactNote(
+                note_id=f"n{i}", user_id=user_id, contact_id=contact_id,
+                label=label, content=content, last_modified=datetime.now(timezone.utc),
+            )
+            for i, (label, content) in enumerate(notes)
+        ]
+
+    monkeypatch.setattr(audio_stream, "attribute_speakers", attribute)
+    monkeypatch.setattr(
+        audio_stream, "extract_notable_facts",
+        lambda conversation, user: [NotableFact(label="turns", content=str(len(conversation)))],
+    )
+    monkeypatch.setattr(audio_stream.async_contact_note_repo, "create_contact_notes_bulk", create_notes_bulk)
+
+    events: list[dict] = []
+
+    async def emit(event):
+        events.append(event)
+
+    # 2 s of speech, 2 s of silence, repeated; cut into 4 s windows
+    samples = np.tile(np.concatenate([noise(2.0, 0.3), np.zeros(2 * SR, np.float32)]), 3)
+    windower = AudioWindower(SR, window_s=4.0)
+    note_taker = StreamingNoteTaker(StubSTT(), user, "c1", SR, "unused.wav", emit)
+
+    async def run():
+        queue: asyncio.Queue = asyncio.Queue()
+        for window in windower.push(samples) + [windower.flush()]:
+            if window is not None:
+                queue.put_nowait(window)
+        queue.put_nowait(None)
+        await note_taker.run(queue)
+
+    asyncio.run(run())
+
+    utterances = [e for e in events if e["type"] == "utterance"]
+    assert [(u["speaker"], round(u["start"]), round(u["end"])) for u in utterances] == [
+        ("user", 0, 2), ("user", 4, 6), ("user", 8, 10)
+    ]
+    assert note_taker.notes_created == len(saved) == 3
+    assert all(user_id == "u1" and contact_id == "c1" for user_id, contact_id, _ in saved)
+    assert [e["type"] for e in events].count("notes") == 3
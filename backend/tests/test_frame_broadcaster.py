@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from services.frame_broadcaster import FrameBroadcaster
+
+
+def test_each_subscriber_is_paced_to_its_own_fps():
+    async def run():
+        broadcaster = FrameBroadcaster()
+        fast = broadcaster.subscribe(max_fps=50)
+        slow = broadcaster.subscribe(max_fps=5)
+        received = {"fast": [], "slow": []}
+
+        async def consume(name, subscription):
+            while (frame := await subscription.next_frame()) is not None:
+                received[name].append(frame)
+
+        consumers = [asyncio.create_task(consume("fast", fast)), asyncio.create_task(consume("slow", slow))]
+        start = time.monotonic()
+        i = 0
+        while time.monotonic() - start < 1.0:
+            broadcaster.publish(b"frame%d" % i)
+            i += 1
+            await asyncio.sleep(0.01)
+        fast.close()
+        slow.close()
+        await asyncio.gather(*consumers)
+        return i, received
+
+    published, received = asyncio.run(run())
+
+    # 100 frames/s published for 1 s: the 5 fps client gets ~5, the 50 fps one ~50
+    assert published > 60
+    assert 3 <= len(received["slow"]) <= 7
+    assert 30 <= len(received["fast"]) <= 55
+    # Paced clients skip to the newest frame rather than falling behind
+    assert received["slow"][-1] != received["slow"][0]
+
+
+def test_frames_are_not_repeated():
+    async def run():
+        broadcaster = FrameBroadcaster()
+        subscription = broadcaster.subscribe(max_fps=0)
+        broadcaster.publish(b"a")
+        first = await subscription.next_frame()
+        waiting = asyncio.create_task(subscription.next_frame())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        broadcaster.publish(b"b")
+        second = await waiting
+        subscription.close()
+        return first, second, await subscription.next_frame()
+
+    assert asyncio.run(run()) == (b"a", b"b", None)
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Tuple
+
+RATE_WINDOW_S = 60
+
+
+class Metrics:
+    """
+    Process-wide counters and gauges, served by GET /metrics.
+    Counters also report a per-second rate over the last RATE_WINDOW_S seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._counters: Dict[str, float] = defaultdict(int)
+        self._buckets: Dict[str, Deque[Tuple[int, float]]] = defaultdict(deque)
+        self._gauges: Dict[str, Any] = {}
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        now = int(time.monotonic())
+        with self._lock:
+            self._counters[name] += amount
+            buckets = self._buckets[name]
+            if buckets and buckets[-1][0] == now:
+                buckets[-1] = (now, buckets[-1][1] + amount)
+            else:
+                buckets.append((now, amount))
+            while buckets[0][0] <= now - RATE_WINDOW_S:
+                buckets.popleft()
+
+    def set_gauge(self, name: str, value: Any) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def rate(self, name: str) -> float:
+        now = int(time.monotonic())
+        window = min(RATE_WINDOW_S, max(1.0, time.monotonic() - self._started))
+        with self._lock:
+            recent = sum(count for second, count in self._buckets.get(name, ()) if second > now - RATE_WINDOW_S)
+        return recent / window
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "uptime_s": round(time.monotonic() - self._started, 1),
+            "counters": counters,
+            "rates_per_s": {name: round(self.rate(name), 3) for name in counters},
+            "gauges": gauges,
+        }
+
+
+metrics = Metrics()
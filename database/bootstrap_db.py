@@ -2,7 +2,7 @@ import os
 import time
 import sys
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.operations import SearchIndexModel
 
 # Add backend to path to import config if not installed as package
@@ -29,6 +29,18 @@ users.create_index([("email", ASCENDING)], unique=True)
 contacts = db["contacts"]
 contacts.create_index([("contact_id", ASCENDING)], unique=True)
 contacts.create_index([("owner_user_id", ASCENDING)])
+# Back the /people sorts; contact_id is the keyset pagination tie-breaker
+contacts.create_index(
+    [("owner_user_id", ASCENDING), ("last_modified", DESCENDING), ("contact_id", DESCENDING)],
+    name="by_owner_last_modified",
+)
+contacts.create_index(
+    [("owner_user_id", ASCENDING), ("first_name", ASCENDING), ("last_name", ASCENDING), ("contact_id", ASCENDING)],
+    name="by_owner_name",
+    collation={"locale": "en", "strength": 2},
+)
+# Typeahead name search: anchored prefix regexes on lowercase name tokens (multikey)
+contacts.create_index([("owner_user_id", ASCENDING), ("name_tokens", ASCENDING)], name="by_owner_name_tokens")
 
 # Create Contact Note collection
 contact_notes = db["contact_notes"]
@@ -1,6 +1,7 @@
 from typing import Any
 from pydantic import BaseModel
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.database import Database
 from pymongo.synchronous.collection import Collection
 
@@ -41,4 +42,45 @@ def close_db() -> None:
         _client.close()
     _client = None
     _db = None
-    _db_collections = None
\ No newline at end of file
+    _db_collections = None
+
+
+# --- Async client (FastAPI handlers) ---
+class AsyncDbCollections(BaseModel):
+    class Config:
+        arbitrary_types_allowed = True
+
+    users: AsyncCollection[Any]
+    contact_notes: AsyncCollection[Any]
+    contacts: AsyncCollection[Any]
+
+_async_client: AsyncMongoClient | None = None
+_async_db_collections: AsyncDbCollections | None = None
+
+def init_async_db(mongo_uri: str, db_name: str, **client_options) -> None:
+    """
+    Creates the async client shared by all request handlers. Call it from the
+    app's startup hook so the client is bound to the server's event loop.
+    `client_options` go to AsyncMongoClient (maxPoolSize, timeoutMS, ...).
+    """
+    global _async_client, _async_db_collections
+    if _async_client is None:
+        _async_client = AsyncMongoClient(mongo_uri, **client_options)
+        db = _async_client[db_name]
+        _async_db_collections = AsyncDbCollections(
+            users=db["users"],
+            contacts=db["contacts"],
+            contact_notes=db["contact_notes"]
+        )
+
+def get_async_db_collections() -> AsyncDbCollections:
+    if _async_db_collections is None:
+        raise RuntimeError("Async DB not initialized. Call init_async_db() on startup.")
+    return _async_db_collections
+
+async def close_async_db() -> None:
+    global _async_client, _async_db_collections
+    if _async_client is not None:
+        await _async_client.close()
+    _async_client = None
+    _async_db_collections = None
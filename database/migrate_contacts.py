@@ -0,0 +1,79 @@
+"""
+One-off migrations over the contacts collection.
+
+  encodings   rewrite `encoding` from a list of doubles to packed float32 BinData
+              (see contact_repo.pack_encoding); documents already packed are skipped
+  name-tokens backfill `name_tokens` (see contact_repo.normalize_name_tokens) for
+              contacts stored before name search used it
+
+Usage: python database/migrate_contacts.py [--dry-run] [--batch-size 500]
+Safe to re-run: every step only touches documents that still need it.
+"""
+import os
+import sys
+import argparse
+
+from pymongo import MongoClient, UpdateOne
+
+# Add backend to path to import config if not installed as package
+sys.path.append(os.path.join(os.path.dirname(__file__), '../backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.config import config
+from repos.contact_repo import normalize_name_tokens, pack_encoding
+
+
+def migrate_encodings(contacts, batch_size: int, dry_run: bool) -> int:
+    query = {"encoding": {"$type": "array"}}
+    pending = contacts.count_documents(query)
+    print(f"encodings: {pending} contacts still store a list of doubles")
+    if dry_run or not pending:
+        return 0
+
+    migrated = 0
+    batch = []
+    for doc in contacts.find(query, {"_id": 1, "encoding": 1}):
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"encoding": pack_encoding(doc["encoding"])}}))
+        if len(batch) >= batch_size:
+            migrated += contacts.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        migrated += contacts.bulk_write(batch, ordered=False).modified_count
+
+    print(f"encodings: packed {migrated} contacts")
+    return migrated
+
+
+def migrate_name_tokens(contacts, batch_size: int, dry_run: bool) -> int:
+    query = {"name_tokens": {"$exists": False}}
+    pending = contacts.count_documents(query)
+    print(f"name-tokens: {pending} contacts have no name_tokens")
+    if dry_run or not pending:
+        return 0
+
+    migrated = 0
+    batch = []
+    for doc in contacts.find(query, {"_id": 1, "first_name": 1, "last_name": 1}):
+        tokens = normalize_name_tokens(doc.get("first_name"), doc.get("last_name"))
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"name_tokens": tokens}}))
+        if len(batch) >= batch_size:
+            migrated += contacts.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        migrated += contacts.bulk_write(batch, ordered=False).modified_count
+
+    print(f"name-tokens: backfilled {migrated} contacts")
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only count the documents that would change")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    client = MongoClient(config.mongo_url)
+    contacts = client[config.db_name]["contacts"]
+    migrate_encodings(contacts, args.batch_size, args.dry_run)
+    migrate_name_tokens(contacts, args.batch_size, args.dry_run)
+    client.close()
@@ -1,7 +1,31 @@
-from pydantic import BaseModel, EmailStr, Field
+from typing import Annotated
+
+import numpy as np
+from pydantic import BaseModel, EmailStr, Field, PlainSerializer, PlainValidator, WithJsonSchema
 from datetime import datetime, timezone
 
 
+def _to_face_encoding(value) -> np.ndarray | None:
+    # Packed float32 BinData (bson.Binary is a bytes subclass) -> zero-copy view;
+    # legacy documents still hold a list of doubles
+    if value is None:
+        return None
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype="<f4")
+    return np.asarray(value, dtype=np.float32)
+
+
+# 128-d face encoding: a float32 array in Python, a list of numbers in JSON
+FaceEncoding = Annotated[
+    np.ndarray,
+    PlainValidator(_to_face_encoding),
+    PlainSerializer(lambda value: value.tolist(), when_used="json"),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
+
 class User(BaseModel):
     user_id: str
     username: str
@@ -37,7 +61,7 @@ class Contact(BaseModel):
     # Unified fields for Face Recognition
     age: int | None = None
     image_path: str | None = None
-    encoding: list[float] | None = None
+    encoding: FaceEncoding | None = None
     last_modified: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     @property
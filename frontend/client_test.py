@@ -1,4 +1,5 @@
 import asyncio
+import os
 import websockets
 import cv2
 import numpy as np
@@ -7,7 +8,8 @@ async def send_video_data() -> None:
     """
     Captures video from the default camera and streams it to the WebSocket server.
     """
-    uri: str = "ws://localhost:8000/ws/video-producer"
+    # session_token returned by POST /login
+    uri: str = f"ws://localhost:8000/ws/video-producer?token={os.environ.get('SESSION_TOKEN', '')}"
     
     # Open local webcam (0 is usually the default camera)
     cap: cv2.VideoCapture = cv2.VideoCapture(0)
@@ -30,6 +30,8 @@ function AppLayout() {
   const handleLogout = () => {
     localStorage.removeItem('altitudeUser')
     setNavOpen(false)
+    // Clears the session cookie; fire and forget, the local state is already gone
+    fetch('http://192.168.137.1:8000/logout', { method: 'POST', credentials: 'include' }).catch(() => {})
   }
 
   return (
@@ -18,6 +18,8 @@ function Login() {
         headers: {
           "Content-Type": "application/json",
         },
+        // The response sets the session cookie the other requests and websockets rely on
+        credentials: "include",
         body: JSON.stringify(data),
       });
 
@@ -90,7 +90,7 @@ function Profile() {
       setIsProfileLoading(true)
       setProfileError('')
       try {
-        const response = await fetch(endpoint, { signal: controller.signal })
+        const response = await fetch(endpoint, { signal: controller.signal, credentials: 'include' })
         if (!response.ok) {
           throw new Error('Profile request failed.')
         }
@@ -144,7 +144,7 @@ function Profile() {
       try {
         const response = await fetch(
           `${endpoint}?q=${encodeURIComponent(trimmed)}`,
-          { signal: controller.signal },
+          { signal: controller.signal, credentials: 'include' },
         )
         if (!response.ok) {
           throw new Error('Search request failed.')
@@ -110,7 +110,9 @@ function VideoProcessing() {
       lastRecognizedIdRef.current = contactId
 
       try {
-        const response = await fetch(`http://192.168.137.1:8000/person/${contactId}`)
+        const response = await fetch(`http://192.168.137.1:8000/person/${contactId}`, {
+          credentials: 'include',
+        })
         if (!response.ok) {
           throw new Error('Recognition lookup failed')
         }
@@ -275,6 +277,7 @@ function VideoProcessing() {
       const response = await fetch(UPLOAD_AUDIO_ENDPOINT, {
         method: 'POST',
         body: formData,
+        credentials: 'include',
       })
 
       if (!response.ok) {
@@ -6,22 +6,33 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL ?? ''
  * @param {Object} options
  * @param {AbortSignal} [options.signal] - Abort signal for cancelling the request
  * @param {string} [options.sort] - Sort order: 'last_modified' (default) or 'alphabetical'
- * @returns {Promise<Array>} List of person objects
+ * @returns {Promise<Array>} List of person objects (all pages)
  */
 export async function fetchPeople({ signal, sort = 'last_modified' } = {}) {
-  const endpoint = `http://192.168.137.1:8000/people?sort=${sort}`
-  
-  const response = await fetch(endpoint, {
-    signal,
-    cache: 'no-store'
-  })
+  const people = []
+  let cursor = null
 
-  if (!response.ok) {
-    throw new Error(`Request failed with status ${response.status}`)
-  }
+  do {
+    const endpoint = `http://192.168.137.1:8000/people?sort=${sort}`
+      + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '')
 
-  const data = await response.json()
-  return Array.isArray(data) ? data : data?.results ?? [] 
+    const response = await fetch(endpoint, {
+      signal,
+      cache: 'no-store',
+      credentials: 'include',
+    })
+
+    if (!response.ok) {
+      throw new Error(`Request failed with status ${response.status}`)
+    }
+
+    const data = await response.json()
+    people.push(...(Array.isArray(data) ? data : data?.results ?? []))
+    // The backend returns one page at a time; X-Next-Cursor points at the next one
+    cursor = response.headers.get('X-Next-Cursor')
+  } while (cursor)
+
+  return people
 }
 
 /**
@@ -31,7 +42,7 @@ export async function fetchPeople({ signal, sort = 'last_modified' } = {}) {
  */
 export async function searchUsers(query, signal) {
   const endpoint = `http://192.168.137.1:8000/searchUser?q=${encodeURIComponent(query)}`
-  const response = await fetch(endpoint, { signal })
+  const response = await fetch(endpoint, { signal, credentials: 'include' })
   if (!response.ok) {
     throw new Error(`Search failed: ${response.status}`)
   }
@@ -46,7 +57,7 @@ export async function searchUsers(query, signal) {
  */
 export async function searchInfo(query, signal) {
   const endpoint = `http://192.168.137.1:8000/searchInfo?q=${encodeURIComponent(query)}`
-  const response = await fetch(endpoint, { signal })
+  const response = await fetch(endpoint, { signal, credentials: 'include' })
   if (!response.ok) {
     throw new Error(`Search failed: ${response.status}`)
   }